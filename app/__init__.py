@@ -1,36 +1,53 @@
 import os
-from flask import Flask, current_app
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "CVPA1996")
+ARBITRE_TOKEN = os.environ.get("ARBITRE_TOKEN")
+METRIQUES_TOKEN = os.environ.get("METRIQUES_TOKEN")
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
-USE_POSTGRES = DATABASE_URL is not None
+USE_POSTGRES = (DATABASE_URL or "").startswith(("postgres://", "postgresql://"))
 
 # 🏐 Multi-torneig
 TOURNAMENT_SLUG = os.environ.get("TOURNAMENT_SLUG", "default")
 TOURNAMENT_TITLE = os.environ.get("TOURNAMENT_TITLE", "Torneig CVPA")
+# Domini dels subdominis de torneig: <slug>.TORNEIGS_DOMINI
+TORNEIGS_DOMINI = (os.environ.get("TORNEIGS_DOMINI") or "").lower() or None
+# Capçalera X-Torneig: només darrere d'un proxy de confiança (o en proves)
+TORNEIGS_CAPCALERA = os.environ.get("TORNEIGS_CAPCALERA") == "1"
+# Proxies de confiança davant de l'app: X-Forwarded-For/-Proto només
+# es fan servir (remote_addr) si n'hi ha
+PROXIES_CONFIANCA = int(os.environ.get("PROXIES_CONFIANCA", "0"))
 
 
 def create_app():
     app = Flask(__name__)
+    if PROXIES_CONFIANCA > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXIES_CONFIANCA, x_proto=PROXIES_CONFIANCA)
 
     # CONFIG
     app.config["SECRET_KEY"] = SECRET_KEY
     app.config["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    app.config["ARBITRE_TOKEN"] = ARBITRE_TOKEN
+    app.config["METRIQUES_TOKEN"] = METRIQUES_TOKEN
     app.config["DATABASE_URL"] = DATABASE_URL
     app.config["USE_POSTGRES"] = USE_POSTGRES
 
     # MULTI-TORNEIG CONFIG
     app.config["TOURNAMENT_SLUG"] = TOURNAMENT_SLUG
     app.config["TOURNAMENT_TITLE"] = TOURNAMENT_TITLE
+    app.config["TORNEIGS_DOMINI"] = TORNEIGS_DOMINI
+    app.config["TORNEIGS_CAPCALERA"] = TORNEIGS_CAPCALERA
 
-    # Deixa variables disponibles a tots els templates
+    # Deixa variables disponibles a tots els templates (del torneig de la petició)
     @app.context_processor
     def inject_tournament():
+        from .torneigs import slug_torneig, titol_torneig
         return {
-            "TOURNAMENT_TITLE": current_app.config.get("TOURNAMENT_TITLE", "Torneig CVPA"),
-            "TOURNAMENT_SLUG": current_app.config.get("TOURNAMENT_SLUG", "default"),
+            "TOURNAMENT_TITLE": titol_torneig(),
+            "TOURNAMENT_SLUG": slug_torneig(),
         }
 
     # INIT DB + MIGRATIONS (quan l'app ja existeix)
@@ -45,11 +62,36 @@ def create_app():
     from .routes import main_bp, admin_bd_bp
     from .routes_fasefinal import admin_fasefinal_bp
     from .routes_jugador import jugador_bp
+    from .routes_arbitre import arbitre_bp
+    from .routes_pwa import pwa_bp
+    from .assets import assets_bp
+    from .compressio import compressio_bp
+    from .cache_render import cache_render_bp
+    from .routes_metriques import metriques_bp
+    from .torneigs import torneigs_bp
+    from .instantania import instantania_bp
+    from .degradacio import degradacio_bp
+    from .admissio import admissio_bp
+    from .feines import feines_bp
 
+    # La compressió es registra primer perquè s'executi l'última (after_request)
+    app.register_blueprint(compressio_bp)
+    # El torneig es fixa abans de qualsevol altre before_request
+    app.register_blueprint(torneigs_bp)
+    # Control d'admissió just després: una petició rebutjada no fa res més
+    app.register_blueprint(admissio_bp)
+    app.register_blueprint(metriques_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(admin_bd_bp)
     app.register_blueprint(admin_fasefinal_bp)
     app.register_blueprint(jugador_bp)
+    app.register_blueprint(arbitre_bp)
+    app.register_blueprint(pwa_bp)
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(cache_render_bp)
+    app.register_blueprint(instantania_bp)
+    app.register_blueprint(degradacio_bp)
+    app.register_blueprint(feines_bp)
 
     @app.route("/ping")
     def ping():
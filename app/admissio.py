@@ -0,0 +1,228 @@
+# ---------------------------------------------------------
+# 🚦 CONTROL D'ADMISSIÓ PER CLASSES DE PETICIÓ
+# ---------------------------------------------------------
+# Cada petició es classifica pel seu endpoint:
+#   pesada:   PDF dels grups, exportació Excel, recàlculs
+#   lleugera: lectures dels espectadors (jugador, instantània, quadres...)
+# Cada classe té un màxim de peticions simultànies per procés, calculat a
+# partir dels fils del treballador (WEB_THREADS, el mateix que fa servir
+# el Procfile a gunicorn --threads). Una petició a la cua ja ocupa un fil,
+# així que per defecte no hi ha cua: si la classe és plena es respon 503 +
+# Retry-After de seguida. Les pesades, com a molt una quarta part dels
+# fils; les lleugeres, tots menys un (per a l'admin i els àrbitres).
+# Així unes quantes descàrregues de PDF no poden deixar sense fils els
+# espectadors. La feina llarga de debò va a app/feines.py.
+#
+#   WEB_THREADS=8
+#   ADMISSIO_PESADA="2,0,0"      simultànies, places a la cua, segons d'espera
+#   ADMISSIO_LLEUGERA="7,0,0"    (per defecte, a partir de WEB_THREADS)
+#   ADMISSIO_PROCESSOS=0         processos a part per a la feina pesada
+#                                (PDF, Excel); 0: al fil de la petició
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Blueprint, Response, g, jsonify, request
+
+# endpoint -> mètodes (None: tots)
+PESADES = {
+    "admin_bd.descarregar_pdf_grup": None,
+    "admin_bd.export_excel": None,
+    "admin_bd.confeccio_grups": {"POST"},
+    "admin_fasefinal.fase_final_recalcular": None,
+    "torneigs.api_crear_torneig": None,
+}
+
+LLEUGERES = {
+    "main.index",
+    "instantania.api_instantania",
+    "instantania.api_canvis",
+    "admin_fasefinal.api_quadre",
+    "admin_fasefinal.api_equips_fase",
+    "arbitre.api_partits_grup",
+    "arbitre.api_partit",
+    "pwa.api_versio",
+}
+
+
+FILS = int(os.environ.get("WEB_THREADS", "8"))
+
+
+def _config(nom, defecte):
+    simultanies, cua, espera = (os.environ.get(nom) or defecte).split(",")
+    return int(simultanies), int(cua), float(espera)
+
+
+def _config_pesada():
+    simultanies, cua, espera = _config("ADMISSIO_PESADA", f"{max(1, FILS // 4)},0,0")
+    # Pesades actives + a la cua: mai més de la meitat dels fils
+    maxim = max(1, FILS // 2)
+    if simultanies + cua > maxim:
+        print(f"⚠️ ADMISSIO_PESADA ({simultanies}+{cua}) supera la meitat dels {FILS} fils: es limita a {maxim}")
+        simultanies = min(simultanies, maxim)
+        cua = maxim - simultanies
+    return simultanies, cua, espera
+
+
+class Classe:
+    """Semàfor amb cua limitada i temps d'espera màxim."""
+
+    def __init__(self, nom, simultanies, cua, espera):
+        self.nom = nom
+        self.simultanies = simultanies
+        self.cua = cua
+        self.espera = espera
+        self.actives = 0
+        self.esperant = 0
+        self.ateses = 0
+        self.rebutjades = 0
+        self.durada_mitjana = None  # segons (mitjana mòbil)
+        self._cond = threading.Condition()
+
+    def entrar(self):
+        with self._cond:
+            if self.actives < self.simultanies:
+                self.actives += 1
+                return True
+            if self.esperant >= self.cua:
+                self.rebutjades += 1
+                return False
+
+            self.esperant += 1
+            limit = time.monotonic() + self.espera
+            try:
+                while self.actives >= self.simultanies:
+                    resta = limit - time.monotonic()
+                    if resta <= 0:
+                        self.rebutjades += 1
+                        return False
+                    self._cond.wait(resta)
+            finally:
+                self.esperant -= 1
+            self.actives += 1
+            return True
+
+    def sortir(self, durada):
+        with self._cond:
+            self.actives -= 1
+            self.ateses += 1
+            if self.durada_mitjana is None:
+                self.durada_mitjana = durada
+            else:
+                self.durada_mitjana = 0.8 * self.durada_mitjana + 0.2 * durada
+            self._cond.notify()
+
+    def reintentar(self):
+        """Segons estimats fins que hi hagi lloc (per a Retry-After)."""
+        with self._cond:
+            durada = self.durada_mitjana or 1.0
+            return max(1, math.ceil(durada * (self.esperant + 1) / self.simultanies))
+
+    def estat(self):
+        with self._cond:
+            return {
+                "simultanies": self.simultanies,
+                "cua": self.cua,
+                "actives": self.actives,
+                "esperant": self.esperant,
+                "ateses": self.ateses,
+                "rebutjades": self.rebutjades,
+                "durada_mitjana": round(self.durada_mitjana, 3) if self.durada_mitjana else None,
+            }
+
+
+classes = {
+    "pesada": Classe("pesada", *_config_pesada()),
+    "lleugera": Classe("lleugera", *_config("ADMISSIO_LLEUGERA", f"{max(1, FILS - 1)},0,0")),
+}
+
+
+def classe_peticio():
+    endpoint = request.endpoint
+    if endpoint in PESADES:
+        metodes = PESADES[endpoint]
+        if metodes is None or request.method in metodes:
+            return classes["pesada"]
+    if request.blueprint == "jugador" or endpoint in LLEUGERES:
+        return classes["lleugera"]
+    return None
+
+
+# ---------------------------------------------------------
+# 🏭 FEINA PESADA EN PROCESSOS A PART
+# ---------------------------------------------------------
+# El PDF i l'Excel són Python pur (GIL): en un procés a part, el fil de la
+# petició només espera el resultat i els altres fils continuen servint.
+PROCESSOS = int(os.environ.get("ADMISSIO_PROCESSOS", "0"))
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def _processos():
+    global _pool
+    if _pool is None:
+        with _lock_pool:
+            if _pool is None:
+                # spawn: cap connexió ni lock del procés pare passa al fill
+                _pool = ProcessPoolExecutor(PROCESSOS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def executar_pesat(funcio, *args):
+    """funcio(*args) al pool de processos si n'hi ha; si no, aquí mateix."""
+    if PROCESSOS <= 0:
+        return funcio(*args)
+    return _processos().submit(funcio, *args).result()
+
+
+def executar_pesats(funcio, llista_args):
+    """Com map(): funcio(*args) per a cada args, en paral·lel si hi ha pool; resultats en ordre."""
+    if PROCESSOS <= 0:
+        return (funcio(*args) for args in llista_args)
+    return _processos().map(funcio, *zip(*llista_args))
+
+
+# ---------------------------------------------------------
+# 🌐 HOOKS I ESTAT
+# ---------------------------------------------------------
+admissio_bp = Blueprint("admissio", __name__)
+
+
+@admissio_bp.before_app_request
+def admetre():
+    classe = classe_peticio()
+    if classe is None:
+        return None
+    if not classe.entrar():
+        msg = "Massa peticions en aquest moment, torna-ho a provar d'aquí a uns segons"
+        if "/api/" in request.path or request.is_json:
+            resp = jsonify({"ok": False, "msg": msg})
+        else:
+            resp = Response(msg, mimetype="text/plain")
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(classe.reintentar())
+        return resp
+    g.classe_admissio = classe
+    g.inici_admissio = time.monotonic()
+    return None
+
+
+@admissio_bp.teardown_app_request
+def alliberar(exc):
+    classe = g.pop("classe_admissio", None)
+    if classe is not None:
+        classe.sortir(time.monotonic() - g.pop("inici_admissio"))
+
+
+@admissio_bp.route("/api/admissio")
+def api_estat_admissio():
+    return jsonify({
+        "ok": True,
+        "fils": FILS,
+        "processos": PROCESSOS,
+        "classes": {nom: c.estat() for nom, c in classes.items()},
+    })
@@ -0,0 +1,397 @@
+# ---------------------------------------------------------
+# 🖼 PIPELINE D'ASSETS ESTÀTICS
+# ---------------------------------------------------------
+# python -m app.assets  genera app/static/dist/ amb còpies amb empremta
+# de contingut, variants WebP/AVIF de les imatges (si hi ha Pillow),
+# còpies precomprimides .gz/.br i el manifest assets.json.
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import sys
+
+from flask import Blueprint, request, send_from_directory, url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow és opcional: sense ell només es copien les imatges
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DIR_STATIC = os.path.join(os.path.dirname(__file__), "static")
+DIR_DIST = os.path.join(DIR_STATIC, "dist")
+MANIFEST = "assets.json"
+
+# Fitxers que han de mantenir una URL fixa (no s'empremten)
+EXCLOSOS = {"service-worker.js", "manifest.json"}
+
+EXT_IMATGE = {".png", ".jpg", ".jpeg"}
+EXT_TEXT = {".js", ".css", ".json", ".svg", ".html", ".txt"}
+
+# Amplades (px) de les variants d'imatge; mai per sobre de l'original
+AMPLADES = (180, 360, 720, 1280)
+
+MIN_COMPRIMIR = 512  # bytes
+
+
+# ---------------------------------------------------------
+# ✂️ MINIFICACIÓ (conservadora: comentaris i espais)
+# ---------------------------------------------------------
+def minificar_css(text):
+    sortida = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == "\\" else 1
+            sortida.append(text[i:j + 1])
+            i = j + 1
+        elif text.startswith("/*", i):
+            fi = text.find("*/", i + 2)
+            i = n if fi < 0 else fi + 2
+        elif c.isspace():
+            while i < n and text[i].isspace():
+                i += 1
+            anterior = sortida[-1][-1:] if sortida else ""
+            if anterior and anterior not in "{};,>:" and i < n and text[i] not in "{};,>":
+                sortida.append(" ")
+        else:
+            sortida.append(c)
+            i += 1
+    return "".join(sortida).replace(";}", "}").strip()
+
+
+# Si el darrer caràcter significatiu és un d'aquests, "/" obre una regex
+_ABANS_REGEX = set("(,=:[!&|?{};+-*%<>~^\n")
+
+
+def minificar_js(text):
+    """
+    Treu comentaris, sagnat i línies buides fora de cadenes, plantilles
+    i expressions regulars. Els salts de línia es mantenen (ASI).
+    """
+    sortida = []
+    i, n = 0, len(text)
+    # Una entrada per cada ${ obert dins d'una plantilla: claus pendents de tancar
+    plantilles = []
+
+    def anterior():
+        return "".join(sortida[-8:]).rstrip(" \t")
+
+    while i < n:
+        c = text[i]
+        if c == "`" or (c == "}" and plantilles and plantilles[-1] == 0):
+            if c == "}":
+                plantilles.pop()
+            j = i + 1
+            while j < n and text[j] != "`" and not text.startswith("${", j):
+                j += 2 if text[j] == "\\" else 1
+            if text.startswith("${", j):
+                plantilles.append(0)
+                sortida.append(text[i:j + 2])
+                i = j + 2
+            else:
+                sortida.append(text[i:j + 1])
+                i = j + 1
+        elif c in "\"'":
+            j = i + 1
+            while j < n and text[j] != c and text[j] != "\n":
+                j += 2 if text[j] == "\\" else 1
+            sortida.append(text[i:j + 1])
+            i = j + 1
+        elif text.startswith("//", i):
+            fi = text.find("\n", i)
+            i = n if fi < 0 else fi
+        elif text.startswith("/*", i):
+            fi = text.find("*/", i + 2)
+            i = n if fi < 0 else fi + 2
+        elif c == "/" and (anterior()[-1:] or "\n") in _ABANS_REGEX | {"\n"} or (
+            c == "/" and anterior().endswith(("return", "typeof"))
+        ):
+            j, classe = i + 1, False
+            while j < n and text[j] != "\n" and (classe or text[j] != "/"):
+                if text[j] == "\\":
+                    j += 1
+                elif text[j] == "[":
+                    classe = True
+                elif text[j] == "]":
+                    classe = False
+                j += 1
+            sortida.append(text[i:j + 1])
+            i = j + 1
+        elif c in "\r\n":
+            while sortida and sortida[-1] in (" ", "\t"):
+                sortida.pop()
+            if sortida and sortida[-1] != "\n":
+                sortida.append("\n")
+            while i < n and text[i] in " \t\r\n":
+                i += 1
+        elif c in " \t":
+            if sortida and sortida[-1] not in (" ", "\n"):
+                sortida.append(" ")
+            i += 1
+        else:
+            if plantilles and c in "{}":
+                plantilles[-1] += 1 if c == "{" else -1
+            sortida.append(c)
+            i += 1
+    return "".join(sortida).strip() + "\n"
+
+
+MINIFICADORS = {".css": minificar_css, ".js": minificar_js}
+
+
+# ---------------------------------------------------------
+# 🔨 CONSTRUCCIÓ
+# ---------------------------------------------------------
+def _empremta(dades):
+    return hashlib.sha256(dades).hexdigest()[:10]
+
+
+def _escriure(rel_original, dades, sufix=None, ext=None):
+    """Escriu dades a dist/ amb l'empremta al nom i en retorna la ruta relativa a static/."""
+    carpeta, nom = os.path.split(rel_original)
+    base, ext_original = os.path.splitext(nom)
+    if sufix:
+        base = f"{base}-{sufix}"
+    nom_final = f"{base}.{_empremta(dades)}{ext or ext_original}"
+
+    rel = os.path.join("dist", carpeta, nom_final).replace(os.sep, "/")
+    desti = os.path.join(DIR_STATIC, rel)
+    os.makedirs(os.path.dirname(desti), exist_ok=True)
+    with open(desti, "wb") as f:
+        f.write(dades)
+
+    if (ext or ext_original).lower() in EXT_TEXT and len(dades) >= MIN_COMPRIMIR:
+        with open(desti + ".gz", "wb") as f:
+            f.write(gzip.compress(dades, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(desti + ".br", "wb") as f:
+                f.write(brotli.compress(dades, quality=11))
+
+    return rel
+
+
+def _codificar(img, format_, **opcions):
+    buf = io.BytesIO()
+    img.save(buf, format=format_, **opcions)
+    return buf.getvalue()
+
+
+def _variants_imatge(rel, dades):
+    """Versió optimitzada de l'original + variants WebP/AVIF per amplades."""
+    entrada = {"url": None, "amplada": None, "variants": {}}
+
+    if Image is None:
+        entrada["url"] = _escriure(rel, dades)
+        return entrada
+
+    img = Image.open(io.BytesIO(dades))
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    entrada["amplada"] = img.width
+    ext = os.path.splitext(rel)[1].lower()
+
+    # Original optimitzat (mateix format), només si surt més petit
+    if ext == ".png":
+        optim = _codificar(img, "PNG", optimize=True)
+    else:
+        optim = _codificar(img.convert("RGB"), "JPEG", quality=85, optimize=True, progressive=True)
+    entrada["url"] = _escriure(rel, optim if len(optim) < len(dades) else dades)
+
+    # Les icones tenen mides exactes: no es redimensionen
+    amplades = [img.width] if rel.startswith("icons/") else (
+        [a for a in AMPLADES if a < img.width] + [min(img.width, AMPLADES[-1])]
+    )
+
+    formats = []
+    if features.check("webp"):
+        formats.append(("webp", "WEBP", {"quality": 80, "method": 6}))
+    if features.check("avif"):
+        formats.append(("avif", "AVIF", {"quality": 60, "speed": 8}))
+
+    for nom_format, format_pil, opcions in formats:
+        llista = []
+        for amplada in sorted(set(amplades)):
+            if amplada == img.width:
+                reduida = img
+            else:
+                alcada = round(img.height * amplada / img.width)
+                reduida = img.resize((amplada, alcada), Image.LANCZOS)
+            dades_v = _codificar(reduida, format_pil, **opcions)
+            llista.append({
+                "url": _escriure(rel, dades_v, sufix=str(amplada), ext="." + nom_format),
+                "amplada": amplada,
+            })
+        entrada["variants"][nom_format] = llista
+
+    return entrada
+
+
+def _fitxers_entrada(entrada):
+    yield entrada["url"]
+    for llista in entrada["variants"].values():
+        for v in llista:
+            yield v["url"]
+
+
+def construir_assets(verbose=True):
+    """
+    Regenera app/static/dist/ i el manifest d'assets. Els fitxers que no
+    han canviat des de l'última construcció es reaprofiten.
+    """
+    os.makedirs(DIR_DIST, exist_ok=True)
+    anterior = carregar_manifest()
+
+    manifest = {}
+    bytes_abans = bytes_despres = 0
+
+    for arrel, carpetes, fitxers in os.walk(DIR_STATIC):
+        carpetes[:] = [c for c in carpetes if os.path.join(arrel, c) != DIR_DIST]
+        for nom in sorted(fitxers):
+            cami = os.path.join(arrel, nom)
+            rel = os.path.relpath(cami, DIR_STATIC).replace(os.sep, "/")
+            ext = os.path.splitext(nom)[1].lower()
+            if rel in EXCLOSOS or nom.startswith(".") or (ext not in EXT_IMATGE | EXT_TEXT):
+                continue
+
+            with open(cami, "rb") as f:
+                dades = f.read()
+            font = _empremta(dades)
+
+            entrada = anterior.get(rel)
+            if not (
+                entrada and entrada.get("font") == font and
+                all(os.path.exists(os.path.join(DIR_STATIC, u)) for u in _fitxers_entrada(entrada))
+            ):
+                if ext in EXT_IMATGE:
+                    entrada = _variants_imatge(rel, dades)
+                elif ext in MINIFICADORS:
+                    minificat = MINIFICADORS[ext](dades.decode("utf-8")).encode("utf-8")
+                    entrada = {"url": _escriure(rel, minificat), "variants": {}}
+                else:
+                    entrada = {"url": _escriure(rel, dades), "variants": {}}
+                entrada["font"] = font
+            manifest[rel] = entrada
+
+            petita = min(
+                [os.path.getsize(os.path.join(DIR_STATIC, entrada["url"]))] +
+                [os.path.getsize(os.path.join(DIR_STATIC, v["url"]))
+                 for llista in entrada["variants"].values() for v in llista[:1]]
+            )
+            bytes_abans += len(dades)
+            bytes_despres += petita
+            if verbose:
+                print(f"  📦 {rel}: {len(dades) / 1024:.1f} KB -> {petita / 1024:.1f} KB")
+
+    # Esborrar fitxers de construccions anteriors que ja no es fan servir
+    vigents = {u for e in manifest.values() for u in _fitxers_entrada(e)}
+    for arrel, _, fitxers in os.walk(DIR_DIST):
+        for nom in fitxers:
+            rel = os.path.relpath(os.path.join(arrel, nom), DIR_STATIC).replace(os.sep, "/")
+            base = rel[:-3] if rel.endswith((".gz", ".br")) else rel
+            if base not in vigents and nom != MANIFEST:
+                os.remove(os.path.join(arrel, nom))
+
+    with open(os.path.join(DIR_DIST, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    if verbose:
+        print(f"✅ {len(manifest)} assets: {bytes_abans / 1024:.0f} KB -> {bytes_despres / 1024:.0f} KB (variant més petita)")
+    return manifest
+
+
+# ---------------------------------------------------------
+# 🔗 ÚS DES DE FLASK
+# ---------------------------------------------------------
+assets_bp = Blueprint("assets", __name__)
+
+_manifest_cache = {"mtime": None, "dades": {}}
+
+
+def carregar_manifest():
+    cami = os.path.join(DIR_DIST, MANIFEST)
+    try:
+        mtime = os.path.getmtime(cami)
+    except OSError:
+        return {}
+    if mtime != _manifest_cache["mtime"]:
+        with open(cami, encoding="utf-8") as f:
+            _manifest_cache.update(mtime=mtime, dades=json.load(f))
+    return _manifest_cache["dades"]
+
+
+def asset(rel):
+    """URL de l'asset amb empremta; si no s'ha construït, la ruta original."""
+    entrada = carregar_manifest().get(rel)
+    return url_for("static", filename=entrada["url"] if entrada else rel)
+
+
+def imatge(rel, alt="", classe="", mida=None):
+    """<picture> amb fonts AVIF/WebP i srcset per amplades (mida: px en pantalla)."""
+    entrada = carregar_manifest().get(rel)
+    attrs = f'alt="{escape(alt)}"'
+    if classe:
+        attrs += f' class="{escape(classe)}"'
+    if not entrada or not entrada["variants"]:
+        return Markup(f'<img src="{asset(rel)}" {attrs} decoding="async">')
+
+    sizes = f' sizes="{int(mida)}px"' if mida else ""
+    fonts = []
+    for nom_format in ("avif", "webp"):
+        llista = entrada["variants"].get(nom_format)
+        if not llista:
+            continue
+        srcset = ", ".join(
+            f'{url_for("static", filename=v["url"])} {v["amplada"]}w' for v in llista
+        )
+        fonts.append(f'<source type="image/{nom_format}" srcset="{srcset}"{sizes}>')
+
+    return Markup(
+        "<picture>" + "".join(fonts) +
+        f'<img src="{asset(rel)}" {attrs} decoding="async"></picture>'
+    )
+
+
+@assets_bp.app_context_processor
+def injectar_assets():
+    return {"asset": asset, "imatge": imatge}
+
+
+@assets_bp.route("/static/dist/<path:filename>")
+def static_dist(filename):
+    """Serveix dist/ amb cache immutable i la versió .br/.gz si el client l'accepta."""
+    acceptades = request.headers.get("Accept-Encoding", "")
+    mimetype = None
+    codificacio = None
+    nom = filename
+
+    for ext, enc in ((".br", "br"), (".gz", "gzip")):
+        if enc in acceptades and os.path.exists(os.path.join(DIR_DIST, filename + ext)):
+            mimetype = mimetypes.guess_type(filename)[0]
+            codificacio = enc
+            nom = filename + ext
+            break
+
+    resp = send_from_directory(DIR_DIST, nom, mimetype=mimetype, max_age=31536000)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers.pop("Content-Disposition", None)
+    if codificacio:
+        resp.headers["Content-Encoding"] = codificacio
+    return resp
+
+
+if __name__ == "__main__":
+    construir_assets(verbose="-q" not in sys.argv)
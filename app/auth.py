@@ -1,10 +1,33 @@
 from functools import wraps
-from flask import session, redirect, url_for, current_app
+from flask import g, session, redirect, url_for, current_app
+from db import llegint_de_replica
+
+
+def iniciar_sessio_admin():
+    """La sessió d'admin només val per al torneig on s'ha entrat (app/torneigs.py)."""
+    session["is_admin"] = True
+    session["torneig_admin"] = g.get("torneig")
+
+
+def es_admin():
+    # Sessions d'abans sense torneig_admin: cal tornar a entrar
+    return bool(session.get("is_admin")) and "torneig_admin" in session and \
+        session["torneig_admin"] == g.get("torneig")
+
 
 def require_admin(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
-        if not session.get("is_admin"):
+        if not es_admin():
             return redirect(url_for("main.admin_login"))
         return f(*args, **kwargs)
     return wrapper
+
+
+def lectura_publica(f):
+    """Vista de només lectura: sense sessió d'admin pot llegir de la rèplica."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        with llegint_de_replica(not es_admin()):
+            return f(*args, **kwargs)
+    return wrapper
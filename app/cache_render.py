@@ -0,0 +1,138 @@
+# ---------------------------------------------------------
+# 🧊 CACHE DE PÀGINES RENDERITZADES
+# ---------------------------------------------------------
+# Les pàgines de grups només canvien quan es desa alguna dada, és a dir,
+# quan puja la versió de dades (db.marcar_canvi). Es guarden els bytes
+# renderitzats (i les versions gzip/br) amb clau
+# (torneig, plantilla, grup o fase, versió de dades): una visita repetida
+# no toca ni la base de dades ni Jinja.
+import gzip
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from db import BaseDadesNoDisponible, obtenir_versio_dades, torneig_actual
+from .compressio import minimitzar_html
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CacheRender:
+    def __init__(self, max_entrades=256, precomprimir=True):
+        self.max_entrades = max_entrades
+        self.precomprimir = precomprimir
+        self._entrades = OrderedDict()
+        self._lock = threading.Lock()
+        self.encerts = 0
+        self.errades = 0
+
+    def obtenir(self, clau):
+        with self._lock:
+            entrada = self._entrades.get(clau)
+            if entrada is None:
+                self.errades += 1
+                return None
+            self._entrades.move_to_end(clau)
+            self.encerts += 1
+            return entrada
+
+    def guardar(self, clau, cos, mimetype):
+        if mimetype == "text/html":
+            cos = minimitzar_html(cos.decode("utf-8")).encode("utf-8")
+        entrada = {"cos": cos, "mimetype": mimetype}
+        if self.precomprimir and len(cos) >= 500:
+            entrada["gzip"] = gzip.compress(cos, compresslevel=9)
+            if brotli is not None:
+                entrada["br"] = brotli.compress(cos, quality=11)
+
+        with self._lock:
+            # Les entrades d'una versió anterior ja no tornaran a servir
+            versio = clau[-1]
+            for vella in [k for k in self._entrades if k[:-1] == clau[:-1] and k[-1] != versio]:
+                del self._entrades[vella]
+            self._entrades[clau] = entrada
+            while len(self._entrades) > self.max_entrades:
+                self._entrades.popitem(last=False)
+        return entrada
+
+    def buidar(self):
+        with self._lock:
+            self._entrades.clear()
+
+    def estat(self):
+        with self._lock:
+            total = self.encerts + self.errades
+            return {
+                "entrades": len(self._entrades),
+                "encerts": self.encerts,
+                "errades": self.errades,
+                "taxa_encert": round(self.encerts / total, 3) if total else None,
+            }
+
+
+cache_render = CacheRender()
+
+
+def _resposta(entrada):
+    acceptades = request.headers.get("Accept-Encoding", "").lower()
+    resp = Response(entrada["cos"], mimetype=entrada["mimetype"])
+    for codificacio in ("br", "gzip"):
+        if codificacio in acceptades and codificacio in entrada:
+            resp.set_data(entrada[codificacio])
+            resp.headers["Content-Encoding"] = codificacio
+            break
+    resp.vary.add("Accept-Encoding")
+    resp.headers["X-Cache-Render"] = "HIT"
+    return resp
+
+
+def cache_pagina(plantilla, clau=None):
+    """
+    Decorador per a vistes GET que només depenen de les dades: guarda la
+    resposta per (torneig, plantilla, clau(**kwargs), versió de dades). Les
+    peticions que no són GET, o amb query string, passen sempre per la vista.
+    """
+    def decorador(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if (
+                request.method != "GET" or request.query_string or
+                current_app.config.get("CACHE_RENDER_DESACTIVADA")
+            ):
+                return f(*args, **kwargs)
+
+            try:
+                versio = obtenir_versio_dades()
+            except Exception as e:
+                if not isinstance(e, BaseDadesNoDisponible):  # l'interruptor ja ho ha avisat
+                    print("⚠️ Cache de pàgines sense versió de dades:", e)
+                return f(*args, **kwargs)
+
+            k = (torneig_actual(), plantilla, clau(**kwargs) if clau else None, versio)
+            entrada = cache_render.obtenir(k)
+            if entrada is not None:
+                return _resposta(entrada)
+
+            resp = current_app.make_response(f(*args, **kwargs))
+            if resp.status_code == 200 and not resp.is_streamed and "Content-Encoding" not in resp.headers:
+                cache_render.guardar(k, resp.get_data(), resp.mimetype)
+                resp.headers["X-Cache-Render"] = "MISS"
+            return resp
+        return wrapper
+    return decorador
+
+
+# ---------------------------------------------------------
+# 📊 COMPTADORS (monitoratge)
+# ---------------------------------------------------------
+cache_render_bp = Blueprint("cache_render", __name__)
+
+
+@cache_render_bp.route("/api/cache-render")
+def api_estat_cache():
+    return jsonify({"ok": True, **cache_render.estat()})
@@ -0,0 +1,133 @@
+# ---------------------------------------------------------
+# 🗜 COMPRESSIÓ DE RESPOSTES (gzip / brotli)
+# ---------------------------------------------------------
+# Comprimeix les respostes de text segons Accept-Encoding. Les respostes
+# petites es deixen tal qual; les que es generen en streaming es
+# comprimeixen tros a tros. L'HTML es minimitza abans (sagnat i línies
+# buides fora de <script>, <style>, <pre> i <textarea>).
+import gzip
+import re
+import zlib
+
+from flask import Blueprint, current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+compressio_bp = Blueprint("compressio", __name__)
+
+MIN_BYTES = 500
+NIVELL_GZIP = 6
+NIVELL_BROTLI = 5  # prou ràpid per comprimir a cada petició
+
+TIPUS_COMPRIMIBLES = (
+    "text/html", "text/css", "text/plain", "text/csv", "text/xml",
+    "text/javascript", "application/javascript", "application/json",
+    "application/manifest+json", "image/svg+xml",
+)
+
+_BLOCS_LITERALS = re.compile(r"(<(script|style|pre|textarea)\b.*?</\2\s*>)", re.S | re.I)
+_SAGNAT = re.compile(r"\n[ \t\r\n]+")
+
+
+def minimitzar_html(html):
+    """Treu sagnat i línies buides de l'HTML, respectant els blocs literals."""
+    trossos = _BLOCS_LITERALS.split(html)
+    sortida = []
+    # split amb dos grups: [text, bloc, nom_etiqueta, text, bloc, nom, ...]
+    for i in range(0, len(trossos), 3):
+        sortida.append(_SAGNAT.sub("\n", trossos[i]))
+        if i + 1 < len(trossos):
+            sortida.append(trossos[i + 1])
+    return "".join(sortida).strip() + "\n"
+
+
+def _triar_codificacio(acceptades):
+    acceptades = acceptades.lower()
+    if brotli is not None and "br" in acceptades:
+        return "br"
+    if "gzip" in acceptades:
+        return "gzip"
+    return None
+
+
+def _comprimir(dades, codificacio):
+    if codificacio == "br":
+        return brotli.compress(dades, quality=NIVELL_BROTLI)
+    return gzip.compress(dades, compresslevel=NIVELL_GZIP)
+
+
+def _comprimir_stream(trossos, codificacio):
+    """Generador que comprimeix un iterable de bytes de manera incremental."""
+    if codificacio == "br":
+        comp = brotli.Compressor(quality=NIVELL_BROTLI)
+        for tros in trossos:
+            sortida = comp.process(tros) + comp.flush()
+            if sortida:
+                yield sortida
+        yield comp.finish()
+    else:
+        comp = zlib.compressobj(NIVELL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for tros in trossos:
+            # Z_SYNC_FLUSH perquè cada tros arribi al client sense esperar el final
+            sortida = comp.compress(tros) + comp.flush(zlib.Z_SYNC_FLUSH)
+            if sortida:
+                yield sortida
+        yield comp.flush()
+
+
+def _codificar_trossos(iterable, charset):
+    for tros in iterable:
+        yield tros.encode(charset) if isinstance(tros, str) else tros
+
+
+@compressio_bp.after_app_request
+def comprimir_resposta(resp):
+    if current_app.config.get("COMPRESSIO_DESACTIVADA"):
+        return resp
+
+    mimetype = resp.mimetype or ""
+    if (
+        request.method == "HEAD" or
+        resp.status_code < 200 or resp.status_code in (204, 206, 304) or
+        "Content-Encoding" in resp.headers or
+        resp.direct_passthrough or
+        mimetype not in TIPUS_COMPRIMIBLES
+    ):
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    codificacio = _triar_codificacio(request.headers.get("Accept-Encoding", ""))
+
+    if resp.is_streamed:
+        if codificacio:
+            resp.response = _comprimir_stream(
+                _codificar_trossos(resp.response, resp.charset), codificacio
+            )
+            resp.headers.pop("Content-Length", None)
+            resp.headers["Content-Encoding"] = codificacio
+        return resp
+
+    dades = resp.get_data()
+    if mimetype == "text/html":
+        minimitzat = minimitzar_html(dades.decode(resp.charset)).encode(resp.charset)
+        if len(minimitzat) < len(dades):
+            dades = minimitzat
+            resp.set_data(dades)
+
+    if not codificacio or len(dades) < MIN_BYTES:
+        return resp
+
+    comprimit = _comprimir(dades, codificacio)
+    if len(comprimit) >= len(dades):
+        return resp
+
+    resp.set_data(comprimit)
+    resp.headers["Content-Encoding"] = codificacio
+    # L'ETag de la versió sense comprimir ja no és vàlid byte a byte
+    if resp.headers.get("ETag") and not resp.headers["ETag"].startswith("W/"):
+        resp.headers["ETag"] = "W/" + resp.headers["ETag"]
+    return resp
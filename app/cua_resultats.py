@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+
+from db import desar_resultats_arbitres, en_torneig, netejar_resultats_enviats, torneig_actual
+
+
+# ---------------------------------------------------------
+# 📥 CUA D'ESCRIPTURA DE RESULTATS (API ÀRBITRES)
+# ---------------------------------------------------------
+# Totes les peticions d'un worker deixen l'enviament a la cua i un sol
+# fil escriptor els aplica en lots (una transacció per lot). Així una
+# ràfega de final de ronda no obre desenes de connexions ni competeix
+# pels mateixos bloquejos. Cada enviament recorda el seu torneig i el lot
+# es desa amb una transacció per torneig.
+
+class Enviament:
+    def __init__(self, dades):
+        self.dades = dades
+        self.torneig = torneig_actual()
+        self.fet = threading.Event()
+        self.resultat = None
+
+
+class CuaResultats:
+    def __init__(self, max_lot=50, espera_lot=0.05, max_cua=1000):
+        self.cua = queue.Queue(maxsize=max_cua)
+        self.max_lot = max_lot
+        self.espera_lot = espera_lot
+        self._fil = None
+        self._lock = threading.Lock()
+        self._ultima_neteja = time.monotonic()
+        self._torneigs = set()
+
+    def _arrencar(self):
+        with self._lock:
+            if self._fil is None or not self._fil.is_alive():
+                self._fil = threading.Thread(
+                    target=self._bucle, name="cua-resultats", daemon=True
+                )
+                self._fil.start()
+
+    def enviar(self, dades, timeout=10):
+        """
+        Encua un enviament i espera el resultat (codi, resposta).
+        Retorna None si no s'ha processat dins del timeout: el client pot
+        reintentar amb la mateixa clau sense risc de duplicats.
+        Llença queue.Full si la cua està plena.
+        """
+        self._arrencar()
+        env = Enviament(dades)
+        self.cua.put_nowait(env)
+        if env.fet.wait(timeout):
+            return env.resultat
+        return None
+
+    def _bucle(self):
+        while True:
+            lot = [self.cua.get()]
+            limit = time.monotonic() + self.espera_lot
+            while len(lot) < self.max_lot:
+                resta = limit - time.monotonic()
+                if resta <= 0:
+                    break
+                try:
+                    lot.append(self.cua.get(timeout=resta))
+                except queue.Empty:
+                    break
+
+            per_torneig = {}
+            for e in lot:
+                per_torneig.setdefault(e.torneig, []).append(e)
+
+            for torneig, enviaments in per_torneig.items():
+                self._torneigs.add(torneig)
+                try:
+                    with en_torneig(torneig):
+                        respostes = desar_resultats_arbitres([e.dades for e in enviaments])
+                except Exception as exc:
+                    print("⚠️ Error desant resultats d'àrbitres:", exc)
+                    respostes = {}
+                    error = (503, {"ok": False, "msg": "Error temporal desant el resultat, torna-ho a provar"})
+                    for e in enviaments:
+                        respostes[e.dades["clau"]] = error
+
+                for e in enviaments:
+                    e.resultat = respostes.get(e.dades["clau"])
+                    e.fet.set()
+
+            if time.monotonic() - self._ultima_neteja > 3600:
+                self._ultima_neteja = time.monotonic()
+                for torneig in list(self._torneigs):
+                    try:
+                        with en_torneig(torneig):
+                            netejar_resultats_enviats()
+                    except Exception as exc:
+                        print("⚠️ Error netejant claus d'idempotència:", exc)
+
+
+cua_resultats = CuaResultats()
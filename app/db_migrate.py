@@ -1,14 +1,28 @@
-import psycopg2
-from psycopg2.extras import DictCursor
-import os
+from db import BACKEND, get_conn, iniciar_registre_canvis, torneig_actual
+
+
+def afegir_columnes(conn, cur, taula, columns):
+    """
+    ALTER TABLE ADD COLUMN per cada columna que encara no existeixi.
+    Retorna [(taula, columna)] de les que s'han afegit ara.
+    """
+    afegides = []
+    conn.commit()
+    for col, definition in columns:
+        try:
+            cur.execute(f"ALTER TABLE {taula} ADD COLUMN {col} {definition};")
+            conn.commit()
+            afegides.append((taula, col))
+            print(f"  ➕ Afegida columna {taula}.{col}")
+        except Exception as e:
+            if not BACKEND.es_columna_duplicada(e):
+                raise
+            conn.rollback()
+    return afegides
 
-def run_migration():
-    DATABASE_URL = os.environ.get("DATABASE_URL")
-    if not DATABASE_URL:
-        print("⚠️ DATABASE_URL no definit — no es poden fer migracions")
-        return
 
-    conn = psycopg2.connect(DATABASE_URL, sslmode="require", cursor_factory=DictCursor)
+def run_migration():
+    conn = get_conn()
     cur = conn.cursor()
 
     print("🔧 Executant migració de taules…")
@@ -55,6 +69,79 @@ def run_migration():
         );
     """)
 
+    # Horari de cada partit (torn, pista i hora)
+    afegir_columnes(conn, cur, "partits", [
+        ("torn", "INTEGER"),
+        ("pista", "INTEGER"),
+        ("hora", "TEXT"),
+        ("versio", "INTEGER DEFAULT 0"),
+    ])
+
+    # Equips per id (els noms de text queden com a nom en el moment d'escriure).
+    # Les columnes d'id afegides ara s'omplen un sol cop al final, pel nom.
+    ids_nous = afegir_columnes(conn, cur, "partits", [
+        ("equip1_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL"),
+        ("equip2_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL"),
+        ("arbitre_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL"),
+    ])
+
+    # -------------------------------------
+    # VERSIÓ DE DADES
+    # -------------------------------------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS versio_dades (
+            id INTEGER PRIMARY KEY,
+            valor BIGINT NOT NULL DEFAULT 0
+        );
+    """)
+
+    # -------------------------------------
+    # REGISTRE DE CANVIS (SINCRONITZACIÓ INCREMENTAL)
+    # -------------------------------------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS registre_canvis (
+            ambit TEXT,
+            clau INTEGER,
+            revisio BIGINT NOT NULL,
+            dades TEXT,
+            PRIMARY KEY (ambit, clau)
+        );
+    """)
+    iniciar_registre_canvis(cur)
+
+    # -------------------------------------
+    # RESULTATS ENVIATS (IDEMPOTÈNCIA API ÀRBITRES)
+    # -------------------------------------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resultats_enviats (
+            clau TEXT PRIMARY KEY,
+            partit_id INTEGER,
+            resposta TEXT,
+            creat TIMESTAMP DEFAULT NOW()
+        );
+    """)
+
+    # -------------------------------------
+    # FEINES EN SEGON PLA
+    # -------------------------------------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feines (
+            id SERIAL PRIMARY KEY,
+            tipus TEXT NOT NULL,
+            estat TEXT NOT NULL DEFAULT 'pendent',
+            progres REAL DEFAULT 0,
+            missatge TEXT,
+            parametres TEXT,
+            entrada BYTEA,
+            resultat BYTEA,
+            nom_resultat TEXT,
+            tipus_resultat TEXT,
+            creada TIMESTAMP DEFAULT NOW(),
+            actualitzada TIMESTAMP DEFAULT NOW(),
+            acabada TIMESTAMP
+        );
+    """)
+
     # -------------------------------------
     # CLASSIFICACIÓ FINAL
     # -------------------------------------
@@ -70,6 +157,8 @@ def run_migration():
         );
     """)
 
+    ids_nous += afegir_columnes(conn, cur, "classificacio_final", [("equip_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL")])
+
     # -------------------------------------
     # CLASSIFICACIÓ ELIMINATS
     # -------------------------------------
@@ -83,6 +172,8 @@ def run_migration():
         );
     """)
 
+    ids_nous += afegir_columnes(conn, cur, "classificacio_eliminats", [("equip_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL")])
+
     # -------------------------------------
     # CONFIG FASES FINALS
     # -------------------------------------
@@ -93,6 +184,9 @@ def run_migration():
         );
     """)
 
+    # Format del quadre de cada fase (NULL = automàtic segons el nombre d'equips)
+    afegir_columnes(conn, cur, "config_fases_finals", [("format", "TEXT")])
+
     # -------------------------------------
     # FASE FINAL EQUIPS
     # -------------------------------------
@@ -115,14 +209,10 @@ def run_migration():
         ("dif_gol", "INTEGER DEFAULT 0"),
         ("pos_grup", "INTEGER DEFAULT 0"),
         ("grup", "INTEGER DEFAULT 0"),
+        ("equip_id", "INTEGER REFERENCES equips(id) ON DELETE SET NULL"),
     ]
 
-    for col, definition in columns:
-        try:
-            cur.execute(f"ALTER TABLE fase_final_equips ADD COLUMN {col} {definition};")
-            print(f"  ➕ Afegida columna {col}")
-        except psycopg2.errors.DuplicateColumn:
-            conn.rollback()
+    ids_nous += afegir_columnes(conn, cur, "fase_final_equips", columns)
 
     # -------------------------------------
     # GALERIA
@@ -135,6 +225,90 @@ def run_migration():
         );
     """)
 
+    # -------------------------------------
+    # REGISTRE DE TORNEIGS (només a l'espai original)
+    # -------------------------------------
+    if torneig_actual() is None:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS torneigs (
+                slug TEXT PRIMARY KEY,
+                titol TEXT NOT NULL,
+                creat TIMESTAMP DEFAULT NOW()
+            );
+        """)
+
+    # -------------------------------------
+    # ÍNDEXS
+    # -------------------------------------
+    for nom, definicio in INDEXS:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {nom} ON {definicio};")
+
+    if ids_nous:
+        omplir_ids_equips(cur, ids_nous)
+
     conn.commit()
     conn.close()
     print("🎉 Migracions completades!")
+
+
+INDEXS = [
+    ("idx_partits_grup", "partits (grup, id)"),
+    ("idx_partits_equip1", "partits (equip1_id)"),
+    ("idx_partits_equip2", "partits (equip2_id)"),
+    ("idx_partits_arbitre", "partits (arbitre_id)"),
+    ("idx_classificacio_final_posicio", "classificacio_final (posicio)"),
+    ("idx_fase_final_equips_fase", "fase_final_equips (fase, posicio)"),
+    ("idx_registre_canvis_revisio", "registre_canvis (revisio)"),
+    ("idx_feines_estat", "feines (estat, id)"),
+]
+
+# (taula, columna amb el nom, columna amb l'id)
+COLUMNES_EQUIP = [
+    ("partits", "equip1", "equip1_id"),
+    ("partits", "equip2", "equip2_id"),
+    ("partits", "arbitre", "arbitre_id"),
+    ("classificacio_final", "equip_nom", "equip_id"),
+    ("classificacio_eliminats", "equip_nom", "equip_id"),
+    ("fase_final_equips", "equip_nom", "equip_id"),
+]
+
+
+def omplir_ids_equips(cur, columnes=None):
+    """
+    Omple els ids d'equip que falten a partir del nom desat (dades d'abans
+    de la migració), només a les `columnes` [(taula, columna d'id)] si es
+    donen. Retorna {(taula, columna): files sense equip}.
+    """
+    sense_equip = {}
+    for taula, col_nom, col_id in COLUMNES_EQUIP:
+        if columnes is not None and (taula, col_id) not in columnes:
+            continue
+        cur.execute(f"""
+            UPDATE {taula}
+            SET {col_id} = (SELECT MIN(e.id) FROM equips e WHERE e.nom_equip = {taula}.{col_nom})
+            WHERE {col_id} IS NULL AND {col_nom} IS NOT NULL
+        """)
+        cur.execute(f"SELECT COUNT(*) FROM {taula} WHERE {col_id} IS NULL AND {col_nom} IS NOT NULL")
+        sense_equip[(taula, col_nom)] = cur.fetchone()[0]
+    return sense_equip
+
+
+if __name__ == "__main__":
+    # Eina d'emplenament: python -m app.db_migrate
+    from db import en_torneig, ensure_db_exists, obtenir_torneigs
+
+    ensure_db_exists()
+    run_migration()
+    for torneig in [None] + [r["slug"] for r in obtenir_torneigs()]:
+        with en_torneig(torneig):
+            if torneig is not None:
+                ensure_db_exists()
+                run_migration()
+            conn = get_conn()
+            orfes = omplir_ids_equips(conn.cursor())
+            conn.commit()
+            conn.close()
+        for (taula, col), n in orfes.items():
+            if n:
+                print(f"⚠️ [{torneig or 'principal'}] {taula}.{col}: {n} files sense cap equip amb aquest nom")
+    print("✅ Ids d'equip omplerts")
@@ -0,0 +1,204 @@
+# ---------------------------------------------------------
+# 🛟 ÚLTIMA CÒPIA BONA (base de dades lenta o caiguda)
+# ---------------------------------------------------------
+# Cada pàgina pública (i els JSON que fan servir) que es respon bé es
+# guarda, un cop per versió de dades, en memòria i a disc (ULTIM_BO_DIR).
+# Si després la base de dades cau, supera DB_LATENCIA_MAX o té
+# l'interruptor obert (db.interruptor), es torna aquesta còpia amb l'avís
+# "dades de les HH:MM" en lloc d'un error. Sense còpia: 503 + Retry-After.
+# La resta d'errors (de programa, deadlocks...) són un 500 normal i no
+# compten per a l'interruptor.
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Blueprint, Response, g, jsonify, request
+from markupsafe import escape
+
+from db import ERRORS_BD, BaseDadesNoDisponible, es_error_connexio, interruptor, obtenir_versio_dades
+from .auth import es_admin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIR_ULTIM_BO = os.environ.get("ULTIM_BO_DIR") or os.path.join(os.getcwd(), "ultim_bo")
+
+# Rutes públiques de les quals es guarda còpia (sense query string)
+PREFIXOS_PUBLICS = (
+    "/jugador",
+    "/api/instantania",
+    "/admin/fasefinal/api/quadre/",
+    "/admin/fasefinal/api/equips/",
+)
+
+REINTENTAR_PER_DEFECTE = 30  # segons (Retry-After sense interruptor obert)
+
+
+def es_publica(cami):
+    return cami == "/" or cami.startswith(PREFIXOS_PUBLICS)
+
+
+class UltimBo:
+    """Còpies (torneig, camí) -> {versio, instant, mimetype, cos}, en memòria i a disc."""
+
+    def __init__(self, directori=DIR_ULTIM_BO, max_entrades=512):
+        self.directori = directori
+        self.max_entrades = max_entrades
+        self._entrades = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fitxer(self, clau):
+        nom = hashlib.sha1(repr(clau).encode("utf-8")).hexdigest()
+        return os.path.join(self.directori, nom)
+
+    def versio(self, clau):
+        with self._lock:
+            entrada = self._entrades.get(clau)
+        return entrada["versio"] if entrada else None
+
+    def guardar(self, clau, versio, mimetype, cos):
+        entrada = {"versio": versio, "instant": time.time(), "mimetype": mimetype, "cos": cos}
+        with self._lock:
+            self._entrades[clau] = entrada
+            self._entrades.move_to_end(clau)
+            while len(self._entrades) > self.max_entrades:
+                vella, _ = self._entrades.popitem(last=False)
+                self._esborrar(vella)
+
+        # Capçalera JSON d'una línia + cos; temporal + replace (mai mig fitxer)
+        os.makedirs(self.directori, exist_ok=True)
+        fitxer = self._fitxer(clau)
+        capcalera = {k: entrada[k] for k in ("versio", "instant", "mimetype")}
+        temporal = f"{fitxer}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(json.dumps(capcalera).encode("utf-8") + b"\n" + cos)
+        os.replace(temporal, fitxer)
+
+    def _esborrar(self, clau):
+        try:
+            os.remove(self._fitxer(clau))
+        except OSError:
+            pass
+
+    def obtenir(self, clau):
+        with self._lock:
+            entrada = self._entrades.get(clau)
+        if entrada is not None:
+            return entrada
+        # Després d'un reinici, la còpia que hi hagi a disc
+        try:
+            with open(self._fitxer(clau), "rb") as f:
+                capcalera, cos = f.read().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+        entrada = {**json.loads(capcalera), "cos": cos}
+        with self._lock:
+            self._entrades.setdefault(clau, entrada)
+        return entrada
+
+
+ultim_bo = UltimBo()
+
+degradacio_bp = Blueprint("degradacio", __name__)
+
+
+def _clau():
+    # g.torneig es fixa abans de tocar la base de dades (app/torneigs.py):
+    # encara que falli la resolució del torneig, mai es serveix la d'un altre
+    return (g.get("torneig"), request.path)
+
+
+def _cos_descomprimit(resp):
+    codificacio = resp.headers.get("Content-Encoding")
+    cos = resp.get_data()
+    if codificacio == "gzip":
+        return gzip.decompress(cos)
+    if codificacio == "br" and brotli is not None:
+        return brotli.decompress(cos)
+    return None if codificacio else cos
+
+
+@degradacio_bp.after_app_request
+def desar_ultim_bo(resp):
+    if (
+        request.method != "GET" or request.query_string or resp.status_code != 200 or
+        resp.is_streamed or es_admin() or not es_publica(request.path) or
+        "X-Dades-Antigues" in resp.headers
+    ):
+        return resp
+    try:
+        versio = obtenir_versio_dades()
+        clau = _clau()
+        if ultim_bo.versio(clau) != versio:
+            cos = _cos_descomprimit(resp)
+            if cos is not None:
+                ultim_bo.guardar(clau, versio, resp.mimetype, cos)
+    except Exception as e:
+        print("⚠️ No s'ha pogut desar l'última còpia bona:", e)
+    return resp
+
+
+def _marcar_antiga(entrada):
+    hora = time.strftime("%H:%M", time.localtime(entrada["instant"]))
+    cos = entrada["cos"]
+
+    if entrada["mimetype"] == "text/html":
+        avis = (
+            '<div style="background:#ffe08a;color:#5a4300;padding:8px 12px;'
+            'text-align:center;font-weight:700">'
+            f"⚠️ Sense connexió amb les dades: informació de les {escape(hora)}</div>"
+        ).encode("utf-8")
+        inici = cos.find(b"<body")
+        fi = cos.find(b">", inici) + 1 if inici >= 0 else 0
+        cos = cos[:fi] + avis + cos[fi:]
+    elif entrada["mimetype"] == "application/json":
+        dades = json.loads(cos)
+        if isinstance(dades, dict):
+            dades["dades_antigues"] = hora
+            cos = json.dumps(dades, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    resp = Response(cos, mimetype=entrada["mimetype"])
+    resp.headers["X-Dades-Antigues"] = hora
+    resp.headers["Warning"] = '110 - "Response is Stale"'
+    # Que ni el navegador ni el service worker ni cap CDN la guardin
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+def servir_ultim_bo(e):
+    publica = request.method == "GET" and es_publica(request.path) and not es_admin()
+    if not es_error_connexio(e, lectura_publica=publica):
+        raise e  # error de programa, deadlock...: un 500 normal, sense tocar l'interruptor
+
+    if not isinstance(e, BaseDadesNoDisponible):
+        interruptor.error(e)
+
+    if publica:
+        entrada = ultim_bo.obtenir(_clau())
+        if entrada is not None:
+            return _marcar_antiga(entrada)
+
+    reintentar = getattr(e, "reintentar", None) or REINTENTAR_PER_DEFECTE
+    msg = "Les dades no estan disponibles ara mateix, torna-ho a provar d'aquí a una estona"
+    if "/api/" in request.path or request.is_json:
+        resp = jsonify({"ok": False, "msg": msg})
+    else:
+        resp = Response(msg, mimetype="text/plain")
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(int(reintentar))
+    return resp
+
+
+for _error in ERRORS_BD:
+    degradacio_bp.app_errorhandler(_error)(servir_ultim_bo)
+
+
+@degradacio_bp.route("/api/degradacio")
+def api_estat_degradacio():
+    return jsonify({"ok": True, "interruptor": interruptor.estat()})
@@ -0,0 +1,269 @@
+# ---------------------------------------------------------
+# 🧵 FEINES EN SEGON PLA
+# ---------------------------------------------------------
+# Recalcular la classificació, importar l'Excel d'equips, els PDF de tots
+# els grups i el reset de la competició es feien dins la petició HTTP i
+# podien passar del timeout de gunicorn. Ara la petició només crea la
+# feina a la taula feines (que fa de cua: cap broker extern) i respon 202.
+# Un fil del procés l'executa, amb la part de CPU (PDF, Excel) al pool de
+# processos d'admissio.py (ADMISSIO_PROCESSOS), i l'admin en segueix el progrés:
+#
+#   POST /admin/feines/<tipus>         crea la feina (202 + Location)
+#   GET  /admin/feines                 les últimes feines
+#   GET  /admin/feines/<id>            estat, progrés i missatge
+#   GET  /admin/feines/<id>/resultat   el fitxer resultant (zip de PDF...)
+#
+#   FEINES_FILS=2          feines alhora per procés
+#   FEINES_ORFES_HORES     feines en curs sense progrés des de fa tant de
+#                          temps es donen per interrompudes (0.25 = 15 min)
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, jsonify, request, send_file, url_for
+
+from db import (
+    acabar_feina,
+    actualitzar_feina,
+    crear_feina,
+    en_torneig,
+    ids_feines_pendents,
+    netejar_feines,
+    obtenir_feina,
+    obtenir_feines,
+    obtenir_partits_per_grup,
+    obtenir_resultat_feina,
+    reclamar_feina,
+    reset_competicio,
+    substituir_equips,
+    tancar_feines_orfes,
+    torneig_actual,
+)
+from documents import llegir_excel_equips, pdf_grup
+from .admissio import executar_pesat, executar_pesats
+from .auth import require_admin
+from .routes_fasefinal import recalcular_classificacio_final
+
+FILS = int(os.environ.get("FEINES_FILS", "2"))
+ORFES_HORES = float(os.environ.get("FEINES_ORFES_HORES", "0.25"))
+
+INTERVAL_PROGRES = 0.5  # segons mínims entre escriptures de progrés
+
+
+class ErrorFeina(Exception):
+    """Error previst d'una feina: el missatge és per a l'admin."""
+
+
+class Feina:
+    """Context d'una feina en curs: paràmetres, progrés i resultat."""
+
+    def __init__(self, feina_id, parametres, entrada):
+        self.id = feina_id
+        self.parametres = parametres
+        self.entrada = entrada
+        self.resultat = None  # (bytes, nom, mimetype)
+        self._ultim_progres = 0.0
+
+    def progres(self, fraccio, missatge=None):
+        ara = time.monotonic()
+        if missatge is None and ara - self._ultim_progres < INTERVAL_PROGRES:
+            return
+        self._ultim_progres = ara
+        actualitzar_feina(self.id, round(min(max(fraccio, 0.0), 1.0), 3), missatge)
+
+    def desar_resultat(self, dades, nom, mimetype):
+        self.resultat = (dades, nom, mimetype)
+
+
+# ---------------------------------------------------------
+# 📋 TIPUS DE FEINA (cadascuna retorna el missatge final)
+# ---------------------------------------------------------
+def feina_recalcular(feina):
+    feina.progres(0.1, "Calculant la classificació dels grups")
+    equips = recalcular_classificacio_final()
+    if not equips:
+        raise ErrorFeina("No hi ha dades per generar la classificació.")
+    return f"Classificació regenerada ({equips} equips)."
+
+
+def feina_importar(feina):
+    if not feina.entrada:
+        raise ErrorFeina("No s'ha rebut cap fitxer Excel.")
+    feina.progres(0.1, "Llegint l'Excel")
+    files = executar_pesat(llegir_excel_equips, feina.entrada)
+    feina.progres(0.6, f"Desant {len(files)} equips")
+    substituir_equips(files)
+    return f"{len(files)} equips importats."
+
+
+def feina_pdf_grups(feina):
+    partits = {g: llista for g, llista in obtenir_partits_per_grup().items() if g is not None}
+    if not partits:
+        raise ErrorFeina("No hi ha partits en cap grup.")
+
+    grups = sorted(partits)
+    sortida = io.BytesIO()
+    with zipfile.ZipFile(sortida, "w", zipfile.ZIP_DEFLATED) as zf:
+        pdfs = executar_pesats(pdf_grup, [(g, partits[g]) for g in grups])
+        for i, (grup, pdf) in enumerate(zip(grups, pdfs), start=1):
+            zf.writestr(f"grup_{grup}.pdf", pdf)
+            feina.progres(i / len(grups), f"PDF del grup {grup} ({i}/{len(grups)})")
+
+    feina.desar_resultat(sortida.getvalue(), "grups.zip", "application/zip")
+    return f"PDF de {len(grups)} grups."
+
+
+def feina_reset(feina):
+    reset_competicio()
+    return "Competició reiniciada."
+
+
+TIPUS = {
+    "recalcular": feina_recalcular,
+    "importar": feina_importar,
+    "pdf_grups": feina_pdf_grups,
+    "reset": feina_reset,
+}
+
+
+# ---------------------------------------------------------
+# ⚙️ EXECUCIÓ
+# ---------------------------------------------------------
+_fils = None
+_lock = threading.Lock()
+_represos = set()
+
+
+def _executor():
+    global _fils
+    if _fils is None:
+        with _lock:
+            if _fils is None:
+                _fils = ThreadPoolExecutor(FILS, thread_name_prefix="feines")
+    return _fils
+
+
+def executar(torneig, feina_id):
+    with en_torneig(torneig):
+        fila = reclamar_feina(feina_id)
+        if fila is None:
+            return  # ja la fa (o l'ha feta) un altre procés
+        tipus, parametres, entrada = fila[0], fila[1], fila[2]
+        feina = Feina(feina_id, json.loads(parametres or "{}"), bytes(entrada) if entrada is not None else None)
+
+        inici = time.monotonic()
+        try:
+            missatge = TIPUS[tipus](feina)
+        except ErrorFeina as e:
+            acabar_feina(feina_id, "error", str(e))
+        except Exception as e:
+            print(f"⚠️ Error a la feina {feina_id} ({tipus}):", e)
+            acabar_feina(feina_id, "error", f"Error inesperat: {e}")
+        else:
+            acabar_feina(feina_id, "feta", missatge, *(feina.resultat or ()))
+            print(f"🧵 Feina {feina_id} ({tipus}) feta en {time.monotonic() - inici:.1f} s")
+
+
+def _executar_segur(torneig, feina_id):
+    try:
+        executar(torneig, feina_id)
+    except Exception as e:
+        # Sense base de dades ni per marcar l'error: la tancarà tancar_feines_orfes
+        print(f"⚠️ No s'ha pogut executar la feina {feina_id}:", e)
+
+
+def encuar(torneig, feina_id):
+    _executor().submit(_executar_segur, torneig, feina_id)
+
+
+def programar_feina(tipus, parametres=None, entrada=None):
+    """Crea la feina al torneig actual i l'encua. Retorna l'id."""
+    torneig = torneig_actual()
+    reprendre(torneig)
+    netejar_feines()
+    feina_id = crear_feina(tipus, parametres, entrada)
+    encuar(torneig, feina_id)
+    return feina_id
+
+
+def reprendre(torneig):
+    """Un cop per procés i torneig: tanca les feines orfes i encua les pendents."""
+    if torneig in _represos:
+        return
+    with _lock:
+        if torneig in _represos:
+            return
+        _represos.add(torneig)
+    tancar_feines_orfes(ORFES_HORES)
+    for feina_id in ids_feines_pendents():
+        encuar(torneig, feina_id)
+
+
+# ---------------------------------------------------------
+# 🌐 API
+# ---------------------------------------------------------
+feines_bp = Blueprint("feines", __name__)
+
+
+def feina_json(fila):
+    feta_amb_fitxer = fila["estat"] == "feta" and fila["nom_resultat"]
+    return {
+        "id": fila["id"],
+        "tipus": fila["tipus"],
+        "estat": fila["estat"],
+        "progres": fila["progres"],
+        "missatge": fila["missatge"],
+        "creada": str(fila["creada"]),
+        "acabada": str(fila["acabada"]) if fila["acabada"] else None,
+        "resultat": url_for("feines.api_resultat_feina", feina_id=fila["id"]) if feta_amb_fitxer else None,
+    }
+
+
+@feines_bp.route("/admin/feines/<tipus>", methods=["POST"])
+@require_admin
+def api_crear_feina(tipus):
+    if tipus not in TIPUS:
+        return jsonify({"ok": False, "msg": f"Tipus de feina desconegut: {tipus}"}), 404
+
+    fitxer = request.files.get("fitxer")
+    entrada = fitxer.read() if fitxer else None
+    parametres = request.get_json(silent=True) or {}
+
+    feina_id = programar_feina(tipus, parametres, entrada)
+    resp = jsonify({"ok": True, "msg": "Feina encuada", "feina": feina_json(obtenir_feina(feina_id))})
+    resp.status_code = 202
+    resp.headers["Location"] = url_for("feines.api_feina", feina_id=feina_id)
+    return resp
+
+
+@feines_bp.route("/admin/feines", methods=["GET"])
+@require_admin
+def api_feines():
+    reprendre(torneig_actual())
+    return jsonify({"ok": True, "feines": [feina_json(f) for f in obtenir_feines()]})
+
+
+@feines_bp.route("/admin/feines/<int:feina_id>", methods=["GET"])
+@require_admin
+def api_feina(feina_id):
+    reprendre(torneig_actual())
+    fila = obtenir_feina(feina_id)
+    if fila is None:
+        return jsonify({"ok": False, "msg": "Aquesta feina no existeix"}), 404
+    resp = jsonify({"ok": True, "feina": feina_json(fila)})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@feines_bp.route("/admin/feines/<int:feina_id>/resultat", methods=["GET"])
+@require_admin
+def api_resultat_feina(feina_id):
+    resultat = obtenir_resultat_feina(feina_id)
+    if resultat is None:
+        return jsonify({"ok": False, "msg": "Aquesta feina no té cap fitxer (encara)"}), 404
+    dades, nom, mimetype = resultat
+    return send_file(io.BytesIO(dades), mimetype=mimetype, as_attachment=True, download_name=nom)
@@ -0,0 +1,258 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Blueprint, Response, jsonify, request
+
+from classificacio import classificacio_grup
+from db import (
+    fetchall,
+    llegir_canvis,
+    obtenir_config_fases_finals,
+    obtenir_grups_guardats,
+    obtenir_partits_per_grup,
+    obtenir_versio_dades,
+    torneig_actual,
+)
+from registres import Partit
+from .auth import lectura_publica
+from .routes_fasefinal import CAMPS_PARTIT, carregar_quadre, fila_partit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # opcional: sense msgpack només es serveix JSON
+    msgpack = None
+
+# ---------------------------------------------------------
+# 📸 INSTANTÀNIA DEL TORNEIG
+# ---------------------------------------------------------
+# Un espectador obtenia el torneig amb moltes peticions (llista de grups,
+# cada grup, equips i quadre de cada fase). Ara n'hi ha prou amb una:
+#
+#   GET /api/instantania               tot el torneig
+#   GET /api/instantania?des_de=V      només els grups i fases que han
+#                                      canviat des de la versió V (304 si
+#                                      V és l'actual)
+#   ?format=msgpack                    en lloc de JSON (si hi ha msgpack)
+#
+# Es construeix un cop per torneig i versió de dades (db.marcar_canvi) i
+# totes les peticions comparteixen els mateixos bytes, també els
+# comprimits (gzip/br).
+#
+# Per a consultes freqüents (quadre o resultats en directe) hi ha el
+# registre de canvis (db.llegir_canvis), element a element:
+#
+#   GET /api/canvis?des_de=R&ambit=quadre:OR&ambit=grup:3
+#       {"revisio": R2, "complet": false, "canvis": {ambit: [fila, ...]}}
+#       complet=true: cal tornar a carregar-ho tot (i continuar des de R2)
+
+CAMPS = {
+    "partit": Partit._fields,
+    "classificacio": ("equip", "pj", "punts", "pg", "pp", "favor", "contra", "diferencia"),
+    "quadre": CAMPS_PARTIT,
+}
+
+FORMATS = {"json": "application/json", "msgpack": "application/msgpack"}
+
+MIN_COMPRIMIR = 500
+
+
+# ========================================================
+# 🧱 CONSTRUCCIÓ
+# ========================================================
+def construir_instantania(versio):
+    partits = obtenir_partits_per_grup()
+    equips = obtenir_grups_guardats()
+    pistes = {g: p for g, p in fetchall("SELECT grup, pista FROM pistes_grup")}
+
+    grups = {}
+    for g in sorted(set(equips) | set(partits)):
+        llista = partits.get(g, [])
+        grups[str(g)] = {
+            "pista": pistes.get(g),
+            "equips": [e.nom_equip for e in equips.get(g, [])],
+            "partits": [list(p) for p in llista],
+            "classificacio": [
+                [equip, s.pj, s.punts, s.pg, s.pp, s.favor, s.contra, s.diferencia]
+                for equip, s in classificacio_grup(llista)
+            ],
+        }
+
+    fases = {}
+    for fase in obtenir_config_fases_finals():
+        noms, estat = carregar_quadre(fase)
+        quadre = None
+        if estat is not None:
+            quadre = {
+                "format": estat.quadre.format,
+                "final": estat.quadre.final,
+                "partits": [fila_partit(estat, pid) for pid in sorted(estat.quadre.partits)],
+            }
+        fases[fase] = {"equips": noms, "quadre": quadre}
+
+    return {"versio": versio, "camps": CAMPS, "grups": grups, "fases": fases}
+
+
+def delta(antiga, nova):
+    """Grups i fases que han canviat (o desaparegut) entre dues instantànies."""
+    resultat = {"versio": nova["versio"], "des_de": antiga["versio"], "delta": True}
+    eliminats = {}
+    for seccio in ("grups", "fases"):
+        abans, ara = antiga[seccio], nova[seccio]
+        resultat[seccio] = {k: v for k, v in ara.items() if abans.get(k) != v}
+        eliminats[seccio] = sorted(k for k in abans if k not in ara)
+    resultat["eliminats"] = eliminats
+    return resultat
+
+
+# ========================================================
+# 🧊 CACHE (per torneig, les últimes versions)
+# ========================================================
+class Codificada:
+    """Bytes d'una resposta en un format, amb les versions comprimides."""
+    __slots__ = ("cos", "gzip", "br")
+
+    def __init__(self, cos):
+        self.cos = cos
+        self.gzip = self.br = None
+        if len(cos) >= MIN_COMPRIMIR:
+            self.gzip = gzip.compress(cos, compresslevel=9)
+            if brotli is not None:
+                self.br = brotli.compress(cos, quality=11)
+
+
+def codificar(dades, format):
+    if format == "msgpack":
+        return Codificada(msgpack.packb(dades, use_bin_type=True))
+    return Codificada(json.dumps(dades, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+class CacheInstantanies:
+    def __init__(self, versions_per_torneig=16):
+        self.versions_per_torneig = versions_per_torneig
+        self._torneigs = {}       # torneig -> OrderedDict(versio -> dades)
+        self._codificades = {}    # (torneig, des_de, versio, format) -> Codificada
+        self._lock = threading.Lock()
+        self._construint = {}     # torneig -> Lock (una sola construcció alhora)
+        self.construccions = 0
+
+    def dades(self, torneig, versio):
+        """Instantània de la versió; només una petició la construeix, la resta l'espera."""
+        with self._lock:
+            versions = self._torneigs.setdefault(torneig, OrderedDict())
+            if versio in versions:
+                return versions[versio]
+            lock = self._construint.setdefault(torneig, threading.Lock())
+
+        with lock:
+            with self._lock:
+                if versio in versions:
+                    return versions[versio]
+            dades = construir_instantania(versio)
+            with self._lock:
+                versions[versio] = dades
+                self.construccions += 1
+                while len(versions) > self.versions_per_torneig:
+                    vella, _ = versions.popitem(last=False)
+                    for clau in [k for k in self._codificades if k[0] == torneig and vella in k[1:3]]:
+                        del self._codificades[clau]
+            return dades
+
+    def antiga(self, torneig, versio):
+        with self._lock:
+            return self._torneigs.get(torneig, {}).get(versio)
+
+    def codificada(self, torneig, des_de, versio, format, generar):
+        clau = (torneig, des_de, versio, format)
+        with self._lock:
+            entrada = self._codificades.get(clau)
+        if entrada is None:
+            entrada = codificar(generar(), format)
+            with self._lock:
+                self._codificades[clau] = entrada
+        return entrada
+
+    def buidar(self):
+        with self._lock:
+            self._torneigs.clear()
+            self._codificades.clear()
+
+
+cache_instantanies = CacheInstantanies()
+
+
+# ========================================================
+# 🌐 API
+# ========================================================
+instantania_bp = Blueprint("instantania", __name__)
+
+
+def _resposta(entrada, format, etag):
+    acceptades = request.headers.get("Accept-Encoding", "").lower()
+    resp = Response(entrada.cos, mimetype=FORMATS[format])
+    for codificacio in ("br", "gzip"):
+        comprimit = getattr(entrada, codificacio)
+        if codificacio in acceptades and comprimit is not None:
+            resp.set_data(comprimit)
+            resp.headers["Content-Encoding"] = codificacio
+            break
+    resp.vary.add("Accept-Encoding")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@instantania_bp.route("/api/instantania", methods=["GET"])
+@lectura_publica
+def api_instantania():
+    format = request.args.get("format", "json")
+    if format not in FORMATS:
+        return jsonify({"ok": False, "msg": f"Format desconegut: {format}"}), 400
+    if format == "msgpack" and msgpack is None:
+        return jsonify({"ok": False, "msg": "msgpack no està instal·lat al servidor"}), 406
+
+    torneig = torneig_actual()
+    versio = obtenir_versio_dades()
+    des_de = request.args.get("des_de", type=int)
+    etag = f"{versio}.{format}"
+
+    if des_de == versio or request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    nova = cache_instantanies.dades(torneig, versio)
+    antiga = cache_instantanies.antiga(torneig, des_de) if des_de is not None else None
+    if antiga is None:
+        # Sense versió de partida (o massa antiga): instantània completa
+        entrada = cache_instantanies.codificada(torneig, None, versio, format, lambda: nova)
+    else:
+        entrada = cache_instantanies.codificada(
+            torneig, des_de, versio, format, lambda: delta(antiga, nova)
+        )
+    return _resposta(entrada, format, etag)
+
+
+@instantania_bp.route("/api/canvis", methods=["GET"])
+@lectura_publica
+def api_canvis():
+    des_de = request.args.get("des_de", type=int)
+    if des_de is None:
+        return jsonify({"ok": False, "msg": "Cal indicar des_de (revisió)"}), 400
+    ambits = request.args.getlist("ambit") or None
+
+    revisio, complet, canvis = llegir_canvis(des_de, ambits)
+    resp = jsonify({"ok": True, "revisio": revisio, "complet": complet, "canvis": canvis})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@instantania_bp.route("/api/instantania/estat")
+def api_estat_instantanies():
+    return jsonify({"ok": True, "construccions": cache_instantanies.construccions})
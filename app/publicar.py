@@ -0,0 +1,258 @@
+# ---------------------------------------------------------
+# 🌍 PUBLICACIÓ ESTÀTICA DE LES PÀGINES PÚBLIQUES
+# ---------------------------------------------------------
+# python -m app.publicar [directori] [--torneig SLUG] [--tot] [-q]
+#
+# Renderitza les pàgines de jugador (llista de grups, cada grup, fases
+# finals, equips i quadres) i els JSON que fan servir (quadres, equips,
+# instantània) a un directori que pot servir qualsevol servidor estàtic o
+# CDN, sense cap consulta a la base de dades:
+#
+#   /jugador/grup/3          -> jugador/grup/3/index.html
+#   /admin/fasefinal/api/... -> el mateix camí (JSON, sense extensió)
+#
+# Cada fitxer de text va acompanyat de .gz i .br (gzip_static/brotli_static).
+# Només es tornen a generar les pàgines dels grups i fases que han canviat
+# des de l'última publicació (.publicacio.json); si canvien les plantilles
+# o els assets, es regenera tot. Les cerques d'equips continuen sent
+# dinàmiques.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from .assets import DIR_DIST, DIR_STATIC, MANIFEST
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIR_PLANTILLES = os.path.join(os.path.dirname(__file__), "templates")
+MANIFEST_PUBLICACIO = ".publicacio.json"
+MIN_COMPRIMIR = 512  # bytes
+
+# Camins que es publiquen tal qual (la resta són pàgines: <camí>/index.html)
+PREFIXOS_FITXER = ("/api/", "/admin/fasefinal/api/", "/service-worker.js")
+
+
+def _empremta(dades):
+    return hashlib.sha256(dades).hexdigest()[:16]
+
+
+def _empremta_json(dades):
+    return _empremta(json.dumps(dades, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
+def empremta_codi():
+    """Plantilles i manifest d'assets: si canvien, cal regenerar-ho tot."""
+    h = hashlib.sha256()
+    for arrel, carpetes, fitxers in os.walk(DIR_PLANTILLES):
+        carpetes.sort()
+        for nom in sorted(fitxers):
+            with open(os.path.join(arrel, nom), "rb") as f:
+                h.update(nom.encode("utf-8") + f.read())
+    cami = os.path.join(DIR_DIST, MANIFEST)
+    if os.path.exists(cami):
+        with open(cami, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def cami_fitxer(url):
+    if url.startswith(PREFIXOS_FITXER):
+        return url.lstrip("/")
+    return os.path.join(url.strip("/"), "index.html").replace(os.sep, "/")
+
+
+def escriure(desti, rel, dades):
+    """Escriu el fitxer (i .gz/.br) només si el contingut ha canviat. Retorna si l'ha escrit."""
+    cami = os.path.join(desti, rel)
+    if os.path.exists(cami):
+        with open(cami, "rb") as f:
+            if f.read() == dades:
+                return False
+
+    os.makedirs(os.path.dirname(cami), exist_ok=True)
+    versions = {cami: dades}
+    if len(dades) >= MIN_COMPRIMIR:
+        versions[cami + ".gz"] = gzip.compress(dades, compresslevel=9, mtime=0)
+        if brotli is not None:
+            versions[cami + ".br"] = brotli.compress(dades, quality=11)
+
+    for sufix in (".gz", ".br"):
+        if cami + sufix not in versions and os.path.exists(cami + sufix):
+            os.remove(cami + sufix)
+    # Temporal + replace: el servidor estàtic mai serveix mig fitxer
+    for nom, contingut in versions.items():
+        with open(nom + ".tmp", "wb") as f:
+            f.write(contingut)
+        os.replace(nom + ".tmp", nom)
+    return True
+
+
+def esborrar(desti, rel):
+    for sufix in ("", ".gz", ".br"):
+        cami = os.path.join(desti, rel + sufix)
+        if os.path.exists(cami):
+            os.remove(cami)
+    # Carpetes que han quedat buides (p. ex. jugador/grup/13/)
+    carpeta = os.path.dirname(os.path.join(desti, rel))
+    while os.path.abspath(carpeta) != os.path.abspath(desti) and not os.listdir(carpeta):
+        os.rmdir(carpeta)
+        carpeta = os.path.dirname(carpeta)
+
+
+def copiar_static(desti):
+    """Mirall d'app/static a <desti>/static (només els fitxers canviats)."""
+    desti_static = os.path.join(desti, "static")
+    vigents = set()
+    copiats = 0
+    for arrel, _, fitxers in os.walk(DIR_STATIC):
+        for nom in fitxers:
+            origen = os.path.join(arrel, nom)
+            rel = os.path.relpath(origen, DIR_STATIC)
+            vigents.add(rel)
+            cami = os.path.join(desti_static, rel)
+            if os.path.exists(cami) and os.path.getsize(cami) == os.path.getsize(origen):
+                with open(cami, "rb") as a, open(origen, "rb") as b:
+                    if a.read() == b.read():
+                        continue
+            os.makedirs(os.path.dirname(cami), exist_ok=True)
+            shutil.copyfile(origen, cami)
+            copiats += 1
+
+    for arrel, _, fitxers in os.walk(desti_static):
+        for nom in fitxers:
+            rel = os.path.relpath(os.path.join(arrel, nom), desti_static)
+            if rel not in vigents:
+                os.remove(os.path.join(arrel, nom))
+    return copiats
+
+
+# ---------------------------------------------------------
+# 🗺 PÀGINES I SECCIONS DE DADES DE LES QUALS DEPENEN
+# ---------------------------------------------------------
+def seccions_instantania(inst):
+    """{secció: empremta} a partir de la instantània (app/instantania.py)."""
+    seccions = {
+        "grups": _empremta_json(sorted(inst["grups"], key=int)),
+        "fases": _empremta_json({f: len(d["equips"]) for f, d in inst["fases"].items()}),
+        "instantania": str(inst["versio"]),
+    }
+    for g, dades in inst["grups"].items():
+        seccions[f"grup:{g}"] = _empremta_json(dades)
+    for f, dades in inst["fases"].items():
+        seccions[f"fase:{f}"] = _empremta_json(dades)
+    return seccions
+
+
+def pagines(inst):
+    """[(url, secció o None)]: None vol dir que no depèn de les dades."""
+    llista = [
+        ("/", None),
+        ("/jugador/", None),
+        ("/service-worker.js", None),
+        ("/jugador/fase-grups", "grups"),
+        ("/jugador/fase-final", "fases"),
+        ("/api/instantania", "instantania"),
+    ]
+    for g in sorted(inst["grups"], key=int):
+        llista.append((f"/jugador/grup/{g}", f"grup:{g}"))
+    for f in sorted(inst["fases"]):
+        llista += [
+            (f"/jugador/fase-final/equips/{f}", f"fase:{f}"),
+            (f"/jugador/fase-final/view/{f}", None),
+            (f"/admin/fasefinal/api/equips/{f}", f"fase:{f}"),
+            (f"/admin/fasefinal/api/quadre/{f}", f"fase:{f}"),
+        ]
+    return llista
+
+
+# ---------------------------------------------------------
+# 🚀 PUBLICAR
+# ---------------------------------------------------------
+def publicar(desti, torneig=None, tot=False, verbose=True):
+    from . import create_app
+
+    app = create_app()
+    # Les peticions les fa aquest mateix procés: la capçalera és de fiar
+    app.config["TORNEIGS_CAPCALERA"] = True
+    client = app.test_client()
+    capcaleres = {"X-Torneig": torneig} if torneig else {}
+
+    cami_manifest = os.path.join(desti, MANIFEST_PUBLICACIO)
+    anterior = {}
+    if not tot and os.path.exists(cami_manifest):
+        with open(cami_manifest, encoding="utf-8") as f:
+            anterior = json.load(f)
+
+    codi = empremta_codi()
+    if anterior.get("codi") != codi or anterior.get("torneig") != torneig:
+        anterior = {}
+
+    resp = client.get("/api/instantania", headers=capcaleres)
+    if resp.status_code != 200:
+        raise RuntimeError(f"No s'ha pogut llegir la instantània ({resp.status_code})")
+    inst = resp.get_json()
+    seccions = seccions_instantania(inst)
+    seccions_abans = anterior.get("seccions", {})
+    fitxers_abans = anterior.get("fitxers", {})
+
+    fitxers = {}
+    escrits = iguals = 0
+    for url, seccio in pagines(inst):
+        rel = cami_fitxer(url)
+        vigent = rel in fitxers_abans and os.path.exists(os.path.join(desti, rel))
+        if vigent and (seccio is None or seccions_abans.get(seccio) == seccions[seccio]):
+            fitxers[rel] = fitxers_abans[rel]
+            iguals += 1
+            continue
+
+        resp = client.get(url, headers=capcaleres)
+        if resp.status_code != 200:
+            print(f"  ⚠️ {url}: {resp.status_code}, no es publica")
+            continue
+        dades = resp.get_data()
+        if escriure(desti, rel, dades):
+            escrits += 1
+            if verbose:
+                print(f"  📝 {rel} ({len(dades) / 1024:.1f} KB)")
+        else:
+            iguals += 1
+        fitxers[rel] = _empremta(dades)
+
+    esborrats = [rel for rel in fitxers_abans if rel not in fitxers]
+    for rel in esborrats:
+        esborrar(desti, rel)
+        if verbose:
+            print(f"  🗑 {rel}")
+
+    copiats = copiar_static(desti)
+
+    os.makedirs(desti, exist_ok=True)
+    with open(cami_manifest, "w", encoding="utf-8") as f:
+        json.dump({
+            "versio": inst["versio"],
+            "torneig": torneig,
+            "codi": codi,
+            "seccions": seccions,
+            "fitxers": fitxers,
+        }, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    if verbose:
+        print(f"✅ Versió {inst['versio']}: {escrits} fitxers nous o canviats, {iguals} sense canvis, "
+              f"{len(esborrats)} esborrats, {copiats} estàtics copiats -> {desti}")
+    return {"escrits": escrits, "iguals": iguals, "esborrats": len(esborrats), "static": copiats}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publica les pàgines públiques com a web estàtica")
+    parser.add_argument("directori", nargs="?", default=os.environ.get("PUBLICAR_DIR", "public"))
+    parser.add_argument("--torneig", help="slug del torneig (per defecte, el principal)")
+    parser.add_argument("--tot", action="store_true", help="regenera totes les pàgines")
+    parser.add_argument("-q", action="store_true", help="sense detall per fitxer")
+    args = parser.parse_args()
+    publicar(args.directori, torneig=args.torneig, tot=args.tot, verbose=not args.q)
@@ -10,6 +10,7 @@ from flask import (
     session,
     current_app,
     make_response,
+    jsonify,
 )
 from db import (
     afegir_equip,
@@ -22,31 +23,21 @@ from db import (
     generar_partits,
     obtenir_partits,
     actualitzar_resultat,
+    actualitzar_resultats,
     calcular_classificacio,
     execute,
     fetchall,
 )
-import pandas as pd
 import os
 import json
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
 from io import BytesIO
-from functools import wraps
-
-
-# ----------------------------------------------------------------------
-# 🔹 Decorador require_admin (control de sessió admin)
-# ----------------------------------------------------------------------
-def require_admin(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        if not session.get("is_admin"):
-            return redirect(url_for("main.admin_login"))
-        return f(*args, **kwargs)
-
-    return wrapper
+from .cache_render import cache_pagina
+from classificacio import repartir_serp
+from metriques import mesurar_pdf
+from documents import excel_equips, pdf_grup
+from .admissio import executar_pesat
+# Control de sessió admin (per torneig): app/auth.py
+from .auth import iniciar_sessio_admin, require_admin
 
 
 main_bp = Blueprint("main", __name__)
@@ -81,7 +72,7 @@ def admin_login():
     if request.method == "POST":
         pwd = request.form.get("password", "")
         if pwd == current_app.config["ADMIN_PASSWORD"]:
-            session["is_admin"] = True
+            iniciar_sessio_admin()
             return redirect("/admin")
         else:
             error = "Contrasenya incorrecta"
@@ -166,15 +157,9 @@ def admin_base_dades():
 # ----------------------------------------------------------------------
 @admin_bd_bp.route("/admin/basedades/export", methods=["GET"])
 def export_excel():
-    equips = obtenir_equips()
-    df = pd.DataFrame(
-        equips,
-        columns=["id", "jugadors", "equip", "valor", "email", "telefon", "grup", "ordre"],
-    )
-    df = df[["jugadors", "equip", "valor", "email", "telefon"]]
-    ruta = os.path.join(os.getcwd(), "export_equips.xlsx")
-    df.to_excel(ruta, index=False)
-    return send_file(ruta, as_attachment=True)
+    equips = [tuple(e) for e in obtenir_equips()]
+    dades = executar_pesat(excel_equips, equips)
+    return send_file(BytesIO(dades), as_attachment=True, download_name="export_equips.xlsx")
 
 
 @admin_bd_bp.route("/admin/basedades/import", methods=["POST"])
@@ -184,17 +169,9 @@ def import_excel():
     if not arxiu or arxiu.filename == "":
         return redirect(url_for("admin_bd.admin_base_dades"))
 
-    df = pd.read_excel(arxiu)
-    eliminar_tots_equips()
-
-    for _, row in df.iterrows():
-        afegir_equip(
-            row["jugadors"],
-            row["equip"],
-            int(row["valor"]),
-            row.get("email", ""),
-            row.get("telefon", ""),
-        )
+    # Es llegeix i es desa en segon pla (app/feines.py); bd.html en mostra el progrés
+    from .feines import programar_feina
+    programar_feina("importar", entrada=arxiu.read())
 
     return redirect(url_for("admin_bd.admin_base_dades"))
 
@@ -279,16 +256,6 @@ def confeccio_grups():
         request.form.get(f"grup_{i}", type=int, default=0)
         for i in range(1, num_grups + 1)
     ]
-    suma = sum(capacitat_grups)
-
-    # Capacitat suggerida
-    capacitat_suggerida = []
-    if num_grups > 0:
-        base = total_equips // num_grups
-        extra = total_equips % num_grups
-        capacitat_suggerida = [
-            base + (1 if i < extra else 0) for i in range(num_grups)
-        ]
 
     # ---------- GUARDAR (sense redistribuir) ---------- #
     if "guardar" in request.form:
@@ -376,69 +343,10 @@ def confeccio_grups():
     from db import reset_competicio
     reset_competicio()
 
-    equips_ordenats = sorted(equips, key=lambda e: e[3])
-    grups = {i + 1: [] for i in range(num_grups)}
-
-
-    from collections import defaultdict
-
-    nivells = defaultdict(list)
-    for e in equips_ordenats:
-        nivells[e[3]].append(e)
-
-    idx = 0
-    direccio = 1
-
-    if suma == total_equips and suma > 0:
-        # Mode manual (respectant capacitats)
-        for valor in sorted(nivells.keys()):
-            for equip in nivells[valor]:
-                assignat = False
-                intents = 0
-                while not assignat and intents < num_grups:
-                    if capacitat_grups[idx] > 0:
-                        grups[idx + 1].append(equip)
-                        capacitat_grups[idx] -= 1
-                        assignat = True
-                    else:
-                        idx += direccio
-                        if idx >= num_grups:
-                            direccio = -1
-                            idx = num_grups - 1
-                        elif idx < 0:
-                            direccio = 1
-                            idx = 0
-                    intents += 1
-                idx += direccio
-                if idx >= num_grups:
-                    direccio = -1
-                    idx = num_grups - 1
-                elif idx < 0:
-                    direccio = 1
-                    idx = 0
+    grups, manual = repartir_serp(equips, num_grups, capacitat_grups)
+    if manual:
         msg = "✅ Grups generats segons capacitat manual."
     else:
-        # Mode automàtic si no quadra
-        capacitat_grups = capacitat_suggerida.copy()
-        for equip in equips_ordenats:
-            buscats = 0
-            while capacitat_grups[idx] == 0 and buscats < num_grups:
-                idx = (idx + direccio) % num_grups
-                buscats += 1
-            if capacitat_grups[idx] == 0:
-                break
-            grups[idx + 1].append(equip)
-            capacitat_grups[idx] -= 1
-            if direccio == 1:
-                idx += 1
-                if idx >= num_grups:
-                    direccio = -1
-                    idx = num_grups - 1
-            else:
-                idx -= 1
-                if idx < 0:
-                    direccio = 1
-                    idx = 0
         msg = "✅ Grups generats automàticament."
 
     # ---------- Guardar automàtic després de generar ---------- #
@@ -483,11 +391,48 @@ def confeccio_grups():
 # ----------------------------------------------------------------------
 # 🔹 FASE DE GRUPS
 # ----------------------------------------------------------------------
+def llegir_resultats_form(form):
+    """Converteix els camps p1_<id> / p2_<id> del formulari en [(id, p1, p2)]."""
+    resultats = []
+    for camp, p1 in form.items():
+        if not camp.startswith("p1_"):
+            continue
+        pid = camp[3:]
+        p1 = p1.strip()
+        p2 = form.get(f"p2_{pid}", "").strip()
+        if pid.isdigit() and p1.isdigit() and p2.isdigit():
+            resultats.append((int(pid), int(p1), int(p2)))
+    return resultats
+
+
+def llegir_resultats_json(data):
+    """
+    Accepta {"resultats": [...]} o directament una llista, amb files
+    {"id", "punts1", "punts2"} o [id, punts1, punts2].
+    """
+    files = data.get("resultats", []) if isinstance(data, dict) else data
+    resultats = []
+    for fila in files or []:
+        if isinstance(fila, dict):
+            fila = (fila.get("id", fila.get("partit_id")), fila.get("punts1"), fila.get("punts2"))
+        pid, p1, p2 = fila
+        resultats.append((int(pid), int(p1), int(p2)))
+    return resultats
+
+
+def classificacio_json(grup):
+    return [
+        {"equip": equip, **stats._asdict()}
+        for equip, stats in calcular_classificacio(grup)
+    ]
+
+
 @admin_bd_bp.route("/admin/fasegrups", methods=["GET", "POST"])
+@cache_pagina("admin_fasegrups.html")
 def fase_grups():
     from db import (
         obtenir_grups_guardats,
-        generar_partits,
+        generar_partits_grups,
         obtenir_partits,
         actualitzar_resultat,
         calcular_classificacio,
@@ -504,31 +449,38 @@ def fase_grups():
     # 🔥 GENERAR PARTITS DE TOTS ELS GRUPS
     # -------------------------------------------------------------------
     if "generar" in request.form:
-        total = 0
-        detalls = []
+        doble = "doble" in request.form
+        generats = generar_partits_grups(grups_disponibles, doble=doble)
 
-        for g in grups_disponibles:
-            num = generar_partits(g)
-            total += num
-            detalls.append(f"Grup {g}: {num} partits")
+        total = sum(generats.values())
+        detalls = [f"Grup {g}: {num} partits" for g, num in generats.items()]
 
         msg = f"✅ S'han generat {total} partits en total — {', '.join(detalls)}"
 
     # -------------------------------------------------------------------
-    # 💾 GUARDAR RESULTATS DEL GRUP ACTUAL
+    # ⏱ PLANIFICAR HORARIS I PISTES DE TOTS ELS GRUPS
     # -------------------------------------------------------------------
-    if "guardar" in request.form:
-        try:
-            for p in obtenir_partits(grup_id):
-                pid = p[0]
+    if "planificar" in request.form:
+        from db import planificar_partits
 
-                p1 = request.form.get(f"p1_{pid}", "").strip()
-                p2 = request.form.get(f"p2_{pid}", "").strip()
+        hora_inici = request.form.get("hora_inici", "").strip() or "09:00"
+        durada = request.form.get("durada", type=int) or 20
+        num_pistes = request.form.get("num_pistes", type=int)
+        descans = request.form.get("descans", type=int, default=1)
 
-                if p1.isdigit() and p2.isdigit():
-                    actualitzar_resultat(pid, int(p1), int(p2))
+        try:
+            torns = planificar_partits(hora_inici, durada, num_pistes, descans)
+            msg = f"⏱ Horaris planificats: {torns} torns de {durada} minuts des de les {hora_inici}"
+        except Exception as e:
+            error = f"❌ Error planificant horaris: {e}"
 
-            msg = "💾 Resultats guardats correctament!"
+    # -------------------------------------------------------------------
+    # 💾 GUARDAR RESULTATS DEL GRUP ACTUAL
+    # -------------------------------------------------------------------
+    if "guardar" in request.form:
+        try:
+            canviats, _ = actualitzar_resultats(llegir_resultats_form(request.form))
+            msg = f"💾 Resultats guardats correctament! ({len(canviats)} partits modificats)"
         except Exception as e:
             error = f"❌ Error guardant resultats: {e}"
 
@@ -561,196 +513,51 @@ def fase_grups():
     )
 
 
+# ----------------------------------------------------------------------
+# 💾 API — GUARDAR RESULTATS EN BLOC
+# ----------------------------------------------------------------------
+@admin_bd_bp.route("/admin/fasegrups/api/resultats", methods=["POST"])
+@require_admin
+def api_guardar_resultats():
+    """
+    Desa molts resultats d'un cop (JSON o formulari p1_<id>/p2_<id>) i
+    retorna la classificació actualitzada dels grups afectats.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if data is not None:
+            resultats = llegir_resultats_json(data)
+        else:
+            resultats = llegir_resultats_form(request.form)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "msg": "Dades incorrectes"}), 400
+
+    if not resultats:
+        return jsonify({"ok": False, "msg": "No hi ha resultats per guardar"}), 400
+
+    canviats, grups = actualitzar_resultats(resultats)
+
+    return jsonify({
+        "ok": True,
+        "canviats": canviats,
+        "classificacio": {g: classificacio_json(g) for g in sorted(grups)},
+    })
+
+
 # ----------------------------------------------------------------------
 # 🔹 PDF FASE DE GRUPS
 # ----------------------------------------------------------------------
 @admin_bd_bp.route("/admin/fasegrups/pdf/<int:grup_id>", methods=["GET"])
+@mesurar_pdf
 def descarregar_pdf_grup(grup_id):
-    import datetime
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.utils import ImageReader
-    from io import BytesIO
-    from flask import make_response
-
     from db import obtenir_partits
 
     partits = obtenir_partits(grup_id)
     if not partits:
         return "⚠️ No hi ha partits per aquest grup."
 
-    # ------ CAPTURAR PÀGINES EN MEMÒRIA ------
-    packet = BytesIO()
-    pdf = canvas.Canvas(packet, pagesize=A4)
-    width, height = A4
-
-    # ------ LOCALITZAR LOGO ------
-    possible_paths = [
-        os.path.join(os.getcwd(), "app", "static", "logo1.png"),
-        os.path.join(os.getcwd(), "app", "static", "img", "logo1.png"),
-        os.path.join(os.getcwd(), "static", "logo1.png"),
-        os.path.join(os.getcwd(), "static", "img", "logo1.png"),
-    ]
-
-    logo_path = next((p for p in possible_paths if os.path.exists(p)), None)
-
-    # ------ FUNCIONS PER CAPÇALERA ------
-    def draw_header(c):
-        header_margin_top = 18
-        display_w = 90
-        if logo_path:
-            try:
-                img = ImageReader(logo_path)
-                ow, oh = img.getSize()
-                scale = display_w / ow
-                display_h = oh * scale
-            except Exception:
-                display_h = 40
-        else:
-            display_h = 40
-
-        # posició vertical del logo
-        y = height - header_margin_top - display_h
-
-        if logo_path:
-            c.drawImage(
-                logo_path,
-                40,
-                y,
-                width=display_w,
-                height=display_h,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-
-        # Títol
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(
-            width / 2,
-            height - header_margin_top - (display_h / 2),
-            f"GRUP {grup_id}",
-        )
-
-        # Data
-        c.setFont("Helvetica", 9)
-        pdf.drawRightString(
-            width - 40, height - 60, datetime.datetime.now().strftime("%d/%m/%Y")
-        )
-
-        # Línia separació
-        c.line(40, y - 12, width - 40, y - 12)
-
-        # marca d'aigua (opcional, baixa opacitat)
-        if logo_path:
-            try:
-                c.saveState()
-                try:
-                    c.setFillAlpha(0.04)
-                except Exception:
-                    pass
-                wm_w = 260
-                wm_h = 260
-                c.drawImage(
-                    logo_path,
-                    (width - wm_w) / 2,
-                    (height - wm_h) / 2,
-                    width=wm_w,
-                    height=wm_h,
-                    mask="auto",
-                )
-                c.restoreState()
-            except Exception as e:
-                print("⚠️ Error dibuixant marca d'aigua:", e)
-
-        # tornem la Y inicial pels partits
-        return y - 30
-
-    # ------ DIBUIXAR CONTINGUT ------
-    y = draw_header(pdf)
-    pdf.setFont("Helvetica", 12)
-
-    for idx, (pid, equip1, equip2, arbit, punts1, punts2, jugat) in enumerate(
-        partits, start=1
-    ):
-        # si no hi ha espai, nova pàgina
-        if y < 140:
-            pdf.showPage()
-            y = draw_header(pdf)
-            pdf.setFont("Helvetica", 12)
-
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawString(60, y, f"Partit {idx}.{grup_id}")
-        pdf.setFont("Helvetica", 10)
-        pdf.drawRightString(width - 60, y, f"Àrbitre: {arbit}")
-        y -= 18
-
-        # --- GRAELLES ---
-        cell_w, cell_h = 16, 12
-        top_row = list(range(1, 16))
-        bottom_row = list(range(16, 31))
-        total_w = len(top_row) * cell_w
-        x1 = 30
-        x2 = width - (30 + total_w)
-
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawCentredString(x1 + total_w / 2, y, equip1)
-        pdf.drawCentredString(x2 + total_w / 2, y, equip2)
-        y -= 22
-
-        pdf.setFont("Helvetica", 6)
-        start_y = y
-
-        for fila, nums in enumerate([top_row, bottom_row]):
-            for i, num in enumerate(nums):
-                y_pos = start_y - fila * cell_h
-
-                pdf.rect(x1 + i * cell_w, y_pos, cell_w, cell_h)
-                pdf.drawCentredString(
-                    x1 + i * cell_w + cell_w / 2, y_pos + 3, str(num)
-                )
-
-                pdf.rect(x2 + i * cell_w, y_pos, cell_w, cell_h)
-                pdf.drawCentredString(
-                    x2 + i * cell_w + cell_w / 2, y_pos + 3, str(num)
-                )
-
-        y = start_y - (2 * cell_h) - 25
-        pdf.line(40, y, width - 40, y)
-        y -= 20
-
-    # -------- Finalitzar primer PDF (sense numeració) --------
-    pdf.save()
-
-    # -------- SEGONA PASSADA: AFEGIR NUMERACIÓ --------
-    from PyPDF2 import PdfReader, PdfWriter
-
-    packet.seek(0)
-    reader = PdfReader(packet)
-    writer = PdfWriter()
-
-    total_pages = len(reader.pages)
-
-    for i, page in enumerate(reader.pages):
-        num_packet = BytesIO()
-        num_canvas = canvas.Canvas(num_packet, pagesize=A4)
-
-        num_canvas.setFont("Helvetica", 9)
-        num_canvas.drawCentredString(
-            width / 2, 25, f"Pàgina {i + 1} de {total_pages}"
-        )
-
-        num_canvas.save()
-        num_packet.seek(0)
-
-        footer_pdf = PdfReader(num_packet)
-        page.merge_page(footer_pdf.pages[0])
-        writer.add_page(page)
-
-    out_buffer = BytesIO()
-    writer.write(out_buffer)
-    out_buffer.seek(0)
-
-    response = make_response(out_buffer.getvalue())
+    # Es genera fora del fil de la petició si hi ha processos (ADMISSIO_PROCESSOS)
+    response = make_response(executar_pesat(pdf_grup, grup_id, list(partits)))
     response.headers["Content-Type"] = "application/pdf"
     response.headers["Content-Disposition"] = f"attachment; filename=grup_{grup_id}.pdf"
     return response
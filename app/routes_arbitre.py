@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, current_app
+from db import obtenir_partits_arbitre
+from .auth import es_admin
+from .cua_resultats import cua_resultats
+
+arbitre_bp = Blueprint('arbitre', __name__, url_prefix='/arbitre')
+
+
+# ========================================================
+# 🚦 LIMITADOR DE PETICIONS (per IP, dins de cada worker)
+# ========================================================
+class Limitador:
+    """Token bucket: `capacitat` peticions de cop i `ritme` per segon."""
+
+    def __init__(self, capacitat=10, ritme=1.0):
+        self.capacitat = capacitat
+        self.ritme = ritme
+        self.cubells = {}
+        self.lock = threading.Lock()
+
+    def permetre(self, clau):
+        ara = time.monotonic()
+        with self.lock:
+            fitxes, darrer = self.cubells.get(clau, (self.capacitat, ara))
+            fitxes = min(self.capacitat, fitxes + (ara - darrer) * self.ritme)
+            if fitxes < 1:
+                self.cubells[clau] = (fitxes, ara)
+                return False, (1 - fitxes) / self.ritme
+            self.cubells[clau] = (fitxes - 1, ara)
+
+            # Evitem que el diccionari creixi sense límit
+            if len(self.cubells) > 10000:
+                self.cubells = {
+                    k: v for k, v in self.cubells.items()
+                    if ara - v[1] < self.capacitat / self.ritme
+                }
+            return True, 0
+
+
+limitador = Limitador()
+
+
+def client_ip():
+    # X-Forwarded-For el pot inventar el client: darrere d'un proxy,
+    # PROXIES_CONFIANCA (app/__init__.py, ProxyFix) ja fixa remote_addr
+    return request.remote_addr or "?"
+
+
+def require_arbitre(f):
+    """
+    Cal la capçalera X-Arbitre-Token amb l'ARBITRE_TOKEN configurat (mai a
+    la URL: quedaria als registres). Sense token configurat, l'API només
+    està oberta a la sessió d'admin del torneig.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("ARBITRE_TOKEN")
+        if not token:
+            if not es_admin():
+                return jsonify({"ok": False, "msg": "API d'àrbitres desactivada (cal ARBITRE_TOKEN)"}), 403
+        elif request.headers.get("X-Arbitre-Token") != token and not es_admin():
+            return jsonify({"ok": False, "msg": "Token d'àrbitre incorrecte"}), 401
+        return f(*args, **kwargs)
+    return wrapper
+
+
+# ========================================================
+# 📋 CONSULTA DE PARTITS
+# ========================================================
+@arbitre_bp.route('/api/grup/<int:grup>', methods=['GET'])
+@require_arbitre
+def api_partits_grup(grup):
+    return jsonify({"ok": True, "partits": obtenir_partits_arbitre(grup_id=grup)})
+
+
+@arbitre_bp.route('/api/partit/<int:partit_id>', methods=['GET'])
+@require_arbitre
+def api_partit(partit_id):
+    partits = obtenir_partits_arbitre(partit_id=partit_id)
+    if not partits:
+        return jsonify({"ok": False, "msg": "Aquest partit no existeix"}), 404
+    return jsonify({"ok": True, "partit": partits[0]})
+
+
+# ========================================================
+# 📝 ENVIAR RESULTAT
+# ========================================================
+@arbitre_bp.route('/api/partit/<int:partit_id>/resultat', methods=['POST'])
+@require_arbitre
+def api_enviar_resultat(partit_id):
+    """
+    JSON: {"punts1": 21, "punts2": 18, "versio": 3}
+    Capçalera Idempotency-Key (o camp "clau"): reenviar la mateixa clau
+    retorna la mateixa resposta sense tornar a escriure.
+    "versio" és la que s'ha llegit del partit; si no coincideix amb
+    l'actual es retorna 409 amb l'estat actual.
+    """
+    permes, espera = limitador.permetre(client_ip())
+    if not permes:
+        resp = jsonify({"ok": False, "msg": "Massa peticions, espera uns segons"})
+        resp.headers["Retry-After"] = str(max(1, int(espera + 0.999)))
+        return resp, 429
+
+    data = request.get_json(silent=True) or {}
+    try:
+        punts1 = int(data["punts1"])
+        punts2 = int(data["punts2"])
+        versio = int(data["versio"]) if data.get("versio") is not None else None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "msg": "Cal enviar punts1 i punts2 (enters)"}), 400
+
+    if punts1 < 0 or punts2 < 0:
+        return jsonify({"ok": False, "msg": "Els punts no poden ser negatius"}), 400
+
+    clau = request.headers.get("Idempotency-Key") or data.get("clau") or str(uuid.uuid4())
+
+    try:
+        resultat = cua_resultats.enviar({
+            "clau": clau[:200],
+            "partit_id": partit_id,
+            "punts1": punts1,
+            "punts2": punts2,
+            "versio": versio,
+        })
+    except queue.Full:
+        resp = jsonify({"ok": False, "msg": "Servidor ocupat, torna-ho a provar"})
+        resp.headers["Retry-After"] = "2"
+        return resp, 503
+
+    if resultat is None:
+        # Encara a la cua: el client pot reenviar amb la mateixa clau
+        return jsonify({"ok": True, "en_cua": True, "clau": clau}), 202
+
+    codi, cos = resultat
+    return jsonify({**cos, "clau": clau}), codi
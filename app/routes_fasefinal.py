@@ -3,10 +3,22 @@ from db import (
     get_conn,
     calcular_classificacio,
     obtenir_grups_guardats,
+    marcar_canvi,
+    obtenir_versio_dades,
+    torneig_actual,
+    ids_equips,
+    llegir_classificacio_final,
+    desar_classificacio_final,
+    cursor_tuples,
 )
-from .auth import require_admin
+from .auth import lectura_publica, require_admin
+from .cache_render import cache_pagina
+from classificacio import classificacio_unica, equips_per_fase
+from registres import Classificat
+from quadres import FORMATS, quadre, resoldre, resultats_per_noms
 import os
 import json
+import threading
 
 admin_fasefinal_bp = Blueprint('admin_fasefinal', __name__)
 
@@ -22,6 +34,7 @@ def reset_classificacio_final():
     cur.execute("DELETE FROM fase_final_equips")
     cur.execute("DELETE FROM classificacio_eliminats")
 
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
     return "Classificació final i fases finals reiniciades!"
@@ -38,7 +51,8 @@ CREATE TABLE IF NOT EXISTS classificacio_eliminats (
     punts INTEGER,
     dif_gol INTEGER,
     pos_grup INTEGER,
-    grup INTEGER
+    grup INTEGER,
+    equip_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
 )
 """)
 conn.commit()
@@ -52,29 +66,14 @@ conn.close()
 @require_admin
 def fase_final_classificacio():
     conn = get_conn()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS classificacio_final (
-            id SERIAL PRIMARY KEY,
-            posicio INTEGER,
-            equip_nom TEXT,
-            punts INTEGER,
-            dif_gol INTEGER,
-            pos_grup INTEGER,
-            grup INTEGER
-        )
-    """)
-
-    cur.execute("SELECT equip_nom, punts, dif_gol, pos_grup, grup FROM classificacio_final ORDER BY posicio")
-    guardada = cur.fetchall()
+    guardada = llegir_classificacio_final(cursor_tuples(conn))
 
     conn.close()
 
     if guardada:
         classificacio = [
-            {"equip": e, "punts": p, "dif": d, "pos": pg, "grup": g}
-            for e, p, d, pg, g in guardada
+            Classificat(c.equip_nom, c.punts, c.dif_gol, None, None, c.pos_grup, c.grup)
+            for c in guardada
         ]
     else:
         classificacio = generar_classificacio_unica()
@@ -84,30 +83,9 @@ def fase_final_classificacio():
 
 def generar_classificacio_unica():
     """Genera classificació automàtica segons els grups."""
-    grups = sorted(obtenir_grups_guardats().keys())
-    classificacio = []
-
-    for pos in range(1, 9):  # màxim 8 posicions
-        candidats = []
-
-        for g in grups:
-            class_grup = calcular_classificacio(g)
-            if pos <= len(class_grup):
-                eq, stats = class_grup[pos - 1]
-                candidats.append({
-                    "equip": eq,
-                    "punts": stats["punts"],
-                    "dif": stats["diferencia"],
-                    "pf": stats["favor"],
-                    "pc": stats["contra"],
-                    "pos": pos,
-                    "grup": g
-                })
-
-        candidats.sort(key=lambda x: (x["punts"], x["dif"], x["pf"]), reverse=True)
-        classificacio.extend(candidats)
-
-    return classificacio
+    # Una sola classificació per grup (abans es recalculava per cada posició)
+    classificacions = {g: calcular_classificacio(g) for g in obtenir_grups_guardats()}
+    return classificacio_unica(classificacions, max_posicio=8)
 
 
 # ---------------------------------------------------------
@@ -124,25 +102,12 @@ def guardar_classificacio_final():
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute("DROP TABLE IF EXISTS classificacio_final")
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS classificacio_final (
-            id SERIAL PRIMARY KEY,
-            posicio INTEGER,
-            equip_nom TEXT,
-            punts INTEGER,
-            dif_gol INTEGER,
-            pos_grup INTEGER,
-            grup INTEGER
-        )
-    """)
-
-    for pos, item in enumerate(ordre, start=1):
-        cur.execute("""
-            INSERT INTO classificacio_final (posicio, equip_nom, punts, dif_gol, pos_grup, grup)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (pos, item["equip"], item["punts"], item["dif"], item["pos"], item["grup"]))
+    desar_classificacio_final(cur, [
+        (item["equip"], item["punts"], item["dif"], item["pos"], item["grup"])
+        for item in ordre
+    ])
 
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
     return jsonify({"ok": True, "msg": "Classificació guardada correctament!"})
@@ -151,37 +116,31 @@ def guardar_classificacio_final():
 # ---------------------------------------------------------
 # 🔄 RECALCULAR CLASSIFICACIÓ
 # ---------------------------------------------------------
+def recalcular_classificacio_final():
+    """Regenera la classificació única (també com a feina: app/feines.py). Retorna quants equips hi ha."""
+    classificacio_unica = generar_classificacio_unica()
+    if not classificacio_unica:
+        return 0
+
+    conn = get_conn()
+    cur = conn.cursor()
+
+    desar_classificacio_final(cur, [
+        (item.equip, item.punts, item.dif, item.pos, item.grup)
+        for item in classificacio_unica
+    ])
+
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
+    return len(classificacio_unica)
+
+
 @admin_fasefinal_bp.route('/admin/fasefinal/recalcular', methods=['POST'])
 def fase_final_recalcular():
     try:
-        classificacio_unica = generar_classificacio_unica()
-        if not classificacio_unica:
+        if not recalcular_classificacio_final():
             return jsonify({"ok": False, "msg": "No hi ha dades per generar la classificació."}), 400
-
-        conn = get_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS classificacio_final (
-                id SERIAL PRIMARY KEY,
-                posicio INTEGER,
-                equip_nom TEXT,
-                punts INTEGER,
-                dif_gol INTEGER,
-                pos_grup INTEGER,
-                grup INTEGER
-            )
-        """)
-        cur.execute("DELETE FROM classificacio_final")
-
-        for pos, item in enumerate(classificacio_unica, start=1):
-            cur.execute("""
-                INSERT INTO classificacio_final (posicio, equip_nom, punts, dif_gol, pos_grup, grup)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (pos, item["equip"], item["punts"], item["dif"], item["pos"], item["grup"]))
-
-        conn.commit()
-        conn.close()
         return jsonify({"ok": True, "msg": "Classificació regenerada correctament."})
 
     except Exception as e:
@@ -199,7 +158,8 @@ def configurar_fases():
     cur.execute("""
         CREATE TABLE IF NOT EXISTS config_fases_finals (
             fase TEXT PRIMARY KEY,
-            num_equips INTEGER
+            num_equips INTEGER,
+            format TEXT
         )
     """)
 
@@ -207,13 +167,17 @@ def configurar_fases():
         dades = request.form
 
         for fase, num in dades.items():
+            if fase.startswith("format_"):
+                continue
+            format = dades.get(f"format_{fase}")
             cur.execute("""
-                INSERT INTO config_fases_finals (fase, num_equips)
-                VALUES (%s, %s)
+                INSERT INTO config_fases_finals (fase, num_equips, format)
+                VALUES (%s, %s, %s)
                 ON CONFLICT (fase)
-                DO UPDATE SET num_equips = EXCLUDED.num_equips
-            """, (fase, num))
+                DO UPDATE SET num_equips = EXCLUDED.num_equips, format = EXCLUDED.format
+            """, (fase, num, format if format in FORMATS else None))
 
+        marcar_canvi(cur)
         conn.commit()
         conn.close()
 
@@ -225,14 +189,18 @@ def configurar_fases():
     cur.execute("SELECT COUNT(*) FROM classificacio_final")
     total_equips = cur.fetchone()[0]
 
-    cur.execute("SELECT fase, num_equips FROM config_fases_finals")
-    dades = dict(cur.fetchall())
+    cur.execute("SELECT fase, num_equips, format FROM config_fases_finals")
+    files = cur.fetchall()
+    dades = {fase: num for fase, num, _ in files}
+    formats = {fase: format for fase, _, format in files}
 
     conn.close()
 
     return render_template(
         "admin_config_fases.html",
         dades=dades,
+        formats=formats,
+        noms_formats=NOMS_FORMATS,
         total_equips=total_equips
     )
 
@@ -270,7 +238,12 @@ def mostrar_quadres_finals():
     cur.execute("SELECT fase, num_equips FROM config_fases_finals")
     fases = dict(cur.fetchall())
 
-    cur.execute("SELECT equip_nom, posicio FROM classificacio_final ORDER BY posicio ASC")
+    cur.execute("""
+        SELECT COALESCE(e.nom_equip, c.equip_nom) AS equip_nom, c.posicio
+        FROM classificacio_final c
+        LEFT JOIN equips e ON e.id = c.equip_id
+        ORDER BY c.posicio ASC
+    """)
     tots_equips = cur.fetchall()
 
     conn.close()
@@ -281,19 +254,11 @@ def mostrar_quadres_finals():
         else request.args.get("fase", "OR")
     )
 
-    fases_ordenades = list(fases.keys())
-    posicio_inici = 0
     equips_fase = []
-
-    for fase in fases_ordenades:
-        n = fases[fase]
-        sublist = tots_equips[posicio_inici:posicio_inici + n]
-
+    for fase, sublist in equips_per_fase(fases.items(), tots_equips).items():
         if fase.upper() == fase_sel.upper():
             equips_fase = sublist
 
-        posicio_inici += n
-
     return render_template(
         "admin_fasefinal_quadres.html",
         fases=fases,
@@ -314,45 +279,32 @@ def eliminar_equip_classificacio():
         return jsonify({"ok": False, "msg": "Equip no especificat"}), 400
 
     conn = get_conn()
-    cur = conn.cursor()
+    cur = cursor_tuples(conn)
 
-    cur.execute("""
-        SELECT punts, dif_gol, pos_grup, grup
-        FROM classificacio_final
-        WHERE equip_nom = %s
-    """, (equip_nom,))
-    fila = cur.fetchone()
+    files = llegir_classificacio_final(cur)
+    fila = next((f for f in files if f[0] == equip_nom), None)
 
     if not fila:
         conn.close()
         return jsonify({"ok": False, "msg": "Aquest equip no existeix"}), 400
 
-    punts, dif, pos_grup, grup = fila
+    _, punts, dif, pos_grup, grup, _, equip_id = fila
 
     cur.execute("""
-        INSERT INTO classificacio_eliminats (equip_nom, punts, dif_gol, pos_grup, grup)
-        VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO classificacio_eliminats (equip_nom, equip_id, punts, dif_gol, pos_grup, grup)
+        VALUES (%s, %s, %s, %s, %s, %s)
         ON CONFLICT (equip_nom)
-        DO UPDATE SET punts = EXCLUDED.punts
-    """, (equip_nom, punts, dif, pos_grup, grup))
+        DO UPDATE SET punts = EXCLUDED.punts, equip_id = EXCLUDED.equip_id
+    """, (equip_nom, equip_id, punts, dif, pos_grup, grup))
 
-    cur.execute("DELETE FROM classificacio_final WHERE equip_nom = %s", (equip_nom,))
-
-    cur.execute("""
-        SELECT equip_nom, punts, dif_gol, pos_grup, grup
-        FROM classificacio_final
-        ORDER BY posicio ASC
-    """)
-    restants = cur.fetchall()
-
-    cur.execute("DELETE FROM classificacio_final")
-
-    for nova_pos, (eq, p, d, pg, g) in enumerate(restants, start=1):
-        cur.execute("""
-            INSERT INTO classificacio_final (posicio, equip_nom, punts, dif_gol, pos_grup, grup)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (nova_pos, eq, p, d, pg, g))
+    # La resta es renumera mantenint l'ordre
+    desar_classificacio_final(cur, [
+        (eq, p, d, pg, g, eid)
+        for eq, p, d, pg, g, _, eid in files
+        if eq != equip_nom
+    ])
 
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
@@ -374,27 +326,33 @@ def recuperar_equip():
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT equip_nom, punts, dif_gol, pos_grup, grup
-        FROM classificacio_eliminats
-        WHERE equip_nom = %s
+        SELECT COALESCE(e.nom_equip, x.equip_nom) AS nom, x.equip_nom, x.equip_id,
+               x.punts, x.dif_gol, x.pos_grup, x.grup
+        FROM classificacio_eliminats x
+        LEFT JOIN equips e ON e.id = x.equip_id
+        WHERE COALESCE(e.nom_equip, x.equip_nom) = %s
     """, (equip,))
     fila = cur.fetchone()
 
     if not fila:
+        conn.close()
         return jsonify({"ok": False, "msg": "Aquest equip no és a Eliminats"})
 
-    equip_nom, punts, dif, pos_grup, grup = fila
+    nom, nom_desat, equip_id, punts, dif, pos_grup, grup = fila
+    if equip_id is None:
+        equip_id = ids_equips(cur).get(nom)
 
     cur.execute("SELECT COUNT(*) FROM classificacio_final")
     nova_pos = cur.fetchone()[0] + 1
 
     cur.execute("""
-        INSERT INTO classificacio_final (posicio, equip_nom, punts, dif_gol, pos_grup, grup)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (nova_pos, equip_nom, punts, dif, pos_grup, grup))
+        INSERT INTO classificacio_final (posicio, equip_nom, equip_id, punts, dif_gol, pos_grup, grup)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (nova_pos, nom, equip_id, punts, dif, pos_grup, grup))
 
-    cur.execute("DELETE FROM classificacio_eliminats WHERE equip_nom = %s", (equip,))
+    cur.execute("DELETE FROM classificacio_eliminats WHERE equip_nom = %s", (nom_desat,))
 
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
@@ -404,42 +362,204 @@ def recuperar_equip():
 # ---------------------------------------------------------
 # 📦 API — OBTENIR EQUIPS D'UNA FASE
 # ---------------------------------------------------------
-@admin_fasefinal_bp.route('/admin/fasefinal/api/equips/<fase>', methods=['GET'])
-def api_equips_fase(fase):
+def dades_fase(fase):
+    """([(equip, posició), ...] de la fase en ordre de llavor, format configurat)."""
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute("SELECT fase, num_equips FROM config_fases_finals")
-    fases = dict(cur.fetchall())
+    cur.execute("SELECT fase, num_equips, format FROM config_fases_finals")
+    files = cur.fetchall()
 
-    cur.execute("SELECT equip_nom, posicio FROM classificacio_final ORDER BY posicio ASC")
+    cur.execute("""
+        SELECT COALESCE(e.nom_equip, c.equip_nom) AS equip_nom, c.posicio
+        FROM classificacio_final c
+        LEFT JOIN equips e ON e.id = c.equip_id
+        ORDER BY c.posicio ASC
+    """)
     tots_equips = cur.fetchall()
 
     conn.close()
 
-    if not fases:
-        return jsonify({"ok": True, "equips": []})
-
-    fases_ordenades = list(fases.keys())
-    posicio_inici = 0
-    equips_fase = []
-
-    for fase_key in fases_ordenades:
-        n = fases[fase_key]
-        sublist = tots_equips[posicio_inici:posicio_inici + n]
-
+    fases = [(f, n) for f, n, _ in files]
+    for fase_key, sublist in equips_per_fase(fases, tots_equips).items():
         if fase_key.upper() == fase.upper():
-            equips_fase = sublist
-            break
+            formats = {f.upper(): fmt for f, _, fmt in files}
+            return sublist, formats.get(fase_key.upper())
+    return [], None
 
-        posicio_inici += n
 
+@admin_fasefinal_bp.route('/admin/fasefinal/api/equips/<fase>', methods=['GET'])
+@lectura_publica
+def api_equips_fase(fase):
+    equips_fase, _ = dades_fase(fase)
     equips_json = [{"pos": pos, "equip": eq} for eq, pos in equips_fase]
     return jsonify({"ok": True, "equips": equips_json})
 
 
 # ---------------------------------------------------------
-# 💾 Guardar bracket (JSON)
+# 📁 Fitxer del bracket (una carpeta per torneig)
+# ---------------------------------------------------------
+def fitxer_bracket(fase):
+    save_dir = os.path.join(os.getcwd(), 'brackets_data')
+    torneig = torneig_actual()
+    if torneig is not None:
+        save_dir = os.path.join(save_dir, torneig)
+    return save_dir, os.path.join(save_dir, f"fase_final_{fase.lower()}_data.json")
+
+
+def llegir_fitxer_bracket(fase):
+    """Contingut desat del quadre, o None si no n'hi ha (o és buit o malmès)."""
+    _, save_file = fitxer_bracket(fase)
+    if not os.path.exists(save_file):
+        return None
+    with open(save_file, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def escriure_fitxer_bracket(fase, data):
+    save_dir, save_file = fitxer_bracket(fase)
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Fitxer temporal + replace: una lectura simultània mai veu mig fitxer
+    temporal = f"{save_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporal, save_file)
+
+
+# ---------------------------------------------------------
+# 🏆 MOTOR DEL QUADRE (quadres.py)
+# ---------------------------------------------------------
+# El servidor resol el quadre: equips de cada casella, guanyadors i
+# propagació. Al fitxer només hi ha {"format", "n", "resultats":
+# {partit: 1|2}}; els fitxers antics (noms per casella, desats pel
+# navegador) es converteixen en llegir-los.
+CAMPS_PARTIT = ("id", "font1", "font2", "equip1", "equip2", "guanyador", "x", "y")
+
+NOMS_FORMATS = {
+    "classic": "Clàssic (7–10 equips)",
+    "simple": "Eliminació directa",
+    "consolacio": "Eliminació directa + consolació",
+    "doble": "Doble eliminació",
+}
+
+_lock_quadres = threading.Lock()
+
+
+def carregar_quadre(fase):
+    """(noms dels equips, EstatQuadre resolt o None si la fase té menys de 2 equips)."""
+    equips_fase, format = dades_fase(fase)
+    noms = [eq for eq, _ in equips_fase]
+    if len(noms) < 2:
+        return noms, None
+
+    try:
+        q = quadre(len(noms), format)
+    except ValueError:
+        # p. ex. "classic" configurat però ara la fase no té 7–10 equips
+        q = quadre(len(noms))
+
+    desat = llegir_fitxer_bracket(fase) or {}
+    if "resultats" in desat:
+        # Si ha canviat el format o el nombre d'equips, els resultats ja no valen
+        resultats = {}
+        if (desat.get("format"), desat.get("n")) == (q.format, q.n):
+            resultats = {int(k): v for k, v in desat["resultats"].items()}
+    else:
+        resultats = resultats_per_noms(q, noms, {
+            int(k): v.get("winner") for k, v in desat.items()
+            if k.isdigit() and isinstance(v, dict)
+        })
+    return noms, resoldre(q, resultats)
+
+
+def desar_quadre(fase, estat, canviats):
+    """Desa els resultats i deixa els partits canviats al registre de canvis."""
+    q = estat.quadre
+    escriure_fitxer_bracket(fase, {
+        "format": q.format,
+        "n": q.n,
+        "resultats": {str(pid): g for pid, g in sorted(estat.resultats().items())},
+    })
+    ambit = f"quadre:{fase.upper()}"
+    marcar_canvi(canvis=[(ambit, pid, fila_partit(estat, pid)) for pid in sorted(canviats)])
+
+
+def fila_partit(estat, pid):
+    q = estat.quadre
+    font1, font2 = q.partits[pid]
+    equip1, equip2 = estat.caselles[pid]
+    x, y = q.posicions[pid]
+    return [pid, font1, font2, equip1, equip2, estat.guanyadors.get(pid, 0), x, y]
+
+
+# ---------------------------------------------------------
+# 📤 API — QUADRE RESOLT (JSON compacte)
+# ---------------------------------------------------------
+@admin_fasefinal_bp.route('/admin/fasefinal/api/quadre/<fase>', methods=['GET'])
+@lectura_publica
+@cache_pagina('quadre.json', clau=lambda fase: fase.upper())
+def api_quadre(fase):
+    """
+    Partits com a files [id, font1, font2, equip1, equip2, guanyador, x, y]:
+    equip1/equip2 són índexs a "equips" (null si encara no se sap) i
+    guanyador és 0, 1 o 2.
+    """
+    fase = fase.upper()
+    # Revisió abans de llegir: els canvis posteriors arribaran per /api/canvis
+    revisio = obtenir_versio_dades(max_edat=0)
+    noms, estat = carregar_quadre(fase)
+    if estat is None:
+        return jsonify({"ok": False, "msg": f"La fase {fase} no té prou equips per fer un quadre", "equips": noms})
+
+    q = estat.quadre
+    return jsonify({
+        "ok": True,
+        "fase": fase,
+        "revisio": revisio,
+        "format": q.format,
+        "equips": noms,
+        "final": q.final,
+        "camps": CAMPS_PARTIT,
+        "partits": [fila_partit(estat, pid) for pid in sorted(q.partits)],
+    })
+
+
+# ---------------------------------------------------------
+# ✅ API — MARCAR UN GUANYADOR (propagació incremental)
+# ---------------------------------------------------------
+@admin_fasefinal_bp.route('/admin/fasefinal/api/quadre/<fase>/resultat', methods=['POST'])
+@require_admin
+def api_resultat_quadre(fase):
+    """{"partit": 5, "guanyador": 1|2|0}; retorna només els partits que han canviat."""
+    data = request.get_json(silent=True) or {}
+    try:
+        pid = int(data["partit"])
+        guanyador = int(data.get("guanyador") or 0) or None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "msg": "Cal indicar partit i guanyador"}), 400
+
+    fase = fase.upper()
+    with _lock_quadres:
+        _, estat = carregar_quadre(fase)
+        if estat is None:
+            return jsonify({"ok": False, "msg": f"La fase {fase} no té prou equips"}), 400
+        try:
+            canviats = estat.aplicar(pid, guanyador)
+        except ValueError as e:
+            return jsonify({"ok": False, "msg": str(e)}), 400
+        if canviats:
+            desar_quadre(fase, estat, canviats)
+
+    return jsonify({"ok": True, "canviats": [fila_partit(estat, p) for p in sorted(canviats)]})
+
+
+# ---------------------------------------------------------
+# 💾 Guardar bracket (format antic del navegador)
 # ---------------------------------------------------------
 @admin_fasefinal_bp.route('/admin/fasefinal/api/save/<fase>', methods=['POST'])
 def api_save_bracket(fase):
@@ -447,30 +567,48 @@ def api_save_bracket(fase):
     if not data:
         return jsonify({"ok": False, "msg": "No data received"}), 400
 
-    save_dir = os.path.join(os.getcwd(), 'brackets_data')
-    os.makedirs(save_dir, exist_ok=True)
-    save_file = os.path.join(save_dir, f"fase_final_{fase.lower()}_data.json")
-
-    with open(save_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # {partit: {"winner": nom, ...}}: es desen només els guanyadors
+    with _lock_quadres:
+        noms, estat = carregar_quadre(fase)
+        if estat is None:
+            return jsonify({"ok": False, "msg": "La fase no té prou equips"}), 400
+        resultats = resultats_per_noms(estat.quadre, noms, {
+            int(k): v.get("winner") for k, v in data.items()
+            if str(k).isdigit() and isinstance(v, dict)
+        })
+        estat = resoldre(estat.quadre, resultats)
+        desar_quadre(fase, estat, estat.quadre.partits)
 
     return jsonify({"ok": True, "msg": "Guardat correctament"})
 
 
 # ---------------------------------------------------------
-# 📥 Carregar bracket
+# 📥 Carregar bracket (format antic: noms per casella)
 # ---------------------------------------------------------
 @admin_fasefinal_bp.route('/admin/fasefinal/api/load/<fase>', methods=['GET'])
 def api_load_bracket(fase):
-    save_dir = os.path.join(os.getcwd(), 'brackets_data')
-    save_file = os.path.join(save_dir, f"fase_final_{fase.lower()}_data.json")
-
-    if not os.path.exists(save_file):
+    if llegir_fitxer_bracket(fase) is None:
         return jsonify({"ok": False, "msg": "No saved state", "data": {}})
 
-    with open(save_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    noms, estat = carregar_quadre(fase)
+    if estat is None:
+        return jsonify({"ok": False, "msg": "No saved state", "data": {}})
 
+    def nom(i):
+        return noms[i] if i is not None else None
+
+    data = {}
+    for pid in sorted(estat.quadre.partits):
+        equip1, equip2 = estat.caselles[pid]
+        g = estat.guanyadors.get(pid)
+        data[str(pid)] = {
+            "slot1": nom(equip1),
+            "slot2": nom(equip2),
+            "winner": nom(estat.equip_sortida(pid, "w")),
+            "loser": nom(estat.equip_sortida(pid, "l")),
+            "fg1": {1: "green", 2: "red"}.get(g, "black"),
+            "fg2": {1: "red", 2: "green"}.get(g, "black"),
+        }
     return jsonify({"ok": True, "data": data})
 
 
@@ -479,12 +617,11 @@ def api_load_bracket(fase):
 # ---------------------------------------------------------
 @admin_fasefinal_bp.route('/admin/fasefinal/api/reset/<fase>', methods=['POST'])
 def reset_bracket(fase):
-    save_dir = os.path.join(os.getcwd(), 'brackets_data')
-    save_file = os.path.join(save_dir, f"fase_final_{fase.lower()}_data.json")
+    _, save_file = fitxer_bracket(fase)
 
     if os.path.exists(save_file):
         os.remove(save_file)
+        marcar_canvi()
         return jsonify({"ok": True, "msg": "Quadrant reiniciat correctament!"})
 
     return jsonify({"ok": False, "msg": "No hi havia cap quadre guardat."})
-
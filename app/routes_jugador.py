@@ -1,15 +1,36 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, session
 from db import (
     get_conn,
+    permetre_replica,
     obtenir_grups_guardats,
     obtenir_partits,
     calcular_classificacio,
     obtenir_config_fases_finals,
     obtenir_fase_final_equips
 )
+from .auth import es_admin
+from .cache_render import cache_pagina
+from classificacio import equips_per_fase
+from escenaris import escenaris_grup, posicions_fases
 
 jugador_bp = Blueprint('jugador', __name__, url_prefix='/jugador')
 
+
+# ========================================================
+# 📖 LECTURES DES DE LA RÈPLICA
+# ========================================================
+# Tot el blueprint és de només lectura: el trànsit dels espectadors va a
+# la rèplica (si n'hi ha) i no competeix amb l'entrada de resultats.
+# L'admin continua llegint de la primària per veure els seus canvis.
+@jugador_bp.before_request
+def llegir_de_replica():
+    permetre_replica(not es_admin())
+
+
+@jugador_bp.teardown_request
+def deixar_replica(exc):
+    permetre_replica(False)
+
 # ========================================================
 # 🏠 MENÚ PRINCIPAL JUGADOR
 # ========================================================
@@ -22,6 +43,7 @@ def menu_jugador():
 # 🟦 FASE DE GRUPS
 # ========================================================
 @jugador_bp.route('/fase-grups', methods=['GET'])
+@cache_pagina('jugador_fase_grups.html')
 def fase_grups():
     grups_dict = obtenir_grups_guardats()
     grups = sorted(grups_dict.keys())
@@ -29,6 +51,7 @@ def fase_grups():
 
 
 @jugador_bp.route('/grup/<int:grup>', methods=['GET'])
+@cache_pagina('jugador_grup.html', clau=lambda grup: grup)
 def veure_grup(grup):
     partits = obtenir_partits(grup)
     classificacio = calcular_classificacio(grup)
@@ -56,6 +79,34 @@ def veure_grup(grup):
     )
 
 
+# ========================================================
+# 🔮 QUÈ CAL PER CLASSIFICAR-SE (escenaris.py)
+# ========================================================
+# Per a cada equip del grup, les posicions que encara pot ocupar i, per a
+# cada fase final, si la té assegurada, si pot arribar-hi (i amb quins
+# resultats) o si ja no. fases: {fase: {"segur": N, "possible": M}}, és a
+# dir, acabar entre els N primers del grup assegura la fase (o una de
+# millor) i entre els M primers depèn també dels altres grups.
+@jugador_bp.route('/api/escenaris/<int:grup>', methods=['GET'])
+@cache_pagina('api_escenaris', clau=lambda grup: grup)
+def api_escenaris(grup):
+    partits = obtenir_partits(grup)
+    if not partits:
+        return jsonify({"ok": False, "msg": "Aquest grup no té partits"}), 404
+
+    fases = posicions_fases(obtenir_config_fases_finals().items(), len(obtenir_grups_guardats()))
+    objectius = tuple(sorted({p for posicions in fases.values() for p in posicions})) or None
+    escenaris = escenaris_grup(tuple(partits), objectius)
+
+    return jsonify({
+        "ok": True,
+        "grup": grup,
+        "fases": {f: {"segur": s, "possible": p} for f, (s, p) in fases.items()},
+        "pendents": escenaris["pendents"],
+        "equips": escenaris["equips"],
+    })
+
+
 # ========================================================
 # 🔍 BUSCADOR EQUIPS — FASE DE GRUPS
 # ========================================================
@@ -113,10 +164,11 @@ def buscar_equip_fasefinal():
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT fase, equip_nom
-        FROM fase_final_equips
-        WHERE LOWER(equip_nom) LIKE %s
-        ORDER BY fase ASC
+        SELECT f.fase, COALESCE(e.nom_equip, f.equip_nom) AS equip_nom
+        FROM fase_final_equips f
+        LEFT JOIN equips e ON e.id = f.equip_id
+        WHERE LOWER(COALESCE(e.nom_equip, f.equip_nom)) LIKE %s
+        ORDER BY f.fase ASC
     """, (f"%{q}%",))
 
     rows = cur.fetchall()
@@ -144,7 +196,12 @@ def veure_equips_fase(fase):
     cur.execute("SELECT fase, num_equips FROM config_fases_finals")
     fases_cfg = dict(cur.fetchall())
 
-    cur.execute("SELECT equip_nom, posicio FROM classificacio_final ORDER BY posicio ASC")
+    cur.execute("""
+        SELECT COALESCE(e.nom_equip, c.equip_nom) AS equip_nom, c.posicio
+        FROM classificacio_final c
+        LEFT JOIN equips e ON e.id = c.equip_id
+        ORDER BY c.posicio ASC
+    """)
     tots = cur.fetchall()
 
     conn.close()
@@ -153,14 +210,10 @@ def veure_equips_fase(fase):
         return f"No existeix la fase {fase}"
 
     equips_fase = []
-    pos = 0
-
-    for f, n in fases_cfg.items():
-        sub = tots[pos:pos+n]
+    for f, sub in equips_per_fase(fases_cfg.items(), tots).items():
         if f.upper() == fase:
             equips_fase = sub
             break
-        pos += n
 
     return render_template(
         "jugador_fase_final_equips.html",
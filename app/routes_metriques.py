@@ -0,0 +1,91 @@
+import threading
+import time
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask.signals import before_render_template, signals_available, template_rendered
+
+import db
+import metriques
+from .cache_render import cache_render
+
+metriques_bp = Blueprint('metriques', __name__)
+
+
+# ========================================================
+# ⏱ TEMPS PER PETICIÓ (Server-Timing)
+# ========================================================
+@metriques_bp.before_app_request
+def inici_peticio():
+    if metriques.ACTIVAT:
+        metriques.iniciar_peticio()
+
+
+@metriques_bp.after_app_request
+def final_peticio(resp):
+    if not metriques.ACTIVAT:
+        return resp
+    ruta = request.url_rule.rule if request.url_rule else "(sense ruta)"
+    dades = metriques.acabar_peticio(ruta, request.method, resp.status_code)
+    if dades is None:
+        return resp
+    if current_app.config.get("SERVER_TIMING", True):
+        resp.headers["Server-Timing"] = metriques.server_timing(dades)
+
+    if metriques.DETECTOR:
+        avisos = metriques.informe_consultes(dades)
+        if avisos:
+            print(f"🐢 {request.method} {request.path} — {dades['consultes']} consultes, "
+                  f"{dades['db'] * 1000:.0f} ms a la BD")
+            for avis in avisos:
+                print("    ⚠️ " + avis)
+            resp.headers["X-Avisos-Consultes"] = str(len(avisos))
+    return resp
+
+
+# ========================================================
+# 🧩 TEMPS DE PLANTILLES (senyals de Flask, si hi ha blinker)
+# ========================================================
+_plantilles = threading.local()
+
+
+def _abans_plantilla(sender, template, context, **extra):
+    _plantilles.inici = time.perf_counter()
+
+
+def _despres_plantilla(sender, template, context, **extra):
+    inici = getattr(_plantilles, "inici", None)
+    if inici is not None:
+        _plantilles.inici = None
+        metriques.registrar_plantilla(template.name, time.perf_counter() - inici)
+
+
+@metriques_bp.record_once
+def connectar_senyals(state):
+    if metriques.ACTIVAT and signals_available:
+        before_render_template.connect(_abans_plantilla, state.app)
+        template_rendered.connect(_despres_plantilla, state.app)
+
+
+# ========================================================
+# 📊 /metrics (format Prometheus)
+# ========================================================
+@metriques_bp.route('/metrics')
+def metrics():
+    if not metriques.ACTIVAT:
+        abort(404)
+
+    token = current_app.config.get("METRIQUES_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401)
+
+    cache = cache_render.estat()
+    extres = {
+        "cvpa_cache_render_encerts_total": ("counter", "Pàgines servides des de la cache", {(): cache["encerts"]}),
+        "cvpa_cache_render_errades_total": ("counter", "Pàgines renderitzades de nou", {(): cache["errades"]}),
+        "cvpa_cache_render_entrades": ("gauge", "Pàgines guardades a la cache", {(): cache["entrades"]}),
+    }
+    if db.REPLICA is not None:
+        extres["cvpa_replica_disponible"] = ("gauge", "Rèplica de lectura en ús", {(): int(db.estat_replica.disponible)})
+        if db.estat_replica.retard is not None:
+            extres["cvpa_replica_retard_segons"] = ("gauge", "Retard de la rèplica", {(): db.estat_replica.retard})
+    return Response(metriques.format_prometheus(extres), mimetype="text/plain; version=0.0.4")
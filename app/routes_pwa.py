@@ -0,0 +1,38 @@
+from flask import Blueprint, current_app, jsonify, request, send_from_directory
+from db import BaseDadesNoDisponible, obtenir_versio_dades
+
+pwa_bp = Blueprint('pwa', __name__)
+
+# Rutes les respostes de les quals el service worker guarda a la cache de dades
+PREFIXOS_DADES = ("/jugador", "/api/", "/arbitre/api/", "/admin/fasefinal/api/")
+
+
+# ========================================================
+# 📲 SERVICE WORKER (abast arrel)
+# ========================================================
+@pwa_bp.route('/service-worker.js')
+def service_worker():
+    resp = send_from_directory(current_app.static_folder, 'service-worker.js', max_age=0)
+    resp.headers["Service-Worker-Allowed"] = "/"
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+# ========================================================
+# 🔢 VERSIÓ DE DADES
+# ========================================================
+@pwa_bp.route('/api/versio')
+def api_versio():
+    return jsonify({"ok": True, "versio": obtenir_versio_dades()})
+
+
+@pwa_bp.after_app_request
+def afegir_versio_dades(resp):
+    if request.path == "/" or request.path.startswith(PREFIXOS_DADES):
+        try:
+            resp.headers["X-Versio-Dades"] = str(obtenir_versio_dades())
+        except BaseDadesNoDisponible:
+            pass
+        except Exception as e:
+            print("⚠️ No s'ha pogut llegir la versió de dades:", e)
+    return resp
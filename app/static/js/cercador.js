@@ -0,0 +1,91 @@
+/* Cercador d'equips (fase de grups i fase final).
+   L'input #searchInput porta la configuració en atributs data-*:
+     data-api       URL de l'API de cerca (?q=...)
+     data-camp      camp del resultat que indica el destí ("grup" o "fase")
+     data-etiqueta  text que es mostra davant del camp ("Grup", "Fase")
+     data-desti     prefix de la URL de destí
+     data-unic      si hi és, la cerca manual només salta amb un sol resultat
+     data-no-trobat text quan no hi ha resultats */
+
+// Normalitzar accents
+function normalizeText(t){
+    return t.normalize("NFD").replace(/[\u0300-\u036f]/g,"").toLowerCase();
+}
+
+function configCercador(){
+    return document.getElementById("searchInput").dataset;
+}
+
+// CERCA MANUAL
+async function buscarManual(){
+    const cfg = configCercador();
+    const q = normalizeText(document.getElementById("searchInput").value.trim());
+    if(!q) return;
+
+    const res = await fetch(`${cfg.api}?q=${q}`);
+    const data = await res.json();
+
+    if(data.ok && data.resultats.length > 0){
+        if(cfg.unic !== undefined && data.resultats.length > 1){
+            alert("Especifica més, hi ha múltiples equips que coincideixen.");
+            return;
+        }
+        window.location.href = `${cfg.desti}${data.resultats[0][cfg.camp]}`;
+    } else {
+        alert("Equip no trobat.");
+    }
+}
+
+// CERCA EN TEMPS REAL
+document.addEventListener("DOMContentLoaded", ()=>{
+    const input = document.getElementById("searchInput");
+    const box   = document.getElementById("searchResults");
+    if(!input || !box) return;
+    const cfg = input.dataset;
+
+    input.addEventListener("input", async ()=>{
+        const raw = input.value.trim();
+        const q   = normalizeText(raw);
+
+        if(!q){
+            box.style.display="none";
+            box.innerHTML="";
+            return;
+        }
+
+        const res = await fetch(`${cfg.api}?q=${q}`);
+        const data = await res.json();
+
+        if(!data.ok || !data.resultats.length){
+            box.innerHTML = `
+                <div style="padding:12px; text-align:center; color:#777;">❌ ${cfg.noTrobat || "No trobat"}</div>`;
+            box.style.display="block";
+            return;
+        }
+
+        // Ordenar alfabèticament
+        data.resultats.sort((a,b)=>a.equip.localeCompare(b.equip));
+
+        box.innerHTML = "";
+        data.resultats.forEach(r=>{
+            const div = document.createElement("div");
+            div.style.padding="12px";
+            div.style.cursor="pointer";
+            div.style.borderBottom="1px solid #eee";
+            div.style.transition="0.2s";
+
+            div.innerHTML = `
+                <strong>${r.equip}</strong><br>
+                <span style="color:#800000; font-size:14px;">${cfg.etiqueta}: ${r[cfg.camp]}</span>
+            `;
+
+            div.onclick = ()=>window.location.href=`${cfg.desti}${r[cfg.camp]}`;
+            div.onmouseover = ()=>div.style.background="#ffecec";
+            div.onmouseout  = ()=>div.style.background="white";
+
+            box.appendChild(div);
+        });
+
+        box.style.display="block";
+    });
+});
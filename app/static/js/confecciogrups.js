@@ -0,0 +1,150 @@
+const totalEquips = parseInt(document.getElementById('total_equips').textContent, 10) || 0;
+
+/* Genera els petits inputs de "Grup X: N equips" */
+function generarDesplegables() {
+    const container = document.getElementById('desplegables_grups');
+    const n = parseInt(document.getElementById('num_grups').value) || 0;
+    container.innerHTML = '';
+
+    for (let i = 1; i <= n; i++) {
+        const div = document.createElement('div');
+        div.className = 'mini-grup';
+        div.innerHTML = `
+            <label>Grup ${i}:</label>
+            <input type="number"
+                   name="grup_${i}"
+                   min="0"
+                   max="${totalEquips}"
+                   value="0"
+                   onchange="actualitzarRestants()"
+                   class="input-mini">
+        `;
+        container.appendChild(div);
+    }
+    actualitzarRestants();
+}
+
+/* Recalcula quants equips queden per assignar */
+function actualitzarRestants() {
+    const inputs = document.querySelectorAll('#desplegables_grups input[type=number]');
+    let assignats = 0;
+    inputs.forEach(input => {
+        assignats += parseInt(input.value) || 0;
+    });
+    const restants = Math.max(0, totalEquips - assignats);
+    document.getElementById('restants').textContent = restants;
+}
+
+/* Renumerar files d'un grup després de canvis de drag & drop */
+function renumerarGrup(grupElement) {
+    grupElement.querySelectorAll('tbody tr').forEach((row, idx) => {
+        const cell = row.querySelector('td:first-child');
+        if (cell) cell.textContent = idx + 1;
+    });
+}
+
+/* Desa en JSON l'ordre actual dels equips per grup */
+function saveOrderToHidden() {
+    let data = {};
+    document.querySelectorAll('.equip-list').forEach(table => {
+        const grup = table.id.replace('grup-', '');
+        const equips = [];
+        table.querySelectorAll('tbody tr').forEach((row, idx) => {
+            equips.push([row.dataset.id, idx + 1]);
+        });
+        data[grup] = equips;
+    });
+    document.getElementById('ordre_json').value = JSON.stringify(data);
+}
+
+/* Inicialitza el drag & drop amb SortableJS */
+/* Inicialitza el drag & drop amb SortableJS */
+function inicialitzarDragDrop() {
+    document.querySelectorAll('.equip-list').forEach(table => {
+        const tbody = table.querySelector('tbody');
+        if (!tbody) return;
+
+        new Sortable(tbody, {
+            group: 'grups',
+            animation: 150,
+
+            // 🔥 AFEGIT → fa que al mòbil no es mogui tan fàcilment
+            delay: 150,                 // temps de pressió abans de drag
+            delayOnTouchOnly: true,     // només afecta dispositius tàctils
+            touchStartThreshold: 5,     // tolerància de moviment inicial
+
+            onEnd: evt => {
+                renumerarGrup(evt.to.closest('table'));
+                if (evt.from !== evt.to) {
+                    renumerarGrup(evt.from.closest('table'));
+                }
+                saveOrderToHidden();
+            }
+        });
+    });
+}
+
+/* Evitar que la mateixa pista estigui assignada a dos grups alhora */
+function updatePistaOptions() {
+    const selects = document.querySelectorAll('.select-pista');
+    const used = new Set();
+
+    // pistes ja seleccionades
+    selects.forEach(sel => {
+        if (sel.value) used.add(sel.value);
+    });
+
+    selects.forEach(sel => {
+        const current = sel.value;
+        sel.querySelectorAll('option').forEach(opt => {
+            if (!opt.value) return; // ignore "–"
+            opt.disabled = false;
+            if (used.has(opt.value) && opt.value !== current) {
+                opt.disabled = true;
+            }
+        });
+    });
+}
+
+/* Afegeix events change a tots els selects de pista */
+function inicialitzarPistes() {
+    const selects = document.querySelectorAll('.select-pista');
+    selects.forEach(sel => {
+        sel.addEventListener('change', updatePistaOptions);
+    });
+    updatePistaOptions();
+}
+
+/* Regenera les opcions de les pistes quan canviem el número de pistes */
+function regenerarSelectsPistes() {
+    const numPistes = parseInt(document.getElementById("num_pistes").value) || 1;
+    const selects = document.querySelectorAll(".select-pista");
+
+    selects.forEach(sel => {
+        const valorActual = sel.value;
+        sel.innerHTML = '<option value="">–</option>';
+
+        for (let p = 1; p <= numPistes; p++) {
+            const opt = document.createElement("option");
+            opt.value = p;
+            opt.textContent = p;
+            sel.appendChild(opt);
+        }
+
+        if (valorActual && parseInt(valorActual) <= numPistes) {
+            sel.value = valorActual;
+        } else {
+            sel.value = "";
+        }
+    });
+
+    updatePistaOptions();
+}
+
+/* Inici */
+document.addEventListener('DOMContentLoaded', () => {
+    actualitzarRestants();
+    inicialitzarDragDrop();
+    inicialitzarPistes();
+    regenerarSelectsPistes(); // per assegurar que el num_pistes de l'input governa les opcions
+});
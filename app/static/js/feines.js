@@ -0,0 +1,42 @@
+/* Feines en segon pla (app/feines.py).
+   executarFeina(tipus, {cos, onProgres}) crea la feina, en consulta
+   l'estat cada segon i es resol amb la feina acabada (feina.resultat:
+   URL del fitxer, si n'hi ha). Si falla, llança un Error amb el missatge. */
+
+function esperar(ms){
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function executarFeina(tipus, { cos = null, onProgres = null, interval = 1000 } = {}){
+  const opcions = { method: 'POST' };
+  if (cos instanceof FormData){
+    opcions.body = cos;
+  } else if (cos){
+    opcions.headers = { 'Content-Type': 'application/json' };
+    opcions.body = JSON.stringify(cos);
+  }
+
+  const res = await fetch(`/admin/feines/${tipus}`, opcions);
+  const data = await res.json();
+  if (!data.ok) throw new Error(data.msg || "No s'ha pogut crear la feina");
+
+  let feina = data.feina;
+  while (feina.estat === 'pendent' || feina.estat === 'en_curs'){
+    if (onProgres) onProgres(feina);
+    await esperar(interval);
+    try {
+      const r = await fetch(`/admin/feines/${feina.id}`, { cache: 'no-store' });
+      if (r.ok) feina = (await r.json()).feina;
+    } catch (e) {
+      /* error de xarxa puntual: es torna a provar */
+    }
+  }
+
+  if (feina.estat !== 'feta') throw new Error(feina.missatge || 'La feina ha fallat');
+  return feina;
+}
+
+function textProgres(feina){
+  const percent = Math.round((feina.progres || 0) * 100);
+  return feina.estat === 'pendent' ? '⏳ En cua…' : `⏳ ${feina.missatge || 'En curs'} (${percent}%)`;
+}
@@ -0,0 +1,27 @@
+/* Registre del service worker i avisos de dades noves */
+(function () {
+  if (!('serviceWorker' in navigator)) return;
+
+  navigator.serviceWorker.register('/service-worker.js', { scope: '/' });
+
+  navigator.serviceWorker.addEventListener('message', function (event) {
+    var msg = event.data || {};
+    if (msg.tipus !== 'dades-noves' || msg.url !== location.href) return;
+    if (document.getElementById('avis-dades-noves')) return;
+
+    var avis = document.createElement('div');
+    avis.id = 'avis-dades-noves';
+    avis.textContent = '🔄 Hi ha resultats nous — toca per actualitzar';
+    avis.style.cssText = 'position:fixed;left:50%;bottom:16px;transform:translateX(-50%);' +
+      'background:#800000;color:#fff;padding:12px 18px;border-radius:10px;' +
+      'font:bold 15px Arial,sans-serif;box-shadow:0 3px 10px rgba(0,0,0,.3);z-index:9999;cursor:pointer;';
+    avis.onclick = function () { location.reload(); };
+    document.body.appendChild(avis);
+  });
+
+  window.addEventListener('online', function () {
+    if (navigator.serviceWorker.controller) {
+      navigator.serviceWorker.controller.postMessage({ tipus: 'enviar-pendents' });
+    }
+  });
+})();
@@ -0,0 +1,160 @@
+/* Quadre de la fase final (admin).
+   - L'estructura, la propagació i les posicions les calcula el servidor
+     (quadres.py): GET /admin/fasefinal/api/quadre/{FASE}
+   - Clicar una casella envia el guanyador; el servidor el propaga i
+     retorna només els partits que han canviat. */
+
+const FASE = (document.getElementById('canvas').dataset.fase || '').toUpperCase();
+
+/* Estat local (còpia del servidor) */
+let equips = [];     // noms per ordre de llavor (E1 = equips[0])
+let matches = {};    // matches[mid] = { src1, src2, eq1, eq2, winner, x, y }
+let finalId = null;
+
+/* fila compacta [id, font1, font2, equip1, equip2, guanyador, x, y] */
+function applyRow(row){
+  const [mid, src1, src2, eq1, eq2, winner, x, y] = row;
+  matches[mid] = { src1, src2, eq1, eq2, winner, x, y };
+}
+
+/* Inicialitzar */
+async function init(){
+  const res = await fetch(`/admin/fasefinal/api/quadre/${FASE}`);
+  const payload = await res.json();
+
+  if(!payload.ok){
+    const canvas = document.getElementById('canvas');
+    const msg = document.createElement('div');
+    msg.style.cssText = 'color:#800000;padding:24px;font-weight:700';
+    msg.textContent = payload.msg || "No s'ha pogut carregar el quadre";
+    canvas.innerHTML = '';
+    canvas.appendChild(msg);
+    return;
+  }
+
+  equips = payload.equips;
+  finalId = payload.final;
+  matches = {};
+  payload.partits.forEach(applyRow);
+
+  draw();
+  attachControls();
+}
+
+function teamName(idx){
+  return (idx === null || idx === undefined) ? null : equips[idx];
+}
+
+/* Build DOM for one slot */
+function makeSlot(mid, m, slot){
+  const src = slot === 1 ? m.src1 : m.src2;
+  const name = teamName(slot === 1 ? m.eq1 : m.eq2);
+
+  const div = document.createElement('div');
+  div.className = 'slot-compact' + (name ? '' : ' disabled');
+  div.id = `m${mid}_s${slot}`;
+
+  const label = document.createElement('span');
+  label.style.fontWeight = '700';
+  label.textContent = formatSlotLabel(src);
+  const team = document.createElement('span');
+  team.textContent = name || '—';
+  div.appendChild(label);
+  div.appendChild(team);
+
+  if(m.winner){
+    div.classList.add(m.winner === slot ? 'win' : 'lose');
+  }
+  div.onclick = ()=> onClickSlot(mid, slot);
+  return div;
+}
+
+/* Build DOM for one match */
+function makeMatchDiv(mid, m){
+  const div = document.createElement('div');
+  div.className = 'match';
+  div.style.left = m.x + 'px';
+  div.style.top  = m.y + 'px';
+
+  const title = document.createElement('div');
+  title.className = 'title';
+  title.innerText = (mid === finalId) ? 'FINAL' : `PARTIT ${mid}`;
+  div.appendChild(title);
+
+  div.appendChild(makeSlot(mid, m, 1));
+  div.appendChild(makeSlot(mid, m, 2));
+  return div;
+}
+
+/* format label: if slot source is 'E#' show '', if 'w_#' show G.P.# , if 'l_#' show P.P.# */
+function formatSlotLabel(src){
+  if(!src) return '';
+  if(src.startsWith('w_')) return `G.P.${src.split('_')[1]}`;
+  if(src.startsWith('l_')) return `P.P.${src.split('_')[1]}`;
+  return ''; // initial seed — show nothing
+}
+
+/* Draw all matches (the canvas grows with the bracket) */
+function draw(){
+  const canvas = document.getElementById('canvas');
+  canvas.innerHTML = '';
+  const ids = Object.keys(matches).map(x=>parseInt(x)).sort((a,b)=>a-b);
+  let maxX = 0, maxY = 0;
+  ids.forEach(mid=>{
+    const m = matches[mid];
+    canvas.appendChild(makeMatchDiv(mid, m));
+    maxX = Math.max(maxX, m.x);
+    maxY = Math.max(maxY, m.y);
+  });
+  canvas.style.width = Math.max(maxX + 260, 1100) + 'px';
+  canvas.style.height = Math.max(maxY + 120, 600) + 'px';
+}
+
+/* clicking a slot: send winner (or clear it) and apply the changed matches */
+async function onClickSlot(mid, slot){
+  const m = matches[mid];
+  if(!m || m.eq1 === null || m.eq2 === null) return;
+
+  const winner = (m.winner === slot) ? 0 : slot;
+  setStatus('Desant...');
+  try{
+    const res = await fetch(`/admin/fasefinal/api/quadre/${FASE}/resultat`, {
+      method:'POST',
+      headers:{'Content-Type':'application/json'},
+      body: JSON.stringify({ partit: mid, guanyador: winner })
+    });
+    const j = await res.json();
+    if(!j.ok){ setStatus(j.msg || 'Error desant'); return; }
+    j.canviats.forEach(applyRow);
+    draw();
+    setStatus('Desat', 1400);
+  }catch(e){
+    setStatus('Error');
+    console.error(e);
+  }
+}
+
+function setStatus(text, clearAfter){
+  const el = document.getElementById('status');
+  el.innerText = text;
+  if(clearAfter) setTimeout(()=>{ el.innerText = ''; }, clearAfter);
+}
+
+document.getElementById('btnReset').addEventListener('click', async ()=>{
+  if(!confirm("Confirmes reiniciar complet el quadre?")) return;
+  await fetch(`/admin/fasefinal/api/reset/${FASE}`, { method:'POST' });
+  location.reload();
+});
+
+/* Attach controls and color title according to fase */
+function attachControls(){
+  const tit = document.getElementById('titol_fase');
+  const fase = FASE.toUpperCase();
+  if(fase === 'OR') tit.style.color = 'var(--gold)';
+  else if(fase === 'PLATA') tit.style.color = 'var(--silver)';
+  else if(fase === 'BRONZE') tit.style.color = 'var(--bronze)';
+  else if(fase === 'XOU' || fase === 'SHOW') tit.style.color = 'var(--show)';
+}
+
+/* Kick off */
+init();
@@ -0,0 +1,127 @@
+/* Minimal, read-only bracket renderer.
+   - Carrega el quadre ja resolt pel servidor via /admin/fasefinal/api/quadre/{FASE}
+     (estructura, equips de cada casella, guanyadors i posicions)
+   - Renderitza caselles amb classes win/lose
+   - Després només demana els partits canviats (/api/canvis des de la revisió)
+   - Cap event d'interacció (pointer-events: none al CSS) */
+
+const FASE = (document.getElementById('canvas').dataset.fase || '').toUpperCase();
+const AMBIT = `quadre:${FASE}`;
+const INTERVAL_CANVIS = 10000;
+
+let payload = null;   // última resposta completa, amb les files actualitzades
+let revisio = null;
+
+async function init(){
+  const canvas = document.getElementById('canvas');
+  try{
+    const res = await fetch(`/admin/fasefinal/api/quadre/${FASE}`);
+    payload = await res.json();
+  }catch(e){
+    console.warn("No s'ha pogut carregar el quadre", e);
+    return;
+  }
+  revisio = payload.revisio;
+
+  if(!payload.ok){
+    const msg = document.createElement('div');
+    msg.style.cssText = 'color:#800000;padding:24px;font-weight:700;text-align:center';
+    msg.textContent = payload.msg || "Quadre no disponible";
+    canvas.innerHTML = '';
+    canvas.appendChild(msg);
+    return;
+  }
+
+  draw(payload);
+  colorTitle();
+}
+
+/* SINCRONITZACIÓ: només els partits canviats des de la revisió */
+async function sync(){
+  if(document.hidden || revisio === null || revisio === undefined) return;
+  let j;
+  try{
+    const res = await fetch(`/api/canvis?des_de=${revisio}&ambit=${encodeURIComponent(AMBIT)}`);
+    j = await res.json();
+  }catch(e){
+    return;
+  }
+  if(!j.ok) return;
+  if(j.complet){ await init(); return; }
+
+  revisio = j.revisio;
+  const files = j.canvis[AMBIT] || [];
+  if(!files.length || !payload.ok) return;
+  const perId = {};
+  files.forEach(row => { perId[row[0]] = row; });
+  payload.partits = payload.partits.map(row => perId[row[0]] || row);
+  draw(payload);
+}
+
+/* RENDER */
+function makeSlot(src, name, state){
+  const div = document.createElement('div');
+  div.className = 'slot-compact' + (name ? '' : ' empty') + (state ? ' ' + state : '');
+  const label = document.createElement('span');
+  label.style.fontWeight = '700';
+  label.textContent = formatSlotLabel(src);
+  const team = document.createElement('span');
+  team.textContent = name || '—';
+  div.appendChild(label);
+  div.appendChild(team);
+  return div;
+}
+
+/* fila compacta [id, font1, font2, equip1, equip2, guanyador, x, y] */
+function makeMatchDiv(row, payload){
+  const [mid, src1, src2, eq1, eq2, winner, x, y] = row;
+  const name = idx => (idx === null ? null : payload.equips[idx]);
+
+  const div = document.createElement('div');
+  div.className = 'match';
+  div.style.left = x + 'px';
+  div.style.top  = y + 'px';
+
+  const title = document.createElement('div');
+  title.className = 'title';
+  title.innerText = (mid === payload.final) ? 'FINAL' : `PARTIT ${mid}`;
+  div.appendChild(title);
+
+  div.appendChild(makeSlot(src1, name(eq1), winner ? (winner === 1 ? 'win' : 'lose') : ''));
+  div.appendChild(makeSlot(src2, name(eq2), winner ? (winner === 2 ? 'win' : 'lose') : ''));
+  return div;
+}
+
+function formatSlotLabel(src){
+  if(!src) return '';
+  if(src.startsWith('w_')) return `G.P.${src.split('_')[1]}`;
+  if(src.startsWith('l_')) return `P.P.${src.split('_')[1]}`;
+  return '';
+}
+
+function draw(payload){
+  const canvas = document.getElementById('canvas');
+  canvas.innerHTML = '';
+  let maxX = 0, maxY = 0;
+  payload.partits.forEach(row=>{
+    canvas.appendChild(makeMatchDiv(row, payload));
+    maxX = Math.max(maxX, row[6]);
+    maxY = Math.max(maxY, row[7]);
+  });
+  canvas.style.width = Math.max(maxX + 260, 1100) + 'px';
+  canvas.style.height = Math.max(maxY + 120, 600) + 'px';
+}
+
+function colorTitle(){
+  const tit = document.getElementById('titol_fase');
+  const fase = FASE.toUpperCase();
+  if(fase === 'OR') tit.style.color = 'var(--gold)';
+  else if(fase === 'PLATA') tit.style.color = 'var(--silver)';
+  else if(fase === 'BRONZE') tit.style.color = 'var(--bronze)';
+  else if(fase === 'SHOW' || fase === 'XOU') tit.style.color = 'var(--show)';
+}
+
+/* Kick off */
+init();
+setInterval(sync, INTERVAL_CANVIS);
+document.addEventListener('visibilitychange', sync);
@@ -1,15 +1,256 @@
-self.addEventListener("install", e => {
-  console.log("Service Worker: Installed");
-  self.skipWaiting();
+/* ==========================================================
+   Service worker del Torneig CVPA
+   - Precache dels fitxers estàtics i icones
+   - Stale-while-revalidate per /jugador/* i les APIs JSON de lectura,
+     en una cache amb el nom de la versió de dades (X-Versio-Dades)
+   - Resultats d'àrbitres sense connexió: cua a IndexedDB + Background Sync
+   ========================================================== */
+
+const VERSIO_SW = 3;
+const CACHE_STATIC = `cvpa-static-v${VERSIO_SW}`;
+const PREFIX_DADES = 'cvpa-dades-';
+
+// Temps durant el qual una resposta en cache es considera fresca i no
+// es revalida (evita peticions repetides quan es navega endavant i enrere)
+const FRESC_MS = 10000;
+
+const PRECACHE_STATIC = [
+  '/static/manifest.json',
+  '/static/js/pwa.js',
+  '/static/img/logo1.png',
+  '/static/icons/icon-72.png',
+  '/static/icons/icon-96.png',
+  '/static/icons/icon-128.png',
+  '/static/icons/icon-144.png',
+  '/static/icons/icon-152.png',
+  '/static/icons/icon-192.jpg',
+  '/static/icons/icon-384.png',
+  '/static/icons/icon-512.png'
+];
+
+const PRECACHE_DADES = [
+  '/',
+  '/jugador/',
+  '/jugador/fase-grups',
+  '/jugador/fase-final'
+];
+
+let versioActual = null;
+
+
+/* ---------- Instal·lació i activació ---------- */
+
+self.addEventListener('install', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE_STATIC);
+    await cache.addAll(PRECACHE_STATIC);
+
+    // Les pàgines dinàmiques es precarreguen si es pot, sense fallar
+    const dades = await cacheDades(null);
+    await Promise.all(PRECACHE_DADES.map(url =>
+      fetch(url).then(resp => resp.ok && dades.put(url, resp)).catch(() => null)
+    ));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    const noms = await caches.keys();
+    await Promise.all(noms
+      .filter(n => n.startsWith('cvpa-static-') && n !== CACHE_STATIC)
+      .map(n => caches.delete(n)));
+    await self.clients.claim();
+    enviarPendents().catch(() => null);
+  })());
+});
+
+
+/* ---------- Caches de dades versionades ---------- */
+
+async function versioEnCache() {
+  if (versioActual !== null) return versioActual;
+  const noms = (await caches.keys()).filter(n => n.startsWith(PREFIX_DADES));
+  const versions = noms.map(n => parseInt(n.slice(PREFIX_DADES.length), 10)).filter(v => !isNaN(v));
+  versioActual = versions.length ? Math.max(...versions) : 0;
+  return versioActual;
+}
+
+// Retorna la cache de la versió indicada; si és més nova que l'actual,
+// esborra les caches de versions anteriors.
+async function cacheDades(versio) {
+  const actual = await versioEnCache();
+  const v = parseInt(versio, 10);
+  if (!isNaN(v) && v > actual) {
+    versioActual = v;
+    const noms = await caches.keys();
+    await Promise.all(noms
+      .filter(n => n.startsWith(PREFIX_DADES) && n !== PREFIX_DADES + v)
+      .map(n => caches.delete(n)));
+  }
+  return caches.open(PREFIX_DADES + versioActual);
+}
+
+function esDades(url) {
+  // El registre de canvis sempre va a la xarxa (cada des_de és una URL nova)
+  if (url.pathname === '/api/canvis') return false;
+  return url.pathname === '/' ||
+         url.pathname.startsWith('/jugador') ||
+         url.pathname.startsWith('/api/') ||
+         url.pathname.startsWith('/arbitre/api/grup/') ||
+         url.pathname.startsWith('/admin/fasefinal/api/equips/') ||
+         url.pathname.startsWith('/admin/fasefinal/api/load/');
+}
+
+function esFresca(resp) {
+  const data = Date.parse(resp.headers.get('Date') || '');
+  return !isNaN(data) && (Date.now() - data) < FRESC_MS;
+}
+
+async function avisarClients(url) {
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach(c => c.postMessage({ tipus: 'dades-noves', url }));
+}
+
+async function staleWhileRevalidate(event, req) {
+  const cache = await cacheDades(null);
+  const enCache = await cache.match(req);
+
+  if (enCache && esFresca(enCache)) return enCache;
+
+  const xarxa = fetch(req).then(async resp => {
+    if (resp.ok) {
+      const versio = resp.headers.get('X-Versio-Dades');
+      const desti = await cacheDades(versio);
+      await desti.put(req, resp.clone());
+      if (enCache && versio && enCache.headers.get('X-Versio-Dades') !== versio) {
+        await avisarClients(req.url);
+      }
+      enviarPendents().catch(() => null);
+    }
+    return resp;
+  }).catch(() => null);
+
+  if (enCache) {
+    event.waitUntil(xarxa);
+    return enCache;
+  }
+
+  const resp = await xarxa;
+  if (resp) return resp;
+
+  // Sense xarxa i sense còpia: qualsevol versió anterior de la pàgina
+  const antiga = await caches.match(req);
+  if (antiga) return antiga;
+  if (req.mode === 'navigate') {
+    const menu = await caches.match('/jugador/');
+    if (menu) return menu;
+  }
+  return new Response('Sense connexió', {
+    status: 503,
+    headers: { 'Content-Type': 'text/plain; charset=utf-8' }
+  });
+}
+
+async function cacheFirst(req) {
+  const enCache = await caches.match(req);
+  if (enCache) return enCache;
+  const resp = await fetch(req);
+  if (resp.ok) {
+    const cache = await caches.open(CACHE_STATIC);
+    cache.put(req, resp.clone());
+  }
+  return resp;
+}
+
+
+/* ---------- Cua de resultats sense connexió (IndexedDB) ---------- */
+
+function obrirBD() {
+  return new Promise((resolve, reject) => {
+    const r = indexedDB.open('cvpa', 1);
+    r.onupgradeneeded = () => r.result.createObjectStore('pendents', { keyPath: 'id', autoIncrement: true });
+    r.onsuccess = () => resolve(r.result);
+    r.onerror = () => reject(r.error);
+  });
+}
+
+async function transaccio(mode, fn) {
+  const bd = await obrirBD();
+  return new Promise((resolve, reject) => {
+    const tx = bd.transaction('pendents', mode);
+    const r = fn(tx.objectStore('pendents'));
+    tx.oncomplete = () => resolve(r && r.result);
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+const guardarPendent = item => transaccio('readwrite', s => s.add(item));
+const llegirPendents = () => transaccio('readonly', s => s.getAll());
+const esborrarPendent = id => transaccio('readwrite', s => s.delete(id));
+
+async function enviarPendents() {
+  const pendents = await llegirPendents();
+  for (const p of pendents || []) {
+    const resp = await fetch(p.url, { method: 'POST', headers: p.capcaleres, body: p.cos });
+    // 202: encara a la cua del servidor; 429/5xx: reintentar més tard
+    if (resp.status === 202 || resp.status === 429 || resp.status >= 500) {
+      throw new Error(`Resultat pendent (${resp.status})`);
+    }
+    // 200/4xx són definitius; la clau d'idempotència evita duplicats
+    await esborrarPendent(p.id);
+  }
+}
+
+async function enviarResultat(req) {
+  const cos = await req.clone().text();
+  const clau = req.headers.get('Idempotency-Key') || self.crypto.randomUUID();
+  const capcaleres = { 'Content-Type': 'application/json', 'Idempotency-Key': clau };
+  const token = req.headers.get('X-Arbitre-Token');
+  if (token) capcaleres['X-Arbitre-Token'] = token;
+
+  try {
+    return await fetch(req.url, { method: 'POST', headers: capcaleres, body: cos });
+  } catch (e) {
+    await guardarPendent({ url: req.url, capcaleres, cos });
+    if (self.registration.sync) {
+      await self.registration.sync.register('resultats').catch(() => null);
+    }
+    return new Response(JSON.stringify({ ok: true, en_cua: true, offline: true, clau }), {
+      status: 202,
+      headers: { 'Content-Type': 'application/json' }
+    });
+  }
+}
+
+self.addEventListener('sync', event => {
+  if (event.tag === 'resultats') event.waitUntil(enviarPendents());
 });
 
-self.addEventListener("activate", e => {
-  console.log("Service Worker: Activated");
+self.addEventListener('message', event => {
+  if (event.data && event.data.tipus === 'enviar-pendents') {
+    event.waitUntil(enviarPendents().catch(() => null));
+  }
 });
 
-self.addEventListener("fetch", e => {
-  // Simple offline fallback
-  e.respondWith(
-    fetch(e.request).catch(() => new Response("Offline"))
-  );
+
+/* ---------- Encaminament ---------- */
+
+self.addEventListener('fetch', event => {
+  const req = event.request;
+  const url = new URL(req.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (req.method === 'POST' && /^\/arbitre\/api\/partit\/\d+\/resultat$/.test(url.pathname)) {
+    event.respondWith(enviarResultat(req));
+    return;
+  }
+
+  if (req.method !== 'GET') return;
+
+  if (url.pathname.startsWith('/static/')) {
+    event.respondWith(cacheFirst(req));
+  } else if (esDades(url)) {
+    event.respondWith(staleWhileRevalidate(event, req));
+  }
 });
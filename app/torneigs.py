@@ -0,0 +1,161 @@
+import threading
+import time
+
+from flask import Blueprint, abort, current_app, g, jsonify, request
+
+from db import (
+    en_torneig,
+    ensure_db_exists,
+    obtenir_torneigs,
+    registrar_torneig,
+    torneig_actual,
+    usar_torneig,
+)
+from .auth import require_admin
+
+# ---------------------------------------------------------
+# 🏐 MULTI-TORNEIG
+# ---------------------------------------------------------
+# Una sola instal·lació serveix molts torneigs. Cada petició es resol a un
+# torneig pel subdomini (<slug>.TORNEIGS_DOMINI) o per la capçalera
+# X-Torneig; si no, és el torneig original (TOURNAMENT_SLUG). La
+# capçalera la pot posar qualsevol client, així que només es fa cas amb
+# TORNEIGS_CAPCALERA=1 (darrere d'un proxy de confiança que la fixa, o
+# proves de càrrega) o des de l'aplicació mateixa (app/publicar.py). La
+# sessió d'admin és d'un sol torneig (app/auth.py). db.get_conn() obre la connexió a l'espai de taules
+# del torneig, i les caches i els quadres el fan servir com a clau.
+#
+# Alta d'un torneig (des del torneig original):
+#   POST /admin/torneigs  {"slug": "estiu-2026", "titol": "Torneig d'estiu"}
+
+torneigs_bp = Blueprint("torneigs", __name__)
+
+
+class RegistreTorneigs:
+    """Títols dels torneigs donats d'alta, rellegits cada max_edat segons."""
+
+    def __init__(self, max_edat=30.0, espera_desconegut=2.0):
+        self.max_edat = max_edat
+        self.espera_desconegut = espera_desconegut
+        self._titols = {}
+        self._llegit = None
+        self._lock = threading.Lock()
+
+    def _rellegir(self):
+        self._titols = {r["slug"]: r["titol"] for r in obtenir_torneigs()}
+        self._llegit = time.monotonic()
+
+    def titol(self, slug):
+        with self._lock:
+            edat = time.monotonic() - self._llegit if self._llegit is not None else None
+            # Un slug desconegut força rellegir, però com a molt cada pocs
+            # segons: subdominis inventats no han de martellejar la base de dades
+            if edat is None or edat > self.max_edat or (
+                slug not in self._titols and edat > self.espera_desconegut
+            ):
+                self._rellegir()
+            return self._titols.get(slug)
+
+    def invalidar(self):
+        with self._lock:
+            self._llegit = None
+
+
+registre = RegistreTorneigs()
+
+_preparats = set()
+_lock_preparar = threading.Lock()
+
+
+def preparar_torneig(slug):
+    """Crea o migra les taules del torneig (un cop per procés)."""
+    if slug in _preparats:
+        return
+    with _lock_preparar:
+        if slug in _preparats:
+            return
+        from .db_migrate import run_migration
+        with en_torneig(slug):
+            ensure_db_exists()
+            run_migration()
+        _preparats.add(slug)
+
+
+def slug_peticio():
+    slug = ""
+    if current_app.config.get("TORNEIGS_CAPCALERA"):
+        slug = request.headers.get("X-Torneig", "").strip().lower()
+    if not slug:
+        domini = current_app.config.get("TORNEIGS_DOMINI")
+        host = request.host.split(":")[0].lower()
+        if domini and host.endswith("." + domini):
+            slug = host[:-len(domini) - 1]
+    if not slug or slug == current_app.config.get("TOURNAMENT_SLUG"):
+        return None
+    return slug
+
+
+def titol_torneig():
+    return g.get("torneig_titol") or current_app.config.get("TOURNAMENT_TITLE", "Torneig CVPA")
+
+
+def slug_torneig():
+    return g.get("torneig") or current_app.config.get("TOURNAMENT_SLUG", "default")
+
+
+# ========================================================
+# 🔀 RESOLUCIÓ DEL TORNEIG DE CADA PETICIÓ
+# ========================================================
+@torneigs_bp.before_app_request
+def fixar_torneig():
+    # Sempre es fixa: els fils del servidor es reutilitzen entre peticions
+    usar_torneig(None)
+    g.torneig = slug_peticio()
+    if g.torneig is None:
+        return None
+
+    titol = registre.titol(g.torneig)
+    if titol is None:
+        abort(404, "Torneig desconegut")
+    preparar_torneig(g.torneig)
+    usar_torneig(g.torneig)
+    g.torneig_titol = titol
+    return None
+
+
+@torneigs_bp.teardown_app_request
+def alliberar_torneig(exc):
+    usar_torneig(None)
+
+
+# ========================================================
+# 🛠 ALTA I LLISTA DE TORNEIGS
+# ========================================================
+@torneigs_bp.route("/admin/torneigs", methods=["GET"])
+@require_admin
+def api_torneigs():
+    return jsonify({"ok": True, "torneigs": [
+        {"slug": r["slug"], "titol": r["titol"]} for r in obtenir_torneigs()
+    ]})
+
+
+@torneigs_bp.route("/admin/torneigs", methods=["POST"])
+@require_admin
+def api_crear_torneig():
+    if torneig_actual() is not None:
+        return jsonify({"ok": False, "msg": "Els torneigs es creen des del torneig principal"}), 403
+
+    data = request.get_json(silent=True) or {}
+    slug = str(data.get("slug", "")).strip().lower()
+    titol = str(data.get("titol", "")).strip() or slug
+    if slug == current_app.config.get("TOURNAMENT_SLUG"):
+        return jsonify({"ok": False, "msg": "Aquest és el torneig principal"}), 400
+
+    try:
+        registrar_torneig(slug, titol)
+    except ValueError as e:
+        return jsonify({"ok": False, "msg": str(e)}), 400
+
+    preparar_torneig(slug)
+    registre.invalidar()
+    return jsonify({"ok": True, "msg": f"Torneig {slug} creat", "slug": slug, "titol": titol})
@@ -0,0 +1,186 @@
+# ---------------------------------------------------------
+# ⏱ MICRO-BENCHMARKS DELS ALGORISMES PURS
+# ---------------------------------------------------------
+# Amb pytest-benchmark:
+#   pytest benchmarks/bench_algorismes.py --benchmark-only
+#   pytest benchmarks/bench_algorismes.py --benchmark-autosave   (i --benchmark-compare)
+#
+# Sense pytest-benchmark (mateixos casos, amb timeit):
+#   python benchmarks/bench_algorismes.py [--mides 32,256,2000]
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classificacio import (  # noqa: E402
+    agrupar_equips,
+    classificacio_grup,
+    classificacio_unica,
+    equips_per_fase,
+    repartir_serp,
+)
+from dades_memoria import equips_sintetics, torneig_sintetic  # noqa: E402
+from escenaris import escenaris_grup  # noqa: E402
+from quadres import quadre, resoldre  # noqa: E402
+
+MIDES = (32, 256, 2000)
+FASES = [("OR", 16), ("PLATA", 16), ("BRONZE", 16), ("SHOW", 16)]
+
+_cache_torneigs = {}
+
+
+def torneig(n):
+    if n not in _cache_torneigs:
+        _cache_torneigs[n] = torneig_sintetic(n)
+    return _cache_torneigs[n]
+
+
+# ========================================================
+# 🧩 CASOS: cada un retorna (funció, arguments)
+# ========================================================
+def cas_classificacio_grups(n):
+    """Classificació de tots els grups."""
+    font = torneig(n)
+    grups = list(font.partits_per_grup.values())
+    return lambda: [classificacio_grup(p) for p in grups], ()
+
+
+def cas_classificacio_grup_gran(n):
+    """Classificació d'un sol grup amb tots els partits (lliga de N/10 equips)."""
+    from calendari import patro_round_robin
+    from registres import Partit
+
+    mida = max(3, n // 10)
+    partits = [
+        Partit(i, f"E{a}", f"E{b}", None, 21, (a * 7 + b) % 20, 1, None, None)
+        for i, (a, b, _) in enumerate(patro_round_robin(mida))
+    ]
+    return classificacio_grup, (partits,)
+
+
+def cas_sorteig_serp(n):
+    """Sorteig en serp en grups de 5 (capacitats automàtiques)."""
+    equips = equips_sintetics(n)
+    return repartir_serp, (equips, max(1, n // 5))
+
+
+def cas_sorteig_serp_manual(n):
+    """Sorteig en serp amb capacitats manuals (mode per nivells de valor)."""
+    equips = equips_sintetics(n)
+    num_grups = max(1, n // 5)
+    capacitats = [n // num_grups + (1 if i < n % num_grups else 0) for i in range(num_grups)]
+    return repartir_serp, (equips, num_grups, capacitats)
+
+
+def cas_classificacio_unica(n):
+    """Classificació única a partir de les classificacions de grup."""
+    font = torneig(n)
+    classificacions = {g: font.calcular_classificacio(g) for g in font.partits_per_grup}
+    return classificacio_unica, (classificacions,)
+
+
+def cas_agrupar_equips(n):
+    """Agrupació d'equips per grup i ordre (obtenir_grups_guardats)."""
+    return agrupar_equips, (torneig(n).equips,)
+
+
+def cas_equips_per_fase(n):
+    """Repartiment de la classificació final en fases."""
+    classificats = [(f"Equip {i}", i) for i in range(1, n + 1)]
+    return equips_per_fase, (FASES, classificats)
+
+
+def cas_escenaris_grup(n):
+    """Escenaris d'un grup sense cap partit jugat (4, 6 o 8 equips segons N), sense la cache."""
+    from calendari import patro_round_robin
+    from registres import Partit
+
+    mida = 4 if n < 100 else 6 if n < 1000 else 8
+    partits = tuple(
+        Partit(i, f"E{a}", f"E{b}", None, 0, 0, 0, None, None)
+        for i, (a, b, _) in enumerate(patro_round_robin(mida))
+    )
+    return escenaris_grup.__wrapped__, (partits, (1, 2, 3))
+
+
+def cas_quadre_doble(n):
+    """Generació d'un quadre de doble eliminació de N equips (sense la cache)."""
+    return quadre.__wrapped__, (n, "doble")
+
+
+def cas_resoldre_quadre(n):
+    """Resolució completa d'un quadre de doble eliminació amb tots els resultats."""
+    q = quadre(n, "doble")
+    return resoldre, (q, {pid: 1 + pid % 2 for pid in q.partits})
+
+
+CASOS = {
+    "classificacio_grups": cas_classificacio_grups,
+    "classificacio_grup_gran": cas_classificacio_grup_gran,
+    "sorteig_serp": cas_sorteig_serp,
+    "sorteig_serp_manual": cas_sorteig_serp_manual,
+    "classificacio_unica": cas_classificacio_unica,
+    "agrupar_equips": cas_agrupar_equips,
+    "equips_per_fase": cas_equips_per_fase,
+    "escenaris_grup": cas_escenaris_grup,
+    "quadre_doble": cas_quadre_doble,
+    "resoldre_quadre": cas_resoldre_quadre,
+}
+
+
+# ========================================================
+# 🧪 PYTEST-BENCHMARK
+# ========================================================
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+if pytest is not None:
+    @pytest.mark.parametrize("n", MIDES)
+    @pytest.mark.parametrize("nom", sorted(CASOS))
+    def test_algorisme(benchmark, nom, n):
+        benchmark.group = nom
+        funcio, args = CASOS[nom](n)
+        benchmark(funcio, *args)
+
+
+# ========================================================
+# ▶️ SENSE PYTEST (timeit)
+# ========================================================
+def mesurar(funcio, args, temps_min=0.2):
+    temporitzador = timeit.Timer(lambda: funcio(*args))
+    repeticions, _ = temporitzador.autorange()
+    mostres = temporitzador.repeat(repeat=5, number=repeticions)
+    millor = min(mostres) / repeticions
+    while sum(mostres) < temps_min and repeticions < 10 ** 6:
+        repeticions *= 2
+        mostres = temporitzador.repeat(repeat=5, number=repeticions)
+        millor = min(millor, min(mostres) / repeticions)
+    return millor
+
+
+def main():
+    p = argparse.ArgumentParser(description="Micro-benchmarks dels algorismes purs")
+    p.add_argument("--mides", default=",".join(str(m) for m in MIDES))
+    p.add_argument("--casos", help="noms separats per comes (per defecte tots)")
+    args = p.parse_args()
+
+    mides = [int(m) for m in args.mides.split(",")]
+    casos = args.casos.split(",") if args.casos else sorted(CASOS)
+
+    print(f"{'cas':26}" + "".join(f"{f'N={m}':>14}" for m in mides))
+    for nom in casos:
+        fila = f"{nom:26}"
+        for n in mides:
+            funcio, arguments = CASOS[nom](n)
+            segons = mesurar(funcio, arguments)
+            fila += f"{segons * 1e6:>11.1f} µs"
+        print(fila)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# ---------------------------------------------------------
+# 📇 FILES-DICCIONARI VS FILES TIPADES
+# ---------------------------------------------------------
+# Compara la fila-diccionari (magatzem.Fila, com DictCursor) amb les tuples
+# amb nom de registres.py: construcció, memòria, lectura des de SQLite i
+# classificació d'un grup.
+#
+# Amb pytest-benchmark:
+#   pytest benchmarks/bench_files.py --benchmark-only
+#
+# Sense pytest-benchmark (timeit + tracemalloc):
+#   python benchmarks/bench_files.py [--mides 1000,10000,100000]
+import argparse
+import os
+import sqlite3
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_algorismes import mesurar  # noqa: E402
+from classificacio import classificacio_grup  # noqa: E402
+from magatzem import Fila, _fabrica_files  # noqa: E402
+from registres import Partit  # noqa: E402
+
+MIDES = (1000, 10000, 100000)
+
+INDEX_PARTITS = {nom: i for i, nom in enumerate(Partit._fields)}
+
+
+def valors_partits(n):
+    return [
+        (i, f"Equip {i % 50}", f"Equip {(i + 1) % 50}", f"Equip {(i + 2) % 50}",
+         21, i % 20, 1, "09:00", i % 8 + 1)
+        for i in range(n)
+    ]
+
+
+def files_dict(valors):
+    return [Fila(INDEX_PARTITS, v) for v in valors]
+
+
+def files_tipades(valors):
+    return list(map(Partit._make, valors))
+
+
+def sqlite_partits(n):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE partits (id INTEGER, equip1 TEXT, equip2 TEXT, arbitre TEXT,
+                              punts1 INTEGER, punts2 INTEGER, jugat INTEGER,
+                              hora TEXT, pista INTEGER)
+    """)
+    conn.executemany("INSERT INTO partits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", valors_partits(n))
+    return conn
+
+
+def llegir_dict(conn):
+    conn.row_factory = _fabrica_files
+    return conn.execute("SELECT * FROM partits").fetchall()
+
+
+def llegir_tipades(conn):
+    conn.row_factory = None
+    return list(map(Partit._make, conn.execute("SELECT * FROM partits").fetchall()))
+
+
+def classificacio_dict(partits):
+    """Còpia de referència de la classificació anterior (estadístiques en dict)."""
+    stats = {}
+    for row in partits:
+        e1, e2, p1, p2, jugat = row[1], row[2], row[4], row[5], row[6]
+        s1 = stats.get(e1)
+        if s1 is None:
+            s1 = stats[e1] = {"punts": 0, "favor": 0, "contra": 0, "diferencia": 0, "pj": 0, "pg": 0, "pp": 0}
+        s2 = stats.get(e2)
+        if s2 is None:
+            s2 = stats[e2] = {"punts": 0, "favor": 0, "contra": 0, "diferencia": 0, "pj": 0, "pg": 0, "pp": 0}
+        if jugat != 1 or (p1 == 0 and p2 == 0):
+            continue
+        s1["pj"] += 1
+        s2["pj"] += 1
+        s1["favor"] += p1
+        s1["contra"] += p2
+        s2["favor"] += p2
+        s2["contra"] += p1
+        if p1 > p2:
+            s1["pg"] += 1
+            s2["pp"] += 1
+            s1["punts"] += 3
+        elif p2 > p1:
+            s2["pg"] += 1
+            s1["pp"] += 1
+            s2["punts"] += 3
+    for s in stats.values():
+        s["diferencia"] = s["favor"] - s["contra"]
+    return sorted(stats.items(), key=lambda x: (x[1]["punts"], x[1]["diferencia"], x[1]["favor"]),
+                  reverse=True)
+
+
+# ========================================================
+# 🧩 CASOS: cada un retorna (funció, arguments)
+# ========================================================
+def cas_construir_dict(n):
+    return files_dict, (valors_partits(n),)
+
+
+def cas_construir_tipades(n):
+    return files_tipades, (valors_partits(n),)
+
+
+def cas_sqlite_dict(n):
+    return llegir_dict, (sqlite_partits(n),)
+
+
+def cas_sqlite_tipades(n):
+    return llegir_tipades, (sqlite_partits(n),)
+
+
+def cas_classificacio_dict(n):
+    return classificacio_dict, (files_dict(valors_partits(n)),)
+
+
+def cas_classificacio_tipades(n):
+    return classificacio_grup, (files_tipades(valors_partits(n)),)
+
+
+CASOS = {
+    "construir_dict": cas_construir_dict,
+    "construir_tipades": cas_construir_tipades,
+    "sqlite_dict": cas_sqlite_dict,
+    "sqlite_tipades": cas_sqlite_tipades,
+    "classificacio_dict": cas_classificacio_dict,
+    "classificacio_tipades": cas_classificacio_tipades,
+}
+
+
+def memoria(constructor, valors):
+    """Bytes retinguts per les files construïdes (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        files = constructor(valors)
+        actual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del files
+    return actual
+
+
+# ========================================================
+# 🧪 PYTEST-BENCHMARK
+# ========================================================
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+if pytest is not None:
+    @pytest.mark.parametrize("n", MIDES)
+    @pytest.mark.parametrize("nom", sorted(CASOS))
+    def test_files(benchmark, nom, n):
+        benchmark.group = nom.rsplit("_", 1)[0]
+        funcio, args = CASOS[nom](n)
+        benchmark(funcio, *args)
+
+
+# ========================================================
+# ▶️ SENSE PYTEST (timeit)
+# ========================================================
+def main():
+    p = argparse.ArgumentParser(description="Files-diccionari vs files tipades")
+    p.add_argument("--mides", default=",".join(str(m) for m in MIDES))
+    args = p.parse_args()
+    mides = [int(m) for m in args.mides.split(",")]
+
+    print(f"{'cas':26}" + "".join(f"{f'N={m}':>14}" for m in mides))
+    for nom in CASOS:
+        fila = f"{nom:26}"
+        for n in mides:
+            funcio, arguments = CASOS[nom](n)
+            fila += f"{mesurar(funcio, arguments) * 1e3:>11.2f} ms"
+        print(fila)
+
+    print()
+    print(f"{'memòria (bytes/fila)':26}" + "".join(f"{f'N={m}':>14}" for m in mides))
+    for nom, constructor in (("dict", files_dict), ("tipades", files_tipades)):
+        fila = f"{nom:26}"
+        for n in mides:
+            valors = valors_partits(n)
+            fila += f"{memoria(constructor, valors) / n:>14.1f}"
+        print(fila)
+
+
+if __name__ == "__main__":
+    main()
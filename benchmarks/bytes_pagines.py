@@ -0,0 +1,69 @@
+# ---------------------------------------------------------
+# 📏 BYTES PER PÀGINA (sense compressió / gzip / brotli)
+# ---------------------------------------------------------
+# Ús:  python benchmarks/bytes_pagines.py http://localhost:5000 [cookie_admin]
+#
+# Demana cada pàgina amb i sense Accept-Encoding i suma també els
+# CSS/JS que enllaça (la primera visita els baixa; després surten de cache).
+import re
+import sys
+import urllib.request
+from urllib.parse import urljoin
+
+PAGINES = [
+    "/",
+    "/jugador/fase-grups",
+    "/jugador/fase-final",
+    "/jugador/fase-final/view/OR",
+    "/admin/confecciogrups",
+    "/admin/fasefinal/visualitzar/OR",
+]
+
+_RECURSOS = re.compile(r'(?:src|href)="([^"]+\.(?:js|css))"')
+
+
+def baixar(url, codificacio=None, cookie=None):
+    req = urllib.request.Request(url)
+    if codificacio:
+        req.add_header("Accept-Encoding", codificacio)
+    if cookie:
+        req.add_header("Cookie", cookie)
+    with urllib.request.urlopen(req) as resp:
+        return resp.read(), resp.headers.get("Content-Encoding")
+
+
+def mesurar(base, cami, cookie=None):
+    url = urljoin(base, cami)
+    html, _ = baixar(url, cookie=cookie)
+    recursos = [urljoin(url, r) for r in _RECURSOS.findall(html.decode("utf-8", "replace"))
+                if not r.startswith("http")]
+
+    fila = {}
+    for nom, enc in (("cru", None), ("gzip", "gzip"), ("br", "br")):
+        pagina, _ = baixar(url, enc, cookie)
+        extres = sum(len(baixar(r, enc, cookie)[0]) for r in recursos)
+        fila[nom] = (len(pagina), extres)
+    return fila
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__ or "Ús: bytes_pagines.py URL_BASE [cookie]")
+        sys.exit(1)
+    base = sys.argv[1]
+    cookie = sys.argv[2] if len(sys.argv) > 2 else None
+
+    print(f"{'pàgina':40} {'cru':>16} {'gzip':>16} {'br':>16}")
+    for cami in PAGINES:
+        try:
+            fila = mesurar(base, cami, cookie)
+        except Exception as e:
+            print(f"{cami:40} ⚠️ {e}")
+            continue
+        cel = ["{:>7}+{:<8}".format(*fila[k]) for k in ("cru", "gzip", "br")]
+        print(f"{cami:40} " + " ".join(cel))
+    print("(bytes HTML + bytes CSS/JS enllaçats)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+# ---------------------------------------------------------
+# 🏋️ GENERADOR DE CÀRREGA (tràfic de dia de torneig)
+# ---------------------------------------------------------
+# Ús:
+#   # Servidor ja engegat (millor amb METRIQUES=1 per comptar consultes):
+#   DATABASE_URL=... python benchmarks/carrega.py --url http://127.0.0.1:5000
+#
+#   # O bé engegar l'app dins del mateix procés:
+#   DATABASE_URL=... DB_SSLMODE=disable METRIQUES=1 \
+#       python benchmarks/carrega.py --servidor --clients 32 --durada 60
+#
+#   # Tot fora de línia (SQLite en memòria):
+#   DATABASE_URL=memory:// python benchmarks/carrega.py --servidor --sembrar 256
+#
+#   # Comparar dues execucions desades:
+#   python benchmarks/carrega.py --comparar resultats/A.json resultats/B.json
+#
+# Cada client virtual tria accions segons els pesos de --mescla: refrescar
+# la pàgina d'un grup, cercar equips lletra a lletra, consultar el quadre,
+# desar resultats (admin) i baixar PDFs. Per endpoint es mesura latència
+# (p50/p95/p99), rendiment i viatges a la BD (de la capçalera Server-Timing).
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIR_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultats")
+
+MESCLA = {
+    "pagina_grup": 40,
+    "fase_grups": 10,
+    "cerca": 20,
+    "quadre": 20,
+    "resultat": 8,
+    "pdf": 2,
+    # Opcional (--mescla ...,instantania=20): l'app sencera en una petició,
+    # després només els canvis des de l'última versió vista
+    "instantania": 0,
+    # Opcional: consulta del registre de canvis des de l'última revisió
+    "canvis": 0,
+}
+
+_CONSULTES = re.compile(r'db;dur=[\d.]+;desc="(\d+) consultes')
+
+
+# ========================================================
+# 📚 DADES DEL TORNEIG (per construir peticions realistes)
+# ========================================================
+def carregar_escenari():
+    from db import fetchall, obtenir_config_fases_finals
+
+    partits = fetchall("SELECT id, grup FROM partits")
+    noms = [r[0] for r in fetchall("SELECT nom_equip FROM equips WHERE nom_equip IS NOT NULL")]
+    grups = sorted({r[1] for r in partits})
+    if not grups:
+        raise SystemExit("❌ No hi ha partits: sembra primer amb benchmarks/sembrar.py")
+    return {
+        "grups": grups,
+        "partits": [(r[0], r[1]) for r in partits],
+        "noms": noms,
+        "fases": list(obtenir_config_fases_finals()) or ["OR"],
+    }
+
+
+# ========================================================
+# 🧍 CLIENT VIRTUAL
+# ========================================================
+class Estadistiques:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.mostres = {}  # endpoint -> [(latència s, consultes o None, ok)]
+
+    def afegir(self, endpoint, latencia, consultes, ok):
+        with self._lock:
+            self.mostres.setdefault(endpoint, []).append((latencia, consultes, ok))
+
+
+class Client(threading.Thread):
+    def __init__(self, idx, base, escenari, stats, mescla, fi, password):
+        super().__init__(daemon=True)
+        self.base = base.rstrip("/")
+        self.escenari = escenari
+        self.stats = stats
+        self.fi = fi
+        self.password = password
+        self.rnd = random.Random(idx)
+        self.accions = list(mescla)
+        self.pesos = [mescla[a] for a in self.accions]
+        self.sessio = requests.Session()
+        self.admin = False
+        self.versio = None
+        self.revisio = 0
+
+    def peticio(self, endpoint, metode, cami, **kwargs):
+        inici = time.perf_counter()
+        resp = None
+        try:
+            resp = self.sessio.request(metode, self.base + cami, timeout=30, **kwargs)
+            ok = resp.status_code < 400
+            m = _CONSULTES.search(resp.headers.get("Server-Timing", ""))
+            consultes = int(m.group(1)) if m else None
+        except requests.RequestException:
+            ok, consultes = False, None
+        self.stats.afegir(endpoint, time.perf_counter() - inici, consultes, ok)
+        return resp
+
+    def login_admin(self):
+        if not self.admin:
+            self.sessio.post(self.base + "/admin/login", data={"password": self.password},
+                             allow_redirects=False, timeout=30)
+            self.admin = True
+
+    def run(self):
+        e = self.escenari
+        while not self.fi.is_set():
+            accio = self.rnd.choices(self.accions, self.pesos)[0]
+
+            if accio == "pagina_grup":
+                self.peticio("GET /jugador/grup/<g>", "GET", f"/jugador/grup/{self.rnd.choice(e['grups'])}")
+
+            elif accio == "fase_grups":
+                self.peticio("GET /jugador/fase-grups", "GET", "/jugador/fase-grups")
+
+            elif accio == "cerca":
+                # Una petició per tecla, com fa el cercador
+                nom = self.rnd.choice(e["noms"]).lower()
+                for n in range(1, min(len(nom), 6) + 1):
+                    self.peticio("GET /jugador/api/buscar_equip_grups", "GET",
+                                 "/jugador/api/buscar_equip_grups", params={"q": nom[:n]})
+                    time.sleep(0.05)
+
+            elif accio == "quadre":
+                fase = self.rnd.choice(e["fases"])
+                self.peticio("GET /admin/fasefinal/api/quadre/<fase>", "GET", f"/admin/fasefinal/api/quadre/{fase}")
+
+            elif accio == "resultat":
+                self.login_admin()
+                pid, _ = self.rnd.choice(e["partits"])
+                p1, p2 = (21, self.rnd.randint(5, 19)) if self.rnd.random() < 0.5 else (self.rnd.randint(5, 19), 21)
+                self.peticio("POST /admin/fasegrups/api/resultats", "POST", "/admin/fasegrups/api/resultats",
+                             json={"resultats": [[pid, p1, p2]]})
+
+            elif accio == "pdf":
+                self.peticio("GET /admin/fasegrups/pdf/<g>", "GET",
+                             f"/admin/fasegrups/pdf/{self.rnd.choice(e['grups'])}")
+
+            elif accio == "instantania":
+                params = {"des_de": self.versio} if self.versio is not None else {}
+                resp = self.peticio("GET /api/instantania", "GET", "/api/instantania", params=params)
+                if resp is not None and resp.status_code == 200:
+                    self.versio = resp.json()["versio"]
+
+            elif accio == "canvis":
+                resp = self.peticio("GET /api/canvis", "GET", "/api/canvis",
+                                    params={"des_de": self.revisio})
+                if resp is not None and resp.status_code == 200:
+                    self.revisio = resp.json()["revisio"]
+
+            # Temps de "pensar" d'un usuari real
+            time.sleep(self.rnd.uniform(0.0, 0.2))
+
+
+# ========================================================
+# 📊 INFORME
+# ========================================================
+def percentil(valors, p):
+    if not valors:
+        return None
+    ordenats = sorted(valors)
+    k = (len(ordenats) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenats) - 1)
+    return ordenats[f] + (ordenats[c] - ordenats[f]) * (k - f)
+
+
+def resumir(stats, durada):
+    resum = {}
+    for endpoint, mostres in sorted(stats.mostres.items()):
+        lat = [m[0] * 1000 for m in mostres]
+        consultes = [m[1] for m in mostres if m[1] is not None]
+        resum[endpoint] = {
+            "peticions": len(mostres),
+            "errors": sum(1 for m in mostres if not m[2]),
+            "p50_ms": round(percentil(lat, 50), 2),
+            "p95_ms": round(percentil(lat, 95), 2),
+            "p99_ms": round(percentil(lat, 99), 2),
+            "req_s": round(len(mostres) / durada, 2),
+            "consultes_per_peticio": round(sum(consultes) / len(consultes), 2) if consultes else None,
+        }
+    return resum
+
+
+def imprimir(resum):
+    print(f"{'endpoint':42} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>7} {'BD/pet':>7}")
+    for endpoint, r in resum.items():
+        bd = "-" if r["consultes_per_peticio"] is None else f"{r['consultes_per_peticio']:.1f}"
+        print(f"{endpoint:42} {r['peticions']:>6} {r['errors']:>4} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['req_s']:>7.1f} {bd:>7}")
+
+
+def commit_actual():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        brut = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                              capture_output=True, text=True).stdout.strip()
+        return rev.stdout.strip() + ("-brut" if brut else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconegut"
+
+
+def desar(resum, params):
+    os.makedirs(DIR_RESULTATS, exist_ok=True)
+    commit = commit_actual()
+    nom = f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    cami = os.path.join(DIR_RESULTATS, nom)
+    with open(cami, "w", encoding="utf-8") as f:
+        json.dump({"commit": commit, "data": datetime.now().isoformat(timespec="seconds"),
+                   "parametres": params, "endpoints": resum}, f, ensure_ascii=False, indent=1)
+    print(f"💾 Resultats desats a {os.path.relpath(cami)}")
+
+
+def comparar(cami_a, cami_b):
+    with open(cami_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(cami_b, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"A = {a['commit']} ({a['data']})   B = {b['commit']} ({b['data']})")
+    print(f"{'endpoint':42} {'p95 A':>8} {'p95 B':>8} {'Δ':>7} {'req/s A':>8} {'req/s B':>8} {'BD A':>5} {'BD B':>5}")
+    for endpoint in sorted(set(a["endpoints"]) | set(b["endpoints"])):
+        ra, rb = a["endpoints"].get(endpoint), b["endpoints"].get(endpoint)
+        if not ra or not rb:
+            print(f"{endpoint:42} {'només a A' if ra else 'només a B'}")
+            continue
+        delta = (rb["p95_ms"] - ra["p95_ms"]) / ra["p95_ms"] * 100 if ra["p95_ms"] else 0
+        print(f"{endpoint:42} {ra['p95_ms']:>8.1f} {rb['p95_ms']:>8.1f} {delta:>+6.0f}% "
+              f"{ra['req_s']:>8.1f} {rb['req_s']:>8.1f} "
+              f"{ra['consultes_per_peticio'] or '-':>5} {rb['consultes_per_peticio'] or '-':>5}")
+
+
+# ========================================================
+# ▶️ EXECUCIÓ
+# ========================================================
+def engegar_servidor():
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    servidor = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+
+def llegir_mescla(text):
+    mescla = dict(MESCLA)
+    if text:
+        mescla = {}
+        for part in text.split(","):
+            nom, pes = part.split("=")
+            if nom not in MESCLA:
+                raise SystemExit(f"❌ Acció desconeguda: {nom} (possibles: {', '.join(MESCLA)})")
+            mescla[nom] = float(pes)
+    return {k: v for k, v in mescla.items() if v > 0}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Prova de càrrega de l'app del torneig")
+    p.add_argument("--url", default="http://127.0.0.1:5000")
+    p.add_argument("--servidor", action="store_true", help="engega l'app en aquest procés")
+    p.add_argument("--sembrar", type=int, metavar="EQUIPS", help="sembra abans un torneig sintètic")
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--durada", type=float, default=30, help="segons")
+    p.add_argument("--escalfament", type=float, default=3, help="segons que no es compten")
+    p.add_argument("--mescla", help="p.ex. pagina_grup=50,cerca=30,resultat=20")
+    p.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD", "CVPA1996"))
+    p.add_argument("--no-desar", action="store_true")
+    p.add_argument("--comparar", nargs=2, metavar=("A.json", "B.json"))
+    args = p.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    mescla = llegir_mescla(args.mescla)
+    if args.sembrar:
+        from sembrar import sembrar
+        sembrar(args.sembrar)
+    escenari = carregar_escenari()
+    base = args.url
+    servidor = None
+    if args.servidor:
+        servidor, base = engegar_servidor()
+
+    fi = threading.Event()
+    stats_escalfament = Estadistiques()
+    clients = [Client(i, base, escenari, stats_escalfament, mescla, fi, args.password)
+               for i in range(args.clients)]
+    for c in clients:
+        c.start()
+
+    time.sleep(args.escalfament)
+    stats = Estadistiques()
+    for c in clients:
+        c.stats = stats
+    inici = time.perf_counter()
+    time.sleep(args.durada)
+    fi.set()
+    durada = time.perf_counter() - inici
+    for c in clients:
+        c.join(timeout=35)
+
+    if servidor is not None:
+        servidor.shutdown()
+
+    resum = resumir(stats, durada)
+    total = sum(r["peticions"] for r in resum.values())
+    print(f"🏋️ {args.clients} clients, {durada:.0f} s, {total} peticions ({total / durada:.1f} req/s) contra {base}")
+    imprimir(resum)
+
+    if not args.no_desar:
+        desar(resum, {
+            "clients": args.clients, "durada": args.durada, "mescla": mescla,
+            "equips": len(escenari["noms"]), "grups": len(escenari["grups"]),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ---------------------------------------------------------
+# 🧪 FONT DE DADES EN MEMÒRIA (torneigs sintètics)
+# ---------------------------------------------------------
+# Genera equips i partits amb els mateixos tipus que retorna db.py
+# (registres.Equip, registres.Partit) per poder executar els algorismes
+# de classificacio.py sense base de dades.
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendari import patro_round_robin  # noqa: E402
+from classificacio import (  # noqa: E402
+    agrupar_equips,
+    classificacio_grup,
+    classificacio_unica,
+    repartir_serp,
+)
+from registres import Equip, Partit  # noqa: E402
+
+
+class FontMemoria:
+    """Mateixes lectures que db.py, però sobre llistes en memòria."""
+
+    def __init__(self, equips, partits_per_grup):
+        self.equips = equips
+        self.partits_per_grup = partits_per_grup
+
+    def obtenir_equips(self):
+        return self.equips
+
+    def obtenir_grups_guardats(self):
+        return agrupar_equips(self.equips)
+
+    def obtenir_partits(self, grup):
+        return self.partits_per_grup.get(grup, [])
+
+    def calcular_classificacio(self, grup):
+        return classificacio_grup(self.obtenir_partits(grup))
+
+    def classificacio_unica(self):
+        return classificacio_unica({g: self.calcular_classificacio(g) for g in self.partits_per_grup})
+
+
+def equips_sintetics(num_equips, llavor=1):
+    rnd = random.Random(llavor)
+    return [
+        Equip(
+            i, f"Jugador {i}A / Jugador {i}B", f"Equip {i:04d}", rnd.randint(1, 100),
+            f"equip{i}@exemple.cat", "600000000", None, None,
+        )
+        for i in range(1, num_equips + 1)
+    ]
+
+
+def torneig_sintetic(num_equips, mida_grup=5, jugats=0.7, llavor=1):
+    """FontMemoria amb els equips repartits en serp i resultats aleatoris."""
+    rnd = random.Random(llavor)
+    equips = equips_sintetics(num_equips, llavor)
+    num_grups = max(1, -(-num_equips // mida_grup))
+    grups, _ = repartir_serp(equips, num_grups)
+
+    partits_per_grup = {}
+    assignats = []
+    pid = 1
+    for g, llista in grups.items():
+        assignats.extend(e._replace(grup=g, ordre=ordre) for ordre, e in enumerate(llista, start=1))
+        noms = [e.nom_equip for e in llista]
+        files = []
+        for a, b, arb in patro_round_robin(len(noms)):
+            jugat = rnd.random() < jugats
+            p1, p2 = (21, rnd.randint(5, 19)) if rnd.random() < 0.5 else (rnd.randint(5, 19), 21)
+            files.append(Partit(
+                pid, noms[a], noms[b], noms[arb] if arb is not None else None,
+                p1 if jugat else 0, p2 if jugat else 0, 1 if jugat else 0, None, None,
+            ))
+            pid += 1
+        partits_per_grup[g] = files
+
+    assignats.sort(key=lambda e: e.id)
+    return FontMemoria(assignats, partits_per_grup)
@@ -0,0 +1,144 @@
+# ---------------------------------------------------------
+# 🔮 ESCENARIS CONTRA FORÇA BRUTA
+# ---------------------------------------------------------
+# Compara escenaris.py amb l'enumeració de tots els resultats dels
+# partits pendents (guanyador i marge) en grups petits aleatoris:
+#   - millor i pitjor posició de cada equip, exactes
+#   - cap resultat concret (classificacio_grup) cau fora d'aquests extrems
+#
+# Amb pytest:
+#   pytest benchmarks/prova_escenaris.py
+# Sense pytest:
+#   python benchmarks/prova_escenaris.py [--grups 30] [--llavor 1]
+import argparse
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classificacio import classificacio_grup  # noqa: E402
+from escenaris import GUANYAR, Escenaris  # noqa: E402
+from registres import Partit  # noqa: E402
+
+GRUPS = 30
+
+
+def grup_aleatori(rnd):
+    """3 a 5 equips a una volta, amb 1 a 3 partits pendents i marges petits."""
+    equips = [f"E{i}" for i in range(rnd.randint(3, 5))]
+    parelles = list(itertools.combinations(equips, 2))
+    pendents = set(rnd.sample(range(len(parelles)), rnd.randint(1, min(3, len(parelles)))))
+    partits = []
+    for pid, (a, b) in enumerate(parelles):
+        if pid in pendents:
+            partits.append(Partit(pid, a, b, None, 0, 0, 0, None, None))
+        else:
+            perdedor = rnd.randint(15, 20)
+            p1, p2 = (21, perdedor) if rnd.random() < 0.5 else (perdedor, 21)
+            partits.append(Partit(pid, a, b, None, p1, p2, 1, None, None))
+    return tuple(partits)
+
+
+def resultats_pendents(esc, marge_maxim):
+    """Tots els (punts, diferència) finals: guanyador i marge (1..marge_maxim) de cada pendent."""
+    opcions = [
+        [(guanya, perd, marge) for guanya, perd in ((a, b), (b, a)) for marge in range(1, marge_maxim + 1)]
+        for _, a, b in esc.pendents
+    ]
+    for tria in itertools.product(*opcions):
+        punts = list(esc.punts)
+        dif = [d for d, _ in esc.desempat]
+        for guanya, perd, marge in tria:
+            punts[guanya] += GUANYAR
+            dif[guanya] += marge
+            dif[perd] -= marge
+        yield punts, dif
+
+
+def forca_bruta(partits):
+    """{equip: (millor, pitjor)} enumerant marges fins a on ja no canvien l'ordre."""
+    esc = Escenaris(partits)
+    difs = [d for d, _ in esc.desempat]
+    marge_maxim = max(difs) - min(difs) + 2 * len(esc.pendents) + 2
+    n = len(esc.equips)
+    extrems = [[n, 1] for _ in range(n)]
+
+    for punts, dif in resultats_pendents(esc, marge_maxim):
+        for i in range(n):
+            davant = empats = 0
+            for j in range(n):
+                if j == i or punts[j] < punts[i]:
+                    continue
+                if punts[j] > punts[i] or dif[j] > dif[i]:
+                    davant += 1
+                elif dif[j] == dif[i]:
+                    # Igualats: amb algun partit pendent, els punts a favor són oberts
+                    if i in esc.oberts or j in esc.oberts:
+                        empats += 1
+                    elif esc.desempat[j][1] > esc.desempat[i][1]:
+                        davant += 1
+                    elif esc.desempat[j][1] == esc.desempat[i][1]:
+                        empats += 1
+            extrems[i][0] = min(extrems[i][0], davant + 1)
+            extrems[i][1] = max(extrems[i][1], davant + empats + 1)
+    return {esc.equips[i]: tuple(e) for i, e in enumerate(extrems)}
+
+
+def posicions_reals(partits, marges=(1, 2, 7, 20), perdedors=(0, 19)):
+    """(equip, millor, pitjor) amb classificacio_grup en resultats concrets dels pendents."""
+    pendents = [row for row in partits if row[6] != 1]
+    resultats = [(p + m, p) for m in marges for p in perdedors]
+    opcions = [resultats + [(p, g) for g, p in resultats] for _ in pendents]
+    for tria in itertools.product(*opcions):
+        finals = {row[0]: row for row in partits}
+        for row, (p1, p2) in zip(pendents, tria):
+            finals[row[0]] = row._replace(punts1=p1, punts2=p2, jugat=1)
+        classificacio = classificacio_grup(list(finals.values()))
+        claus = [(s.punts, s.diferencia, s.favor) for _, s in classificacio]
+        for equip, s in classificacio:
+            clau = (s.punts, s.diferencia, s.favor)
+            davant = sum(1 for c in claus if c > clau)
+            yield equip, davant + 1, davant + claus.count(clau)
+
+
+def comprovar(partits):
+    esc = Escenaris(partits)
+    esperat = forca_bruta(partits)
+    calculat = {equip: esc.extrems(i) for i, equip in enumerate(esc.equips)}
+    assert calculat == esperat, (partits, calculat, esperat)
+    for equip, millor, pitjor in posicions_reals(partits):
+        assert calculat[equip][0] <= millor and pitjor <= calculat[equip][1], (partits, equip, millor, pitjor)
+
+
+def test_empat_entre_tres_amb_un_partit_pendent():
+    # E2 ha guanyat E0 25-15, E0 ha guanyat E1 25-23 i falta E1-E2: si
+    # guanya E1, tots tres a 3 punts però E1 suma marge i E0 es queda a -8
+    partits = (
+        Partit(1, "E2", "E0", None, 25, 15, 1, None, None),
+        Partit(2, "E0", "E1", None, 25, 23, 1, None, None),
+        Partit(3, "E1", "E2", None, 0, 0, 0, None, None),
+    )
+    esc = Escenaris(partits)
+    assert esc.extrems(esc.equips.index("E0")) == (2, 3)
+    comprovar(partits)
+
+
+def test_grups_aleatoris_com_forca_bruta():
+    rnd = random.Random(1)
+    for _ in range(GRUPS):
+        comprovar(grup_aleatori(rnd))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escenaris contra força bruta")
+    parser.add_argument("--grups", type=int, default=GRUPS)
+    parser.add_argument("--llavor", type=int, default=1)
+    args = parser.parse_args()
+
+    test_empat_entre_tres_amb_un_partit_pendent()
+    rnd = random.Random(args.llavor)
+    for _ in range(args.grups):
+        comprovar(grup_aleatori(rnd))
+    print(f"✅ {args.grups} grups: escenaris.py coincideix amb la força bruta")
@@ -0,0 +1,126 @@
+# ---------------------------------------------------------
+# 🌱 SEMBRAR UN TORNEIG SINTÈTIC (Postgres local)
+# ---------------------------------------------------------
+# Ús:
+#   DATABASE_URL=postgresql://localhost/cvpa_bench DB_SSLMODE=disable \
+#       python benchmarks/sembrar.py --equips 256 [--mida-grup 5] [--jugats 0.6]
+#
+# ⚠️ Esborra totes les dades del torneig de la base de dades indicada.
+# Crea equips, grups en serp per valor, pistes, calendari amb horaris,
+# resultats aleatoris per a una part dels partits i la fase final.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FASES = ("OR", "PLATA", "BRONZE", "SHOW")
+
+
+def sembrar(num_equips, mida_grup=5, jugats=0.6, llavor=1):
+    from app import create_app
+    from db import (
+        actualitzar_resultats,
+        calcular_classificacio,
+        desar_classificacio_final,
+        execute_values,
+        generar_fase_final_equips,
+        generar_partits_grups,
+        get_conn,
+        marcar_canvi,
+        planificar_partits,
+        reset_competicio,
+    )
+
+    create_app()  # crea taules i migracions
+    rnd = random.Random(llavor)
+    t0 = time.perf_counter()
+
+    reset_competicio()
+    num_grups = max(1, -(-num_equips // mida_grup))
+
+    # Equips ordenats per valor i repartits en serp
+    valors = sorted((rnd.randint(1, 100) for _ in range(num_equips)), reverse=True)
+    files = []
+    for i, valor in enumerate(valors):
+        volta, pos = divmod(i, num_grups)
+        grup = pos + 1 if volta % 2 == 0 else num_grups - pos
+        files.append((
+            f"Jugador {i + 1}A / Jugador {i + 1}B", f"Equip {i + 1:04d}", valor,
+            f"equip{i + 1}@exemple.cat", "600000000", grup, volta + 1,
+        ))
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM equips")
+    execute_values(cur, """
+        INSERT INTO equips (nom_participants, nom_equip, valor, email, telefon, grup, ordre)
+        VALUES %s
+    """, files)
+    num_pistes = max(1, num_grups // 2)
+    execute_values(cur, "INSERT INTO pistes_grup (grup, pista) VALUES %s", [
+        (g, (g - 1) % num_pistes + 1) for g in range(1, num_grups + 1)
+    ])
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
+
+    grups = list(range(1, num_grups + 1))
+    total_partits = sum(generar_partits_grups(grups).values())
+    planificar_partits("09:00", 20, num_pistes)
+
+    # Resultats aleatoris per a una fracció dels partits
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM partits ORDER BY torn, pista")
+    ids = [r[0] for r in cur.fetchall()]
+    conn.close()
+    resultats = []
+    for pid in ids[:int(len(ids) * jugats)]:
+        guanyador, perdedor = 21, rnd.randint(5, 19)
+        resultats.append((pid, guanyador, perdedor) if rnd.random() < 0.5 else (pid, perdedor, guanyador))
+    actualitzar_resultats(resultats)
+
+    # Classificació final: per posició de grup, després per punts i diferència
+    classificats = []
+    for g in grups:
+        for pos, (equip, st) in enumerate(calcular_classificacio(g), start=1):
+            classificats.append((pos, -st.punts, -st.diferencia, equip, st.punts, st.diferencia, g))
+    classificats.sort()
+
+    mida_fase = 1
+    while mida_fase * 2 * len(FASES) <= len(classificats):
+        mida_fase *= 2
+
+    conn = get_conn()
+    cur = conn.cursor()
+    desar_classificacio_final(cur, [(c[3], c[4], c[5], c[0], c[6]) for c in classificats])
+    execute_values(cur, "INSERT INTO config_fases_finals (fase, num_equips) VALUES %s",
+                   [(f, mida_fase) for f in FASES])
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
+    generar_fase_final_equips()
+
+    print(f"🌱 {num_equips} equips, {num_grups} grups, {total_partits} partits "
+          f"({len(resultats)} amb resultat), fases de {mida_fase} equips "
+          f"— {time.perf_counter() - t0:.1f} s")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Sembra un torneig sintètic a DATABASE_URL")
+    p.add_argument("--equips", type=int, default=256, help="nombre d'equips (32–2000)")
+    p.add_argument("--mida-grup", type=int, default=5)
+    p.add_argument("--jugats", type=float, default=0.6, help="fracció de partits amb resultat")
+    p.add_argument("--llavor", type=int, default=1)
+    args = p.parse_args()
+
+    if not 2 <= args.equips <= 5000:
+        p.error("--equips ha d'estar entre 2 i 5000")
+    sembrar(args.equips, args.mida_grup, args.jugats, args.llavor)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+from functools import lru_cache
+
+# --------------------------------------------------------
+# 🗓 CALENDARI DE PARTITS (ROUND-ROBIN)
+# --------------------------------------------------------
+# Cada partit és una tupla (equip1, equip2, arbitre) amb els índexs
+# dels equips dins del grup (ordre 0..N-1).
+
+# Patrons fets a mà que ja s'han fet servir en torneigs anteriors.
+# Es mantenen tal qual perquè els calendaris impresos no canviïn.
+PATRONS_FIXOS = {
+    4: ((1, 3, 2), (0, 2, 3), (1, 2, 0), (0, 3, 2), (2, 3, 1), (0, 1, 3)),
+    5: ((1, 3, 2), (2, 0, 4), (4, 1, 3), (2, 3, 0), (0, 4, 1), (2, 1, 3),
+        (3, 4, 0), (1, 0, 4), (2, 4, 1), (3, 0, 2)),
+    6: ((3, 2, 1), (0, 5, 4), (1, 4, 2), (2, 0, 3), (3, 4, 5), (1, 5, 4),
+        (2, 4, 3), (3, 5, 1), (0, 1, 2), (2, 5, 0), (4, 0, 1), (1, 3, 4),
+        (5, 4, 0), (3, 0, 5), (1, 2, 3)),
+}
+
+
+def _rondes_cercle(n):
+    """
+    Mètode del cercle: retorna la llista de rondes, cada ronda és
+    (parelles, equip_que_descansa). Amb N senar s'afegeix un "descans".
+    """
+    equips = list(range(n))
+    if n % 2:
+        equips.append(None)
+    total = len(equips)
+
+    rondes = []
+    for r in range(total - 1):
+        parelles = []
+        descansa = None
+        for i in range(total // 2):
+            a = equips[i]
+            b = equips[total - 1 - i]
+            if a is None or b is None:
+                descansa = b if a is None else a
+                continue
+            # Alternem local/visitant del pivot perquè no sigui sempre equip1
+            if i == 0 and r % 2:
+                a, b = b, a
+            parelles.append((a, b))
+        rondes.append((parelles, descansa))
+
+        # Rotació: el primer queda fix, la resta gira una posició
+        equips = [equips[0], equips[-1]] + equips[1:-1]
+
+    return rondes
+
+
+def _assignar_arbitres(n, partits, rondes_descans):
+    """
+    Tria l'àrbitre de cada partit entre els equips que no hi juguen:
+    equilibra el nombre d'arbitratges, evita equips que juguen el partit
+    anterior o següent (una sola pista per grup) i, a igualtat, prefereix
+    l'equip que descansa a la ronda.
+    """
+    arbitratges = [0] * n
+    resultat = []
+
+    for idx, (a, b) in enumerate(partits):
+        anterior = partits[idx - 1] if idx > 0 else ()
+        seguent = partits[idx + 1] if idx + 1 < len(partits) else ()
+        arbitre_anterior = resultat[-1][2] if resultat else None
+        descansa = rondes_descans[idx]
+
+        candidats = [e for e in range(n) if e not in (a, b)]
+        minim = min(arbitratges)
+
+        def cost(e):
+            return (
+                # Com a molt dos arbitratges per sobre de l'equip que menys n'ha fet
+                max(0, arbitratges[e] - minim - 1),
+                e in anterior or e in seguent or e == arbitre_anterior,
+                arbitratges[e],
+                e != descansa,
+                e,
+            )
+
+        arbitre = min(candidats, key=cost)
+        arbitratges[arbitre] += 1
+        resultat.append((a, b, arbitre))
+
+    return resultat
+
+
+@lru_cache(maxsize=None)
+def patro_round_robin(n, doble=False):
+    """
+    Retorna el patró de partits (equip1, equip2, arbitre) per a un grup
+    de N equips. Amb doble=True es juga anada i tornada.
+    El resultat queda en memòria cau per a cada (N, doble).
+    """
+    if n < 2:
+        return ()
+    if n == 2:
+        # Amb 2 equips no hi ha ningú que pugui arbitrar
+        anada = ((0, 1, None),)
+    elif n in PATRONS_FIXOS:
+        anada = PATRONS_FIXOS[n]
+    else:
+        partits = []
+        descansos = []
+        for parelles, descansa in _rondes_cercle(n):
+            partits.extend(parelles)
+            descansos.extend([descansa] * len(parelles))
+        anada = tuple(_assignar_arbitres(n, partits, descansos))
+
+    patro = anada
+    if doble:
+        patro = anada + tuple((b, a, c) for a, b, c in anada)
+    assert len(patro) == n * (n - 1) // 2 * (2 if doble else 1), (n, doble, len(patro))
+    return patro
+
+
+def precalcular_patrons(max_equips=12, doble=False):
+    """Omple la memòria cau de patrons fins a max_equips equips per grup."""
+    for n in range(2, max_equips + 1):
+        patro_round_robin(n, doble)
+
+
+# Els grups habituals (fins a 12 equips) queden calculats en carregar el mòdul
+precalcular_patrons()
+precalcular_patrons(doble=True)
+
+
+# --------------------------------------------------------
+# ⏱ HORARIS I PISTES (TOTS ELS GRUPS)
+# --------------------------------------------------------
+def planificar_horaris(partits, pistes, pistes_grup=None, descans=1):
+    """
+    Assigna torn (franja horària) i pista a tots els partits.
+
+    partits: llista de (id, grup, equip1, equip2, arbitre) en l'ordre del
+             calendari de cada grup.
+    pistes: llista de números de pista disponibles.
+    pistes_grup: {grup: pista} fixada a la confecció de grups (opcional).
+    descans: torns mínims entre dues participacions (jugar o arbitrar)
+             d'un mateix equip; 1 vol dir "mai dos torns seguits".
+
+    Voraç per torns amb reparació: a cada torn i pista s'agafa el grup amb
+    més partits pendents i el primer partit que respecta el descans; si
+    només falla l'àrbitre, se'n busca un altre del mateix grup.
+    Retorna {id: (torn, pista, arbitre)}.
+    """
+    pistes = list(pistes)
+    if not pistes:
+        raise ValueError("Cal com a mínim una pista")
+    pistes_grup = {g: p for g, p in (pistes_grup or {}).items() if p in pistes}
+
+    pendents = {}
+    equips_grup = {}
+    for pid, grup, e1, e2, arb in partits:
+        pendents.setdefault(grup, []).append([pid, e1, e2, arb])
+        noms = equips_grup.setdefault(grup, [])
+        for e in (e1, e2, arb):
+            if e is not None and e not in noms:
+                noms.append(e)
+
+    ultim = {}        # (grup, equip) -> últim torn ocupat
+    arbitratges = {}  # (grup, equip) -> arbitratges fets
+    resultat = {}
+    restants = len(partits)
+    torn = 0
+    # Cota de seguretat: cada partit pot esperar com a molt descans+1 torns
+    max_torns = (restants + 1) * (descans + 2)
+
+    def lliure(grup, equip, ocupats):
+        if equip is None:
+            return True
+        clau = (grup, equip)
+        if clau in ocupats:
+            return False
+        return torn - ultim.get(clau, -descans - 1) > descans
+
+    while restants and torn < max_torns:
+        ocupats = set()
+        for pista in pistes:
+            grups = [
+                g for g, llista in pendents.items()
+                if llista and pistes_grup.get(g, pista) == pista
+            ]
+            # Primer els grups fixats a aquesta pista, després els que tenen més feina
+            grups.sort(key=lambda g: (g not in pistes_grup, -len(pendents[g]), g))
+
+            triat = None
+            for g in grups:
+                for idx, (pid, e1, e2, arb) in enumerate(pendents[g]):
+                    if not (lliure(g, e1, ocupats) and lliure(g, e2, ocupats)):
+                        continue
+                    if arb is not None and not lliure(g, arb, ocupats):
+                        # Reparació: un altre àrbitre del grup que estigui lliure
+                        alternatives = [
+                            e for e in equips_grup[g]
+                            if e not in (e1, e2) and lliure(g, e, ocupats)
+                        ]
+                        if not alternatives:
+                            continue
+                        arb = min(alternatives, key=lambda e: arbitratges.get((g, e), 0))
+                    triat = (g, idx, pid, e1, e2, arb)
+                    break
+                if triat:
+                    break
+
+            if not triat:
+                continue
+
+            g, idx, pid, e1, e2, arb = triat
+            del pendents[g][idx]
+            for e in (e1, e2, arb):
+                if e is not None:
+                    ocupats.add((g, e))
+                    ultim[(g, e)] = torn
+            if arb is not None:
+                arbitratges[(g, arb)] = arbitratges.get((g, arb), 0) + 1
+            resultat[pid] = (torn, pista, arb)
+            restants -= 1
+
+        torn += 1
+
+    return resultat
+
+
+def hora_torn(hora_inici, durada, torn):
+    """Hora "HH:MM" del torn a partir de l'hora d'inici i la durada (minuts)."""
+    hores, minuts = (int(x) for x in hora_inici.split(":"))
+    total = hores * 60 + minuts + torn * durada
+    return f"{(total // 60) % 24:02d}:{total % 60:02d}"
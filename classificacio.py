@@ -0,0 +1,212 @@
+from collections import defaultdict
+from operator import attrgetter
+
+from registres import Classificat, Estadistiques
+
+# --------------------------------------------------------
+# 🧮 ALGORISMES PURS DEL TORNEIG
+# --------------------------------------------------------
+# Funcions sense accés a la base de dades: reben files ja llegides
+# (les files tipades de registres.py) i retornen estructures noves.
+# Així es poden provar i mesurar amb dades en memòria.
+
+
+# --------------------------------------------------------
+# 🔹 CLASSIFICACIÓ D'UN GRUP
+# --------------------------------------------------------
+clau_classificacio = attrgetter("punts", "diferencia", "favor")
+
+
+def classificacio_grup(partits):
+    """
+    partits: files com les d'obtenir_partits (equip1=[1], equip2=[2],
+    punts1=[4], punts2=[5], jugat=[6]). Retorna [(equip, Estadistiques), ...]
+    ordenat per punts, diferència i punts a favor.
+    """
+    stats = {}
+
+    for row in partits:
+        e1 = row[1]
+        e2 = row[2]
+        p1 = row[4]
+        p2 = row[5]
+        jugat = row[6]
+
+        s1 = stats.get(e1)
+        if s1 is None:
+            s1 = stats[e1] = Estadistiques()
+        s2 = stats.get(e2)
+        if s2 is None:
+            s2 = stats[e2] = Estadistiques()
+
+        # Si el partit no s’ha jugat, o és 0-0, no el comptem
+        if jugat != 1 or (p1 == 0 and p2 == 0):
+            continue
+
+        s1.pj += 1
+        s2.pj += 1
+
+        s1.favor += p1
+        s1.contra += p2
+
+        s2.favor += p2
+        s2.contra += p1
+
+        # Partit guanyat / perdut
+        if p1 > p2:
+            s1.pg += 1
+            s2.pp += 1
+            s1.punts += 3
+        elif p2 > p1:
+            s2.pg += 1
+            s1.pp += 1
+            s2.punts += 3
+
+    # Diferència
+    for s in stats.values():
+        s.diferencia = s.favor - s.contra
+
+    return sorted(stats.items(), key=lambda x: clau_classificacio(x[1]), reverse=True)
+
+
+# --------------------------------------------------------
+# 🔹 CLASSIFICACIÓ ÚNICA (ENTRADA A LA FASE FINAL)
+# --------------------------------------------------------
+def classificacio_unica(classificacions, max_posicio=8):
+    """
+    classificacions: {grup: [(equip, stats), ...]} ja ordenades.
+    Primer tots els primers de grup (ordenats entre ells), després els
+    segons, etc., fins a max_posicio. Retorna una llista de Classificat.
+    """
+    grups = sorted(classificacions)
+    classificacio = []
+
+    for pos in range(1, max_posicio + 1):
+        candidats = []
+
+        for g in grups:
+            class_grup = classificacions[g]
+            if pos <= len(class_grup):
+                eq, stats = class_grup[pos - 1]
+                candidats.append(Classificat(
+                    eq, stats.punts, stats.diferencia, stats.favor, stats.contra, pos, g
+                ))
+
+        candidats.sort(key=_clau_candidat, reverse=True)
+        classificacio.extend(candidats)
+
+    return classificacio
+
+
+_clau_candidat = attrgetter("punts", "dif", "pf")
+
+
+# --------------------------------------------------------
+# 🔹 GRUPS
+# --------------------------------------------------------
+def agrupar_equips(equips):
+    """Agrupa files Equip (amb grup i ordre) en {grup: [equips per ordre]}."""
+    grups = {}
+    for e in equips:
+        grup = e.grup
+        if grup is None:
+            continue
+        grups.setdefault(grup, []).append(e)
+    for g in grups:
+        grups[g] = sorted(grups[g], key=lambda x: x.ordre or 0)
+    return grups
+
+
+def capacitats_suggerides(total_equips, num_grups):
+    if num_grups <= 0:
+        return []
+    base = total_equips // num_grups
+    extra = total_equips % num_grups
+    return [base + (1 if i < extra else 0) for i in range(num_grups)]
+
+
+def repartir_serp(equips, num_grups, capacitats=None):
+    """
+    Sorteig en serp per valor (columna [3]). Si les capacitats manuals
+    sumen el total d'equips es respecten; si no, es fan servir les
+    suggerides. Retorna ({grup: [equips]}, manual).
+    """
+    equips_ordenats = sorted(equips, key=lambda e: e[3])
+    grups = {i + 1: [] for i in range(num_grups)}
+    total_equips = len(equips)
+    capacitats = list(capacitats or [])
+
+    idx = 0
+    direccio = 1
+
+    if sum(capacitats) == total_equips and total_equips > 0:
+        # Mode manual (respectant capacitats)
+        nivells = defaultdict(list)
+        for e in equips_ordenats:
+            nivells[e[3]].append(e)
+
+        for valor in sorted(nivells.keys()):
+            for equip in nivells[valor]:
+                assignat = False
+                intents = 0
+                while not assignat and intents < num_grups:
+                    if capacitats[idx] > 0:
+                        grups[idx + 1].append(equip)
+                        capacitats[idx] -= 1
+                        assignat = True
+                    else:
+                        idx += direccio
+                        if idx >= num_grups:
+                            direccio = -1
+                            idx = num_grups - 1
+                        elif idx < 0:
+                            direccio = 1
+                            idx = 0
+                    intents += 1
+                idx += direccio
+                if idx >= num_grups:
+                    direccio = -1
+                    idx = num_grups - 1
+                elif idx < 0:
+                    direccio = 1
+                    idx = 0
+        return grups, True
+
+    # Mode automàtic si no quadra
+    capacitats = capacitats_suggerides(total_equips, num_grups)
+    for equip in equips_ordenats:
+        buscats = 0
+        while capacitats[idx] == 0 and buscats < num_grups:
+            idx = (idx + direccio) % num_grups
+            buscats += 1
+        if capacitats[idx] == 0:
+            break
+        grups[idx + 1].append(equip)
+        capacitats[idx] -= 1
+        if direccio == 1:
+            idx += 1
+            if idx >= num_grups:
+                direccio = -1
+                idx = num_grups - 1
+        else:
+            idx -= 1
+            if idx < 0:
+                direccio = 1
+                idx = 0
+    return grups, False
+
+
+# --------------------------------------------------------
+# 🔹 FASES FINALS
+# --------------------------------------------------------
+def equips_per_fase(fases, classificats):
+    """
+    fases: [(fase, num_equips), ...] en ordre; classificats: llista
+    ordenada per posició. Retorna {fase: tros de classificats}.
+    """
+    resultat = {}
+    pos = 0
+    for fase, n in fases:
+        resultat[fase] = classificats[pos:pos + n]
+        pos += n
+    return resultat
@@ -1,28 +1,295 @@
 import os
-import psycopg2
-from psycopg2.extras import DictCursor
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from calendari import patro_round_robin, planificar_horaris, hora_torn
+from classificacio import agrupar_equips, classificacio_grup, equips_per_fase
+from magatzem import crear_backend, cursor_tuples, validar_slug
+from registres import ClassificatFinal, Equip, FaseEquip, Partit, PartitArbitre
+import metriques
 
 # --------------------------------------------------------
 # 🔧 CONFIGURACIÓ
 # --------------------------------------------------------
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
+# Per defecte "require", o "prefer" si el servidor és local
+DB_SSLMODE = os.environ.get("DB_SSLMODE")
 
 if not DATABASE_URL:
-    raise RuntimeError("❌ ERROR: No s'ha trobat DATABASE_URL a l'entorn!")
+    raise RuntimeError("❌ ERROR: No s'ha trobat DATABASE_URL a l'entorn! (proves: DATABASE_URL=memory://)")
 
-print("📌 Base de dades utilitzada: PostgreSQL (Neon)")
+# Postgres (producció), SQLite en fitxer o SQLite en memòria (proves)
+BACKEND = crear_backend(DATABASE_URL, DB_SSLMODE)
+
+if getattr(BACKEND, "memoria", False):
+    print("⚠️ Dades en memòria (es perden en aturar)")
+print(f"📌 Base de dades utilitzada: {BACKEND.descripcio()}")
+
+# Inserció/actualització de moltes files amb un sol VALUES (segons el backend)
+execute_values = BACKEND.execute_values
+
+# Rèplica de només lectura per al trànsit públic (opcional)
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+# Retard màxim acceptat (segons); si el supera es llegeix de la primària
+REPLICA_RETARD_MAX = float(os.environ.get("REPLICA_RETARD_MAX", "5"))
+REPLICA = crear_backend(DATABASE_REPLICA_URL, DB_SSLMODE) if DATABASE_REPLICA_URL else None
+
+# Temps màxim (segons) de connexió i de cada consulta a les lectures
+# públiques; si se supera es serveix l'última còpia bona (app/degradacio.py)
+DB_LATENCIA_MAX = float(os.environ.get("DB_LATENCIA_MAX", "3"))
+# Interruptor: amb DB_INTERRUPTOR_ERRORS errors en DB_INTERRUPTOR_FINESTRA
+# segons, no es torna a connectar fins passats DB_INTERRUPTOR_PAUSA segons
+DB_INTERRUPTOR_ERRORS = int(os.environ.get("DB_INTERRUPTOR_ERRORS", "3"))
+DB_INTERRUPTOR_FINESTRA = float(os.environ.get("DB_INTERRUPTOR_FINESTRA", "10"))
+DB_INTERRUPTOR_PAUSA = float(os.environ.get("DB_INTERRUPTOR_PAUSA", "15"))
+
+if REPLICA is not None:
+    print(f"📖 Rèplica de lectura: {REPLICA.descripcio()} (retard màxim {REPLICA_RETARD_MAX:g} s)")
 
 
 # --------------------------------------------------------
-# 🔌 CONNEXIÓ A POSTGRES
+# 🏐 TORNEIG ACTUAL (multi-torneig)
+# --------------------------------------------------------
+# Cada petició fixa el seu torneig (app/torneigs.py) i get_conn() obre la
+# connexió a l'espai de taules d'aquest torneig. None és el torneig
+# original de la instal·lació (TOURNAMENT_SLUG).
+_torneig = contextvars.ContextVar("torneig", default=None)
+
+
+def torneig_actual():
+    return _torneig.get()
+
+
+def usar_torneig(torneig):
+    _torneig.set(torneig)
+
+
+@contextmanager
+def en_torneig(torneig):
+    """Executa un bloc sobre les taules d'un altre torneig (fils, scripts)."""
+    token = _torneig.set(torneig)
+    try:
+        yield
+    finally:
+        _torneig.reset(token)
+
+
+# --------------------------------------------------------
+# 📖 RÈPLICA DE LECTURA
+# --------------------------------------------------------
+# Les vistes públiques (jugadors) marquen la petició amb permetre_replica()
+# i get_conn() els dona una connexió a la rèplica si està disponible i no
+# va endarrerida. Les sessions d'admin no la fan servir mai: així sempre
+# veuen el que acaben d'escriure.
+_replica = contextvars.ContextVar("replica", default=False)
+
+
+def permetre_replica(permesa=True):
+    _replica.set(permesa)
+
+
+@contextmanager
+def llegint_de_replica(permesa=True):
+    token = _replica.set(permesa)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class EstatReplica:
+    """
+    Disponibilitat de la rèplica, comprovada com a molt cada `interval`
+    segons. Si no respon, o el retard supera REPLICA_RETARD_MAX, tot va a
+    la primària fins a la comprovació següent.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.disponible = False
+        self.retard = None
+        self._comprovat = None
+        self._comprovant = False
+
+    def usable(self):
+        ara = time.monotonic()
+        if self._comprovat is None or ara - self._comprovat > self.interval:
+            # Un sol fil comprova; la resta fa servir l'estat anterior
+            if not self._comprovant:
+                self._comprovant = True
+                try:
+                    self._comprovar()
+                finally:
+                    self._comprovat = time.monotonic()
+                    self._comprovant = False
+        return self.disponible
+
+    def _comprovar(self):
+        try:
+            conn = REPLICA.connectar()
+            try:
+                self.retard = REPLICA.retard_replica(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            self.marcar_error(e)
+            return
+        disponible = self.retard is not None and self.retard <= REPLICA_RETARD_MAX
+        if disponible != self.disponible:
+            print(f"📖 Rèplica {'disponible' if disponible else 'endarrerida'} (retard {self.retard})")
+        self.disponible = disponible
+
+    def marcar_error(self, e):
+        if self.disponible or self._comprovat is None:
+            print("⚠️ Rèplica no disponible, llegint de la primària:", e)
+        self.disponible = False
+        self.retard = None
+        self._comprovat = time.monotonic()
+
+
+estat_replica = EstatReplica()
+
+
+# --------------------------------------------------------
+# 🔌 INTERRUPTOR (circuit breaker de la primària)
+# --------------------------------------------------------
+class BaseDadesNoDisponible(Exception):
+    """L'interruptor és obert: no s'intenta connectar."""
+
+    def __init__(self, reintentar):
+        super().__init__(f"Base de dades no disponible (es tornarà a provar en {reintentar:.0f} s)")
+        self.reintentar = reintentar
+
+
+class Interruptor:
+    """
+    Si la base de dades falla o va massa lenta (`errors` errors en
+    `finestra` segons), s'obre: durant `pausa` segons get_conn() falla de
+    seguida en lloc d'afegir-hi més connexions. Després deixa passar una
+    sola connexió de prova; si va bé es tanca, si no, torna a obrir-se.
+    """
+
+    def __init__(self, errors=3, finestra=10.0, pausa=15.0):
+        self.errors = errors
+        self.finestra = finestra
+        self.pausa = pausa
+        self._errors = []
+        self._obert_fins = None
+        self._provant = False
+        self._ultim = None  # la mateixa excepció pot arribar de get_conn i de la vista
+        self._lock = threading.Lock()
+
+    @property
+    def obert(self):
+        return self._obert_fins is not None
+
+    def permetre(self):
+        """None si es pot connectar; si no, segons fins a la propera prova."""
+        if self._obert_fins is None:
+            return None
+        with self._lock:
+            if self._obert_fins is None:
+                return None
+            resta = self._obert_fins - time.monotonic()
+            if resta > 0 or self._provant:
+                return max(resta, 1.0)
+            self._provant = True
+            return None
+
+    def exit(self):
+        if self._obert_fins is None and not self._provant:
+            return
+        with self._lock:
+            if self._obert_fins is not None:
+                print("✅ Base de dades recuperada: interruptor tancat")
+            self._obert_fins = None
+            self._provant = False
+            self._errors.clear()
+
+    def error(self, e):
+        ara = time.monotonic()
+        with self._lock:
+            if e is self._ultim:
+                return
+            self._ultim = e
+            self._errors = [t for t in self._errors if ara - t < self.finestra] + [ara]
+            if self._provant or len(self._errors) >= self.errors:
+                if self._obert_fins is None:
+                    print(f"🔌 Base de dades amb errors, interruptor obert {self.pausa:g} s:", e)
+                self._obert_fins = ara + self.pausa
+                self._provant = False
+
+    def estat(self):
+        with self._lock:
+            ara = time.monotonic()
+            return {
+                "obert": self._obert_fins is not None,
+                "errors_recents": len([t for t in self._errors if ara - t < self.finestra]),
+                "reintentar": round(max(self._obert_fins - ara, 0), 1) if self._obert_fins else None,
+            }
+
+
+interruptor = Interruptor(DB_INTERRUPTOR_ERRORS, DB_INTERRUPTOR_FINESTRA, DB_INTERRUPTOR_PAUSA)
+
+# Classes d'excepció per on pot arribar "la base de dades no respon";
+# es_error_connexio() decideix si ho és (no un error de programa o un deadlock)
+ERRORS_BD = (BaseDadesNoDisponible,) + BACKEND.errors_connexio + (
+    REPLICA.errors_connexio if REPLICA is not None else ()
+)
+
+
+def es_error_connexio(e, lectura_publica=False):
+    """
+    La base de dades no respon: caiguda, connexió perduda o l'interruptor
+    obert. El temps màxim esgotat només compta en una lectura pública (les
+    úniques amb DB_LATENCIA_MAX); en qualsevol altra petició és un error més.
+    """
+    if isinstance(e, BaseDadesNoDisponible):
+        return True
+    for backend in (BACKEND, REPLICA):
+        if backend is None:
+            continue
+        tipus = backend.tipus_error(e)
+        if tipus == "connexio" or (tipus == "temps" and lectura_publica):
+            return True
+    return False
+
+
+def _usa_replica():
+    return _replica.get() and REPLICA is not None and estat_replica.usable()
+
+
+# --------------------------------------------------------
+# 🔌 CONNEXIÓ
 # --------------------------------------------------------
 def get_conn():
-    return psycopg2.connect(
-        DATABASE_URL,
-        sslmode="require",
-        cursor_factory=DictCursor
-    )
+    torneig = _torneig.get()
+    mesurat = metriques.ACTIVAT
+    if mesurat:
+        metriques.comptar_connexio()
+    # Lectures públiques: amb temps màxim (si no, l'última còpia bona)
+    temps_max = DB_LATENCIA_MAX if _replica.get() else None
+    if _usa_replica():
+        try:
+            return REPLICA.connectar(mesurat=mesurat, torneig=torneig, temps_max=temps_max)
+        except Exception as e:
+            estat_replica.marcar_error(e)
+
+    reintentar = interruptor.permetre()
+    if reintentar is not None:
+        raise BaseDadesNoDisponible(reintentar)
+    try:
+        conn = BACKEND.connectar(mesurat=mesurat, torneig=torneig, temps_max=temps_max)
+    except BACKEND.errors_connexio as e:
+        if es_error_connexio(e, lectura_publica=temps_max is not None):
+            interruptor.error(e)
+        raise
+    interruptor.exit()
+    return conn
 
 
 # --------------------------------------------------------
@@ -64,7 +331,64 @@ def ensure_db_exists():
             arbitre TEXT,
             punts1 INTEGER DEFAULT 0,
             punts2 INTEGER DEFAULT 0,
-            jugat INTEGER DEFAULT 0
+            jugat INTEGER DEFAULT 0,
+            torn INTEGER,
+            pista INTEGER,
+            hora TEXT,
+            versio INTEGER DEFAULT 0,
+            equip1_id INTEGER REFERENCES equips(id) ON DELETE SET NULL,
+            equip2_id INTEGER REFERENCES equips(id) ON DELETE SET NULL,
+            arbitre_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
+        );
+    """)
+
+    # Versió global de les dades (augmenta a cada escriptura)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS versio_dades (
+            id INTEGER PRIMARY KEY,
+            valor BIGINT NOT NULL DEFAULT 0
+        );
+    """)
+
+    # Registre de canvis per a la sincronització incremental (una entrada
+    # per element: la de l'última revisió que l'ha tocat)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS registre_canvis (
+            ambit TEXT,
+            clau INTEGER,
+            revisio BIGINT NOT NULL,
+            dades TEXT,
+            PRIMARY KEY (ambit, clau)
+        );
+    """)
+    iniciar_registre_canvis(cur)
+
+    # Enviaments de resultats ja processats (claus d'idempotència)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resultats_enviats (
+            clau TEXT PRIMARY KEY,
+            partit_id INTEGER,
+            resposta TEXT,
+            creat TIMESTAMP DEFAULT NOW()
+        );
+    """)
+
+    # Feines en segon pla (app/feines.py): la taula fa de cua
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feines (
+            id SERIAL PRIMARY KEY,
+            tipus TEXT NOT NULL,
+            estat TEXT NOT NULL DEFAULT 'pendent',
+            progres REAL DEFAULT 0,
+            missatge TEXT,
+            parametres TEXT,
+            entrada BYTEA,
+            resultat BYTEA,
+            nom_resultat TEXT,
+            tipus_resultat TEXT,
+            creada TIMESTAMP DEFAULT NOW(),
+            actualitzada TIMESTAMP DEFAULT NOW(),
+            acabada TIMESTAMP
         );
     """)
 
@@ -77,7 +401,8 @@ def ensure_db_exists():
             punts INTEGER,
             dif_gol INTEGER,
             pos_grup INTEGER,
-            grup INTEGER
+            grup INTEGER,
+            equip_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
         );
     """)
 
@@ -88,15 +413,17 @@ def ensure_db_exists():
             punts INTEGER,
             dif_gol INTEGER,
             pos_grup INTEGER,
-            grup INTEGER
+            grup INTEGER,
+            equip_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
         );
     """)
 
-    # Config fases finals
+    # Config fases finals (format del quadre: NULL = automàtic, veure quadres.py)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS config_fases_finals (
             fase TEXT PRIMARY KEY,
-            num_equips INTEGER
+            num_equips INTEGER,
+            format TEXT
         );
     """)
 
@@ -106,7 +433,8 @@ def ensure_db_exists():
             id SERIAL PRIMARY KEY,
             fase TEXT,
             equip_nom TEXT,
-            posicio INTEGER
+            posicio INTEGER,
+            equip_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
         );
     """)
 
@@ -121,6 +449,7 @@ def execute(query, params=()):
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(query, params)
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
@@ -129,6 +458,7 @@ def executemany(query, params_list):
     conn = get_conn()
     cur = conn.cursor()
     cur.executemany(query, params_list)
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
@@ -142,18 +472,212 @@ def fetchall(query, params=()):
     return rows
 
 
+def fetchall_tipus(tipus, query, params=()):
+    """
+    Com fetchall, però cada fila és un `tipus` de registres.py construït
+    des d'un cursor de tuples (sense la fila-diccionari intermèdia).
+    """
+    conn = get_conn()
+    cur = cursor_tuples(conn)
+    cur.execute(query, params)
+    rows = list(map(tipus._make, cur.fetchall()))
+    conn.close()
+    return rows
+
+
+# --------------------------------------------------------
+# 🔗 EQUIPS PER ID (noms només per mostrar)
+# --------------------------------------------------------
+# Partits, classificació final, eliminats i fase final guarden l'id de
+# l'equip (equips.id). El nom es llegeix amb un sol JOIN en llegir, de
+# manera que canviar el nom d'un equip no deixa res orfe. La columna de
+# text es manté com a nom en el moment d'escriure, per si l'equip s'esborra.
+PARTITS_AMB_NOMS = """
+    partits p
+    LEFT JOIN equips e1 ON e1.id = p.equip1_id
+    LEFT JOIN equips e2 ON e2.id = p.equip2_id
+    LEFT JOIN equips ea ON ea.id = p.arbitre_id
+"""
+NOMS_PARTIT = """
+    COALESCE(e1.nom_equip, p.equip1) AS equip1,
+    COALESCE(e2.nom_equip, p.equip2) AS equip2,
+    COALESCE(ea.nom_equip, p.arbitre) AS arbitre
+"""
+
+
+def ids_equips(cur):
+    """{nom_equip: id}, per resoldre els noms que arriben de formularis o classificacions."""
+    cur.execute("""
+        SELECT nom_equip, MIN(id)
+        FROM equips
+        WHERE nom_equip IS NOT NULL
+        GROUP BY nom_equip
+    """)
+    return {nom: id for nom, id in cur.fetchall()}
+
+
+# --------------------------------------------------------
+# 🔢 VERSIÓ DE DADES
+# --------------------------------------------------------
+# Comptador de cada torneig que augmenta amb cada escriptura. Serveix per
+# invalidar memòries cau (service worker, pàgines renderitzades...).
+_versio_cache = {}  # (torneig, rèplica?) -> (valor, llegit)
+
+
+def marcar_canvi(cur=None, canvis=None):
+    """
+    Augmenta la versió de dades dins de la transacció del cursor, o en
+    una connexió pròpia si no se'n passa cap (p.ex. fitxers de quadres).
+    canvis: [(ambit, clau, dades), ...] que descriuen l'escriptura per al
+    registre de canvis; sense, els clients l'han de tornar a llegir tota.
+    Retorna la nova revisió.
+    """
+    conn = None
+    if cur is None:
+        conn = get_conn()
+        cur = conn.cursor()
+
+    cur.execute("""
+        INSERT INTO versio_dades (id, valor) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET valor = versio_dades.valor + 1
+        RETURNING valor
+    """)
+    revisio = cur.fetchone()[0]
+    registrar_canvis(cur, revisio, canvis)
+    _versio_cache.pop((_torneig.get(), False), None)
+
+    if conn is not None:
+        conn.commit()
+        conn.close()
+    return revisio
+
+
+def obtenir_versio_dades(max_edat=2.0):
+    """
+    Versió actual de les dades. Es guarda uns segons en memòria perquè
+    es consulta a cada petició pública.
+    """
+    # La rèplica pot anar un pas enrere: cada font té la seva versió
+    clau = (_torneig.get(), bool(_replica.get() and REPLICA is not None and estat_replica.disponible))
+    ara = time.monotonic()
+    guardada = _versio_cache.get(clau)
+    if guardada is not None and ara - guardada[1] < max_edat:
+        return guardada[0]
+
+    rows = fetchall("SELECT valor FROM versio_dades WHERE id=1")
+    valor = rows[0][0] if rows else 0
+    _versio_cache[clau] = (valor, ara)
+    return valor
+
+
+# --------------------------------------------------------
+# 📜 REGISTRE DE CANVIS (sincronització incremental)
+# --------------------------------------------------------
+# La revisió és la mateixa versió de dades. Cada escriptura incremental hi
+# deixa, per element (ambit, clau), l'estat nou i la revisió; una entrada
+# més nova substitueix l'anterior, així el registre mai creix més que el
+# torneig. Ambits: "grup:<n>" amb [id, punts1, punts2, jugat] per partit i
+# "quadre:<FASE>" amb les files de routes_fasefinal.fila_partit.
+# Les escriptures que no es poden descriure així (generar partits, editar
+# equips, reiniciar...) buiden el registre i hi deixen l'entrada TOT: qui
+# sincronitza des d'abans d'aquesta revisió ho ha de tornar a llegir tot.
+TOT = "*"
+
+
+def iniciar_registre_canvis(cur):
+    cur.execute("""
+        INSERT INTO registre_canvis (ambit, clau, revisio)
+        SELECT %s, 0, COALESCE(MAX(valor), 0) FROM versio_dades WHERE TRUE
+        ON CONFLICT (ambit, clau) DO NOTHING
+    """, (TOT,))
+
+
+def registrar_canvis(cur, revisio, canvis=None):
+    if canvis is None:
+        cur.execute("DELETE FROM registre_canvis")
+        canvis = [(TOT, 0, None)]
+
+    files = {(ambit, clau): dades for ambit, clau, dades in canvis}
+    if files:
+        execute_values(cur, """
+            INSERT INTO registre_canvis (ambit, clau, revisio, dades)
+            VALUES %s
+            ON CONFLICT (ambit, clau) DO UPDATE
+            SET revisio = EXCLUDED.revisio, dades = EXCLUDED.dades
+        """, [
+            (ambit, clau, revisio, None if dades is None else json.dumps(dades, separators=(",", ":")))
+            for (ambit, clau), dades in files.items()
+        ])
+
+
+def llegir_canvis(des_de, ambits=None):
+    """
+    (revisió actual, complet, {ambit: [dades, ...]}) des de la revisió des_de.
+    complet=True vol dir que el client ha de tornar a carregar-ho tot.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    # Primer la revisió: el que s'escrigui després ja entrarà a la propera
+    cur.execute("SELECT valor FROM versio_dades WHERE id=1")
+    fila = cur.fetchone()
+    revisio = fila[0] if fila else 0
+
+    filtre, params = "", [des_de, revisio]
+    if ambits is not None:
+        filtre = "AND ambit = ANY(%s)"
+        params.append([TOT, *ambits])
+    cur.execute(f"""
+        SELECT ambit, dades
+        FROM registre_canvis
+        WHERE revisio > %s AND revisio <= %s {filtre}
+        ORDER BY revisio
+    """, params)
+    files = cur.fetchall()
+    conn.close()
+
+    complet = des_de > revisio
+    canvis = {}
+    for ambit, dades in files:
+        if ambit == TOT:
+            complet = True
+        else:
+            canvis.setdefault(ambit, []).append(json.loads(dades))
+    return revisio, complet, ({} if complet else canvis)
+
+
+# --------------------------------------------------------
+# 🏐 REGISTRE DE TORNEIGS
+# --------------------------------------------------------
+# La taula torneigs és a l'espai del torneig original.
+def obtenir_torneigs():
+    with en_torneig(None):
+        return fetchall("SELECT slug, titol FROM torneigs ORDER BY slug")
+
+
+def registrar_torneig(slug, titol):
+    """Dona d'alta un torneig (o n'actualitza el títol) i crea el seu espai."""
+    validar_slug(slug)
+    with en_torneig(None):
+        execute("""
+            INSERT INTO torneigs (slug, titol) VALUES (%s, %s)
+            ON CONFLICT (slug) DO UPDATE SET titol = EXCLUDED.titol
+        """, (slug, titol))
+    BACKEND.crear_espai(slug)
+
+
 # --------------------------------------------------------
 # 🔹 EQUIPS
 # --------------------------------------------------------
 def obtenir_equips():
-    return fetchall("""
+    return fetchall_tipus(Equip, """
         SELECT id, nom_participants, nom_equip, valor, email, telefon, grup, ordre
         FROM equips ORDER BY id ASC
     """)
 
 
 def obtenir_equip(id):
-    rows = fetchall("""
+    rows = fetchall_tipus(Equip, """
         SELECT id, nom_participants, nom_equip, valor, email, telefon, grup, ordre
         FROM equips
         WHERE id=%s
@@ -188,16 +712,7 @@ def eliminar_tots_equips():
 # 🔹 GRUPS
 # --------------------------------------------------------
 def obtenir_grups_guardats():
-    equips = obtenir_equips()
-    grups = {}
-    for e in equips:
-        grup = e["grup"]
-        if grup is None:
-            continue
-        grups.setdefault(grup, []).append(e)
-    for g in grups:
-        grups[g] = sorted(grups[g], key=lambda x: x["ordre"] or 0)
-    return grups
+    return agrupar_equips(obtenir_equips())
 
 
 def obtenir_grups():
@@ -212,119 +727,320 @@ def obtenir_grups():
 # --------------------------------------------------------
 # 🔹 PARTITS
 # --------------------------------------------------------
-def generar_partits(grup_id):
-    files = fetchall("""
-        SELECT nom_equip
-        FROM equips
-        WHERE grup=%s
-        ORDER BY ordre
-    """, (grup_id,))
-    equips = [row[0] for row in files]
-    N = len(equips)
+def generar_partits(grup_id, doble=False):
+    return generar_partits_grups([grup_id], doble).get(grup_id, 0)
 
-    execute("DELETE FROM partits WHERE grup=%s", (grup_id,))
 
-    patrons = {
-        4: [(1,3,2),(0,2,3),(1,2,0),(0,3,2),(2,3,1),(0,1,3)],
-        5: [(1,3,2),(2,0,4),(4,1,3),(2,3,0),(0,4,1),(2,1,3),(3,4,0),(1,0,4),(2,4,1),(3,0,2)],
-        6: [(3,2,1),(0,5,4),(1,4,2),(2,0,3),(3,4,5),(1,5,4),(2,4,3),(3,5,1),(0,1,2),
-            (2,5,0),(4,0,1),(1,3,4),(5,4,0),(3,0,5),(1,2,3)]
-    }
+def generar_partits_grups(grups, doble=False):
+    """
+    Genera els partits de tots els grups indicats de cop: una lectura
+    d'equips, un DELETE i un únic INSERT amb totes les files.
+    Retorna {grup: nombre de partits}.
+    """
+    grups = [int(g) for g in grups]
+    if not grups:
+        return {}
 
-    if N not in patrons:
-        return 0
+    files = fetchall("""
+        SELECT grup, id, nom_equip
+        FROM equips
+        WHERE grup = ANY(%s)
+        ORDER BY grup, ordre
+    """, (grups,))
 
-    inserts = [
-        (grup_id, equips[a], equips[b], equips[c])
-        for a, b, c in patrons[N]
-    ]
+    equips_per_grup = {g: [] for g in grups}
+    for grup, id, nom in files:
+        equips_per_grup[grup].append((id, nom))
 
-    executemany("""
-        INSERT INTO partits (grup, equip1, equip2, arbitre)
-        VALUES (%s, %s, %s, %s)
-    """, inserts)
+    inserts = []
+    totals = {}
+    for g in grups:
+        equips = equips_per_grup[g]
+        patro = patro_round_robin(len(equips), doble)
+        for a, b, c in patro:
+            arbitre = equips[c] if c is not None else (None, None)
+            inserts.append((
+                g, equips[a][1], equips[b][1], arbitre[1],
+                equips[a][0], equips[b][0], arbitre[0],
+            ))
+        totals[g] = len(patro)
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM partits WHERE grup = ANY(%s)", (grups,))
+    if inserts:
+        execute_values(cur, """
+            INSERT INTO partits (grup, equip1, equip2, arbitre, equip1_id, equip2_id, arbitre_id)
+            VALUES %s
+        """, inserts, page_size=len(inserts))
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
 
-    return len(inserts)
+    return totals
 
 
 def obtenir_partits(grup_id):
-    return fetchall("""
-        SELECT id, equip1, equip2, arbitre, punts1, punts2, jugat
-        FROM partits
-        WHERE grup=%s
-        ORDER BY id
+    return fetchall_tipus(Partit, f"""
+        SELECT p.id, {NOMS_PARTIT}, p.punts1, p.punts2, p.jugat, p.hora, p.pista
+        FROM {PARTITS_AMB_NOMS}
+        WHERE p.grup=%s
+        ORDER BY p.id
     """, (grup_id,))
 
 
+def obtenir_partits_per_grup():
+    """{grup: [Partit, ...]} de tots els grups en una sola consulta."""
+    conn = get_conn()
+    cur = cursor_tuples(conn)
+    cur.execute(f"""
+        SELECT p.grup, p.id, {NOMS_PARTIT}, p.punts1, p.punts2, p.jugat, p.hora, p.pista
+        FROM {PARTITS_AMB_NOMS}
+        ORDER BY p.grup, p.id
+    """)
+    per_grup = {}
+    for fila in cur.fetchall():
+        per_grup.setdefault(fila[0], []).append(Partit._make(fila[1:]))
+    conn.close()
+    return per_grup
+
+
 def actualitzar_resultat(partit_id, punts1, punts2):
-    execute("""
-        UPDATE partits
-        SET punts1=%s, punts2=%s, jugat=1
-        WHERE id=%s
-    """, (punts1, punts2, partit_id))
+    return actualitzar_resultats([(partit_id, punts1, punts2)])
+
+
+def actualitzar_resultats(resultats):
+    """
+    Desa molts resultats [(partit_id, punts1, punts2), ...] amb una sola
+    connexió: llegeix els valors actuals i només escriu (amb un únic
+    UPDATE) els partits que han canviat.
+    Retorna (ids modificats, grups dels partits enviats).
+    """
+    resultats = {int(pid): (int(p1), int(p2)) for pid, p1, p2 in resultats}
+    if not resultats:
+        return [], set()
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, grup, punts1, punts2, jugat
+        FROM partits
+        WHERE id = ANY(%s)
+    """, (list(resultats),))
+
+    canviats = []
+    grups = set()
+    valors = []
+    canvis = []
+    for pid, grup, punts1, punts2, jugat in cur.fetchall():
+        grups.add(grup)
+        p1, p2 = resultats[pid]
+        if (p1, p2) == (punts1, punts2) and jugat == 1:
+            continue
+        canviats.append(pid)
+        valors.append((pid, p1, p2))
+        canvis.append((f"grup:{grup}", pid, [pid, p1, p2, 1]))
+
+    if valors:
+        execute_values(cur, """
+            UPDATE partits AS p
+            SET punts1 = v.punts1, punts2 = v.punts2, jugat = 1, versio = p.versio + 1
+            FROM (VALUES %s) AS v(id, punts1, punts2)
+            WHERE p.id = v.id
+        """, valors, page_size=len(valors))
+        marcar_canvi(cur, canvis)
+        conn.commit()
+
+    conn.close()
+    return sorted(canviats), grups
+
+def planificar_partits(hora_inici, durada, num_pistes=None, descans=1):
+    """
+    Calcula torn, hora i pista de tots els partits de tots els grups
+    (veure calendari.planificar_horaris) i ho desa amb un sol UPDATE.
+    Retorna el nombre de torns utilitzats.
+    """
+    partits = fetchall(f"""
+        SELECT p.id, p.grup, {NOMS_PARTIT}
+        FROM {PARTITS_AMB_NOMS}
+        ORDER BY p.grup, p.id
+    """)
+    if not partits:
+        return 0
+
+    rows = fetchall("SELECT grup, pista FROM pistes_grup WHERE pista IS NOT NULL")
+    pistes_grup = {r[0]: r[1] for r in rows}
+
+    if not num_pistes:
+        num_pistes = max(pistes_grup.values()) if pistes_grup else 1
+
+    horari = planificar_horaris(
+        [tuple(p) for p in partits],
+        range(1, num_pistes + 1),
+        pistes_grup,
+        descans,
+    )
+
+    conn = get_conn()
+    cur = conn.cursor()
+    ids = ids_equips(cur)
+    valors = [
+        (pid, torn, pista, hora_torn(hora_inici, durada, torn), arbitre, ids.get(arbitre))
+        for pid, (torn, pista, arbitre) in horari.items()
+    ]
+
+    execute_values(cur, """
+        UPDATE partits AS p
+        SET torn = v.torn, pista = v.pista, hora = v.hora, arbitre = v.arbitre, arbitre_id = v.arbitre_id
+        FROM (VALUES %s) AS v(id, torn, pista, hora, arbitre, arbitre_id)
+        WHERE p.id = v.id
+    """, valors, template="(%s, %s, %s, %s, %s, %s::integer)", page_size=len(valors))
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
+
+    return max(v[1] for v in valors) + 1
 
 # --------------------------------------------------------
-# 🔹 CLASSIFICACIÓ
+# 🔹 RESULTATS DELS ÀRBITRES (API MÒBIL)
 # --------------------------------------------------------
-def calcular_classificacio(grup):
-    partits = obtenir_partits(grup)
-    stats = {}
-
-    def ensure(e):
-        if e not in stats:
-            stats[e] = {
-                "punts": 0,
-                "favor": 0,
-                "contra": 0,
-                "diferencia": 0,
-                "pj": 0,
-                "pg": 0,
-                "pp": 0
-            }
+def partit_json(row):
+    """row: PartitArbitre (o una tupla amb les mateixes columnes)."""
+    return dict(zip(PartitArbitre._fields, row))
+
+
+COLUMNES_PARTIT_JSON = f"""
+    p.id, p.grup, {NOMS_PARTIT}, p.punts1, p.punts2, p.jugat, p.versio, p.hora, p.pista
+"""
+
 
-    for row in partits:
-        e1 = row[1]
-        e2 = row[2]
-        p1 = row[4]
-        p2 = row[5]
-        jugat = row[6]
+def obtenir_partits_arbitre(grup_id=None, partit_id=None):
+    """Partits (com a dict JSON) amb la versió per al control optimista."""
+    filtre, params = ("p.grup=%s", (grup_id,)) if partit_id is None else ("p.id=%s", (partit_id,))
+    rows = fetchall_tipus(PartitArbitre, f"""
+        SELECT {COLUMNES_PARTIT_JSON}
+        FROM {PARTITS_AMB_NOMS}
+        WHERE {filtre}
+        ORDER BY p.id
+    """, params)
+    return [partit_json(r) for r in rows]
 
-        ensure(e1)
-        ensure(e2)
 
-        # Si el partit no s’ha jugat, o és 0-0, no el comptem
-        if jugat != 1 or (p1 == 0 and p2 == 0):
+def desar_resultats_arbitres(enviaments):
+    """
+    Aplica un lot d'enviaments {"clau", "partit_id", "punts1", "punts2",
+    "versio"} en una sola transacció:
+      - les claus ja processades retornen la resposta desada (idempotència);
+      - cada partit s'actualitza només si la versio coincideix (o és None);
+      - els que no coincideixen retornen conflicte amb l'estat actual.
+    Retorna {clau: (codi_http, resposta_dict)}.
+    """
+    if not enviaments:
+        return {}
+
+    conn = get_conn()
+    cur = conn.cursor()
+
+    claus = [e["clau"] for e in enviaments]
+    cur.execute(
+        "SELECT clau, resposta FROM resultats_enviats WHERE clau = ANY(%s)",
+        (claus,),
+    )
+    respostes = {}
+    for clau, resposta in cur.fetchall():
+        codi, cos = json.loads(resposta)
+        respostes[clau] = (codi, cos)
+
+    pendents = []
+    vistes = set()
+    for e in enviaments:
+        if e["clau"] in respostes or e["clau"] in vistes:
             continue
+        vistes.add(e["clau"])
+        pendents.append(e)
+
+    noves = {}
+    canvis = []
+    while pendents:
+        # Cada ronda té com a molt un enviament per partit
+        ronda, resta, ids = [], [], set()
+        for e in pendents:
+            (resta if e["partit_id"] in ids else ronda).append(e)
+            ids.add(e["partit_id"])
+        pendents = resta
+
+        actualitzats = execute_values(cur, """
+            UPDATE partits AS p
+            SET punts1 = v.punts1, punts2 = v.punts2, jugat = 1, versio = p.versio + 1
+            FROM (VALUES %s) AS v(id, punts1, punts2, versio)
+            WHERE p.id = v.id AND (v.versio IS NULL OR p.versio = v.versio)
+            RETURNING p.id
+        """, [
+            (e["partit_id"], e["punts1"], e["punts2"], e["versio"])
+            for e in ronda
+        ], template="(%s, %s, %s, %s::integer)", page_size=len(ronda), fetch=True)
+        fets = {r[0] for r in actualitzats}
+
+        # Estat actual (amb els noms) dels actualitzats i dels que han fallat
+        cur_tuples = cursor_tuples(conn)
+        cur_tuples.execute(f"""
+            SELECT {COLUMNES_PARTIT_JSON}
+            FROM {PARTITS_AMB_NOMS}
+            WHERE p.id = ANY(%s)
+        """, ([e["partit_id"] for e in ronda],))
+        actuals = {r[0]: partit_json(r) for r in cur_tuples.fetchall()}
+
+        for e in ronda:
+            pid = e["partit_id"]
+            if pid in fets:
+                p = actuals[pid]
+                noves[e["clau"]] = (200, {"ok": True, "partit": p})
+                canvis.append((f"grup:{p['grup']}", pid, [pid, p["punts1"], p["punts2"], p["jugat"]]))
+            elif pid in actuals:
+                noves[e["clau"]] = (409, {
+                    "ok": False,
+                    "msg": "El resultat ha canviat des de la teva última lectura",
+                    "partit": actuals[pid],
+                })
+            else:
+                noves[e["clau"]] = (404, {"ok": False, "msg": "Aquest partit no existeix"})
+
+    if noves:
+        execute_values(cur, """
+            INSERT INTO resultats_enviats (clau, partit_id, resposta)
+            VALUES %s
+            ON CONFLICT (clau) DO NOTHING
+        """, [
+            (clau, cos.get("partit", {}).get("id"), json.dumps([codi, cos]))
+            for clau, (codi, cos) in noves.items()
+        ])
+
+    if canvis:
+        marcar_canvi(cur, canvis)
+    conn.commit()
+    conn.close()
 
-        stats[e1]["pj"] += 1
-        stats[e2]["pj"] += 1
-
-        stats[e1]["favor"] += p1
-        stats[e1]["contra"] += p2
-
-        stats[e2]["favor"] += p2
-        stats[e2]["contra"] += p1
-
-        # Partit guanyat / perdut
-        if p1 > p2:
-            stats[e1]["pg"] += 1
-            stats[e2]["pp"] += 1
-            stats[e1]["punts"] += 3
-        elif p2 > p1:
-            stats[e2]["pg"] += 1
-            stats[e1]["pp"] += 1
-            stats[e2]["punts"] += 3
-
-    # Diferència
-    for e in stats:
-        stats[e]["diferencia"] = stats[e]["favor"] - stats[e]["contra"]
-
-    # Ordenar igual que abans
-    return sorted(
-        stats.items(),
-        key=lambda x: (x[1]["punts"], x[1]["diferencia"], x[1]["favor"]),
-        reverse=True
+    respostes.update(noves)
+    return respostes
+
+
+def netejar_resultats_enviats(hores=24):
+    # No canvia res visible: sense marcar_canvi (obligaria a recarregar-ho tot)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM resultats_enviats WHERE creat < NOW() - %s * INTERVAL '1 hour'",
+        (hores,),
     )
+    conn.commit()
+    conn.close()
+
+# --------------------------------------------------------
+# 🔹 CLASSIFICACIÓ
+# --------------------------------------------------------
+def calcular_classificacio(grup):
+    return classificacio_grup(obtenir_partits(grup))
+
 
 # --------------------------------------------------------
 # 🔹 FASE FINAL
@@ -359,7 +1075,8 @@ def generar_fase_final_equips():
             punts INTEGER,
             dif_gol INTEGER,
             pos_grup INTEGER,
-            grup INTEGER
+            grup INTEGER,
+            equip_id INTEGER REFERENCES equips(id) ON DELETE SET NULL
         )
     """)
 
@@ -371,40 +1088,72 @@ def generar_fase_final_equips():
     fases = cur.fetchall()
 
     # Llegir classificació final
-    cur.execute("""
-        SELECT equip_nom, punts, dif_gol, pos_grup, grup
-        FROM classificacio_final
-        ORDER BY posicio ASC
-    """)
-    classificats = cur.fetchall()
-
-    index = 0
-    for fase, n_equips in fases:
-        sublist = classificats[index:index + n_equips]
+    classificats = llegir_classificacio_final(cursor_tuples(conn))
 
+    for fase, sublist in equips_per_fase(fases, classificats).items():
         pos = 1
-        for eq_nom, punts, dif, pos_g, grup in sublist:
+        for eq_nom, punts, dif, pos_g, grup, _, equip_id in sublist:
             cur.execute("""
                 INSERT INTO fase_final_equips
-                (fase, posicio, equip_nom, punts, dif_gol, pos_grup, grup)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (fase, pos, eq_nom, punts, dif, pos_g, grup))
+                (fase, posicio, equip_nom, equip_id, punts, dif_gol, pos_grup, grup)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (fase, pos, eq_nom, equip_id, punts, dif, pos_g, grup))
             pos += 1
 
-        index += n_equips
-
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
 def obtenir_fase_final_equips(fase):
     fase = fase.upper()
-    return fetchall("""
-        SELECT equip_nom, posicio
-        FROM fase_final_equips
-        WHERE fase=%s
-        ORDER BY posicio
+    return fetchall_tipus(FaseEquip, """
+        SELECT COALESCE(e.nom_equip, f.equip_nom) AS equip_nom, f.posicio
+        FROM fase_final_equips f
+        LEFT JOIN equips e ON e.id = f.equip_id
+        WHERE f.fase=%s
+        ORDER BY f.posicio
     """, (fase,))
 
+
+def llegir_classificacio_final(cur):
+    """
+    Files ClassificatFinal per ordre de posició, amb el nom actual de cada
+    equip. Millor amb un cursor_tuples(conn).
+    """
+    cur.execute("""
+        SELECT COALESCE(e.nom_equip, c.equip_nom) AS equip_nom,
+               c.punts, c.dif_gol, c.pos_grup, c.grup, c.posicio, c.equip_id
+        FROM classificacio_final c
+        LEFT JOIN equips e ON e.id = c.equip_id
+        ORDER BY c.posicio ASC
+    """)
+    return list(map(ClassificatFinal._make, cur.fetchall()))
+
+
+def obtenir_classificacio_final():
+    conn = get_conn()
+    rows = llegir_classificacio_final(cursor_tuples(conn))
+    conn.close()
+    return rows
+
+
+def desar_classificacio_final(cur, files):
+    """
+    Substitueix la classificació final per `files` en ordre:
+    (equip_nom, punts, dif, pos_grup, grup[, equip_id]). Si no es dona
+    l'id, es resol pel nom.
+    """
+    ids = ids_equips(cur)
+    cur.execute("DELETE FROM classificacio_final")
+    if files:
+        execute_values(cur, """
+            INSERT INTO classificacio_final (posicio, equip_nom, equip_id, punts, dif_gol, pos_grup, grup)
+            VALUES %s
+        """, [
+            (pos, f[0], f[5] if len(f) > 5 and f[5] is not None else ids.get(f[0]), f[1], f[2], f[3], f[4])
+            for pos, f in enumerate(files, start=1)
+        ], template="(%s, %s, %s::integer, %s, %s, %s, %s)", page_size=len(files))
+
 # --------------------------------------------------------
 # 🔥 RESET COMPLET DEL TORNEIG
 # --------------------------------------------------------
@@ -427,12 +1176,135 @@ def reset_competicio():
     # 🧹 5) Buidar pistes
     cur.execute("DELETE FROM pistes_grup")
 
+    marcar_canvi(cur)
     conn.commit()
     conn.close()
 
     print("🧽 RESET COMPLET EXECUTAT")
 
 
+# --------------------------------------------------------
+# 🧵 FEINES EN SEGON PLA (app/feines.py)
+# --------------------------------------------------------
+# L'estat d'una feina no és una dada del torneig: sense marcar_canvi.
+CAMPS_FEINA = "id, tipus, estat, progres, missatge, nom_resultat, creada, acabada"
+
+
+def crear_feina(tipus, parametres=None, entrada=None):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO feines (tipus, parametres, entrada) VALUES (%s, %s, %s) RETURNING id",
+        (tipus, json.dumps(parametres or {}), entrada),
+    )
+    feina_id = cur.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return feina_id
+
+
+def reclamar_feina(feina_id):
+    """Passa la feina de pendent a en_curs. None si ja l'ha agafada un altre procés."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE feines SET estat='en_curs', actualitzada=NOW()
+        WHERE id=%s AND estat='pendent'
+        RETURNING tipus, parametres, entrada
+    """, (feina_id,))
+    fila = cur.fetchone()
+    conn.commit()
+    conn.close()
+    return fila
+
+
+def actualitzar_feina(feina_id, progres, missatge=None):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE feines SET progres=%s, missatge=COALESCE(%s, missatge), actualitzada=NOW()
+        WHERE id=%s
+    """, (progres, missatge, feina_id))
+    conn.commit()
+    conn.close()
+
+
+def acabar_feina(feina_id, estat, missatge, resultat=None, nom_resultat=None, tipus_resultat=None):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE feines
+        SET estat=%s, progres=CASE WHEN %s='feta' THEN 1 ELSE progres END, missatge=%s,
+            resultat=%s, nom_resultat=%s, tipus_resultat=%s, entrada=NULL,
+            actualitzada=NOW(), acabada=NOW()
+        WHERE id=%s
+    """, (estat, estat, missatge, resultat, nom_resultat, tipus_resultat, feina_id))
+    conn.commit()
+    conn.close()
+
+
+def obtenir_feina(feina_id):
+    files = fetchall(f"SELECT {CAMPS_FEINA} FROM feines WHERE id=%s", (feina_id,))
+    return files[0] if files else None
+
+
+def obtenir_feines(limit=20):
+    return fetchall(f"SELECT {CAMPS_FEINA} FROM feines ORDER BY id DESC LIMIT %s", (limit,))
+
+
+def obtenir_resultat_feina(feina_id):
+    """(bytes, nom, mimetype) d'una feina acabada amb fitxer, o None."""
+    files = fetchall("""
+        SELECT resultat, nom_resultat, tipus_resultat FROM feines
+        WHERE id=%s AND estat='feta' AND resultat IS NOT NULL
+    """, (feina_id,))
+    if not files:
+        return None
+    return bytes(files[0][0]), files[0][1], files[0][2]
+
+
+def ids_feines_pendents():
+    return [r[0] for r in fetchall("SELECT id FROM feines WHERE estat='pendent' ORDER BY id")]
+
+
+def tancar_feines_orfes(hores):
+    """Feines en curs sense progrés des de fa hores: el procés que les feia ja no hi és."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE feines SET estat='error', missatge='Interrompuda (el servidor s''ha reiniciat)',
+            entrada=NULL, acabada=NOW()
+        WHERE estat='en_curs' AND actualitzada < NOW() - %s * INTERVAL '1 hour'
+    """, (hores,))
+    conn.commit()
+    conn.close()
+
+
+def netejar_feines(hores=24 * 7):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM feines WHERE estat IN ('feta', 'error') AND acabada < NOW() - %s * INTERVAL '1 hour'",
+        (hores,),
+    )
+    conn.commit()
+    conn.close()
+
+
+def substituir_equips(files):
+    """Importació: tots els equips nous d'una sola vegada (una transacció)."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM equips")
+    cur.executemany("""
+        INSERT INTO equips (nom_participants, nom_equip, valor, email, telefon)
+        VALUES (%s, %s, %s, %s, %s)
+    """, files)
+    marcar_canvi(cur)
+    conn.commit()
+    conn.close()
+
+
 
 
 
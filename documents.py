@@ -0,0 +1,218 @@
+import datetime
+import os
+from io import BytesIO
+
+# --------------------------------------------------------
+# 📄 DOCUMENTS (PDF i Excel)
+# --------------------------------------------------------
+# Funcions pures (dades -> bytes): es poden executar en un procés a part
+# (app/admissio.py, executar_pesat) sense frenar els fils que serveixen
+# les pàgines dels espectadors.
+
+
+def pdf_grup(grup_id, partits):
+    """PDF del grup per als àrbitres: partits (Partit) amb graelles de punts."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+
+    # ------ CAPTURAR PÀGINES EN MEMÒRIA ------
+    packet = BytesIO()
+    pdf = canvas.Canvas(packet, pagesize=A4)
+    width, height = A4
+
+    # ------ LOCALITZAR LOGO ------
+    possible_paths = [
+        os.path.join(os.getcwd(), "app", "static", "logo1.png"),
+        os.path.join(os.getcwd(), "app", "static", "img", "logo1.png"),
+        os.path.join(os.getcwd(), "static", "logo1.png"),
+        os.path.join(os.getcwd(), "static", "img", "logo1.png"),
+    ]
+
+    logo_path = next((p for p in possible_paths if os.path.exists(p)), None)
+
+    # ------ FUNCIONS PER CAPÇALERA ------
+    def draw_header(c):
+        header_margin_top = 18
+        display_w = 90
+        if logo_path:
+            try:
+                img = ImageReader(logo_path)
+                ow, oh = img.getSize()
+                scale = display_w / ow
+                display_h = oh * scale
+            except Exception:
+                display_h = 40
+        else:
+            display_h = 40
+
+        # posició vertical del logo
+        y = height - header_margin_top - display_h
+
+        if logo_path:
+            c.drawImage(
+                logo_path,
+                40,
+                y,
+                width=display_w,
+                height=display_h,
+                preserveAspectRatio=True,
+                mask="auto",
+            )
+
+        # Títol
+        c.setFont("Helvetica-Bold", 18)
+        c.drawCentredString(
+            width / 2,
+            height - header_margin_top - (display_h / 2),
+            f"GRUP {grup_id}",
+        )
+
+        # Data
+        c.setFont("Helvetica", 9)
+        pdf.drawRightString(
+            width - 40, height - 60, datetime.datetime.now().strftime("%d/%m/%Y")
+        )
+
+        # Línia separació
+        c.line(40, y - 12, width - 40, y - 12)
+
+        # marca d'aigua (opcional, baixa opacitat)
+        if logo_path:
+            try:
+                c.saveState()
+                try:
+                    c.setFillAlpha(0.04)
+                except Exception:
+                    pass
+                wm_w = 260
+                wm_h = 260
+                c.drawImage(
+                    logo_path,
+                    (width - wm_w) / 2,
+                    (height - wm_h) / 2,
+                    width=wm_w,
+                    height=wm_h,
+                    mask="auto",
+                )
+                c.restoreState()
+            except Exception as e:
+                print("⚠️ Error dibuixant marca d'aigua:", e)
+
+        # tornem la Y inicial pels partits
+        return y - 30
+
+    # ------ DIBUIXAR CONTINGUT ------
+    y = draw_header(pdf)
+    pdf.setFont("Helvetica", 12)
+
+    for idx, (pid, equip1, equip2, arbit, punts1, punts2, jugat, hora, pista) in enumerate(
+        partits, start=1
+    ):
+        # si no hi ha espai, nova pàgina
+        if y < 140:
+            pdf.showPage()
+            y = draw_header(pdf)
+            pdf.setFont("Helvetica", 12)
+
+        pdf.setFont("Helvetica-Bold", 11)
+        titol_partit = f"Partit {idx}.{grup_id}"
+        if hora:
+            titol_partit += f"  ·  {hora}"
+        if pista:
+            titol_partit += f"  ·  Pista {pista}"
+        pdf.drawString(60, y, titol_partit)
+        pdf.setFont("Helvetica", 10)
+        pdf.drawRightString(width - 60, y, f"Àrbitre: {arbit}")
+        y -= 18
+
+        # --- GRAELLES ---
+        cell_w, cell_h = 16, 12
+        top_row = list(range(1, 16))
+        bottom_row = list(range(16, 31))
+        total_w = len(top_row) * cell_w
+        x1 = 30
+        x2 = width - (30 + total_w)
+
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawCentredString(x1 + total_w / 2, y, equip1)
+        pdf.drawCentredString(x2 + total_w / 2, y, equip2)
+        y -= 22
+
+        pdf.setFont("Helvetica", 6)
+        start_y = y
+
+        for fila, nums in enumerate([top_row, bottom_row]):
+            for i, num in enumerate(nums):
+                y_pos = start_y - fila * cell_h
+
+                pdf.rect(x1 + i * cell_w, y_pos, cell_w, cell_h)
+                pdf.drawCentredString(
+                    x1 + i * cell_w + cell_w / 2, y_pos + 3, str(num)
+                )
+
+                pdf.rect(x2 + i * cell_w, y_pos, cell_w, cell_h)
+                pdf.drawCentredString(
+                    x2 + i * cell_w + cell_w / 2, y_pos + 3, str(num)
+                )
+
+        y = start_y - (2 * cell_h) - 25
+        pdf.line(40, y, width - 40, y)
+        y -= 20
+
+    # -------- Finalitzar primer PDF (sense numeració) --------
+    pdf.save()
+
+    # -------- SEGONA PASSADA: AFEGIR NUMERACIÓ --------
+    from PyPDF2 import PdfReader, PdfWriter
+
+    packet.seek(0)
+    reader = PdfReader(packet)
+    writer = PdfWriter()
+
+    total_pages = len(reader.pages)
+
+    for i, page in enumerate(reader.pages):
+        num_packet = BytesIO()
+        num_canvas = canvas.Canvas(num_packet, pagesize=A4)
+
+        num_canvas.setFont("Helvetica", 9)
+        num_canvas.drawCentredString(
+            width / 2, 25, f"Pàgina {i + 1} de {total_pages}"
+        )
+
+        num_canvas.save()
+        num_packet.seek(0)
+
+        footer_pdf = PdfReader(num_packet)
+        page.merge_page(footer_pdf.pages[0])
+        writer.add_page(page)
+
+    out_buffer = BytesIO()
+    writer.write(out_buffer)
+    return out_buffer.getvalue()
+
+
+def excel_equips(equips):
+    """Full Excel amb els equips (les columnes que llegeix la importació)."""
+    import pandas as pd
+
+    df = pd.DataFrame(
+        equips,
+        columns=["id", "jugadors", "equip", "valor", "email", "telefon", "grup", "ordre"],
+    )
+    df = df[["jugadors", "equip", "valor", "email", "telefon"]]
+    sortida = BytesIO()
+    df.to_excel(sortida, index=False)
+    return sortida.getvalue()
+
+
+def llegir_excel_equips(dades):
+    """Files (jugadors, equip, valor, email, telefon) d'un Excel com el d'excel_equips."""
+    import pandas as pd
+
+    df = pd.read_excel(BytesIO(dades))
+    return [
+        (row["jugadors"], row["equip"], int(row["valor"]), row.get("email", ""), row.get("telefon", ""))
+        for _, row in df.iterrows()
+    ]
@@ -0,0 +1,279 @@
+from functools import lru_cache
+
+from classificacio import classificacio_grup
+
+# --------------------------------------------------------
+# 🔮 ESCENARIS DE CLASSIFICACIÓ D'UN GRUP
+# --------------------------------------------------------
+# "Què necessitem per passar a OR?": amb els partits que queden d'un grup,
+# quines posicions pot acabar ocupant cada equip i quins resultats li cal.
+#
+# Es ramifica per guanyador de cada partit pendent (3 punts, sense
+# empats). El marge de cada partit pendent és lliure (1 o més), però el
+# que guanya un suma diferència i l'altre en resta la mateixa: un empat a
+# punts es resol per a tots els empatats alhora (_maxim_empatats), no per
+# parelles. Si dos empatats poden acabar amb la mateixa diferència i algun
+# encara té partits, els punts a favor poden decidir cap banda; entre
+# equips que ja han acabat, el desempat és el de classificacio_grup.
+#
+# La cerca és una branca i fita: es talla quan ja hi ha prou equips
+# segur per sobre (o prou pocs que el puguin avançar).
+#
+# El resultat d'un grup només depèn dels seus partits: mentre no canviïn,
+# surt de la cache (escenaris_grup), encara que canviïn els altres grups.
+
+GUANYAR = 3  # punts per victòria
+
+
+class Escenaris:
+    """Partits d'un grup (files com les d'obtenir_partits) i les cerques sobre els pendents."""
+
+    def __init__(self, partits):
+        classificacio = classificacio_grup(partits)
+        self.equips = [equip for equip, _ in classificacio]
+        index = {equip: i for i, equip in enumerate(self.equips)}
+        self.punts = tuple(s.punts for _, s in classificacio)
+        self.desempat = tuple((s.diferencia, s.favor) for _, s in classificacio)
+
+        # Els mateixos partits que classificacio_grup no compta
+        self.pendents = [
+            (row[0], index[row[1]], index[row[2]])
+            for row in partits
+            if row[6] != 1 or (row[4] == 0 and row[5] == 0)
+        ]
+        self.oberts = frozenset(i for _, a, b in self.pendents for i in (a, b))
+
+        # restants[d][i]: partits de l'equip i a partir del pendent d
+        n = len(self.equips)
+        self.restants = [[0] * n for _ in range(len(self.pendents) + 1)]
+        for d in range(len(self.pendents) - 1, -1, -1):
+            self.restants[d] = list(self.restants[d + 1])
+            _, a, b = self.pendents[d]
+            self.restants[d][a] += 1
+            self.restants[d][b] += 1
+
+    # ---------- posició amb uns resultats finals ----------
+    def posicions(self, punts, i, guanyadors):
+        """
+        (millor, pitjor) posició de l'equip i amb aquests punts finals i
+        aquests guanyadors dels pendents ({partit_id: equip}).
+        """
+        davant = sum(1 for p in punts if p > punts[i])
+        empatats = [j for j, p in enumerate(punts) if p == punts[i] and j != i]
+        if not empatats:
+            return davant + 1, davant + 1
+        darrere = self._maxim_empatats(i, guanyadors, empatats, 1)
+        endavant = self._maxim_empatats(i, guanyadors, empatats, -1)
+        return davant + 1 + len(empatats) - darrere, davant + 1 + endavant
+
+    def _maxim_empatats(self, i, guanyadors, empatats, sentit):
+        """
+        Quants empatats a punts poden acabar alhora sense passar davant de
+        i (sentit 1) o sense quedar-hi darrere (sentit -1), triant els marges.
+        """
+        # Amb sentit -1 es giren les diferències i els partits: el mateix càlcul
+        dif = [sentit * d for d, _ in self.desempat]
+        arcs = []  # (guanya, perd) dels pendents que no són de i
+        for pid, a, b in self.pendents:
+            guanya = guanyadors[pid]
+            perd = b if guanya == a else a
+            if sentit < 0:
+                guanya, perd = perd, guanya
+            if guanya == i:
+                return len(empatats)  # amb prou marge, i els deixa tots enrere
+            if perd == i:
+                dif[guanya] += 1  # el marge mínim és el que més l'afavoreix
+                dif[i] -= 1
+            else:
+                arcs.append((guanya, perd))
+
+        # Diferència màxima de cada empatat sense passar davant de i. Igualats,
+        # decideixen els punts a favor: oberts si algú encara ha de jugar
+        marge = {}
+        for j in empatats:
+            oberta = i in self.oberts or j in self.oberts
+            igual = oberta or sentit * self.desempat[j][1] <= sentit * self.desempat[i][1]
+            marge[j] = dif[i] - dif[j] - (0 if igual else 1)
+
+        variables = [j for j in empatats if any(j in arc for arc in arcs)]
+        fixos = sum(1 for j in empatats if j not in variables and marge[j] >= 0)
+
+        # Uns quants variables poden quedar tots per sota del seu marge si cap
+        # subconjunt Y que no perd amb ningú de fora suma menys marge que els
+        # partits que guanya a fora (cadascun li suma com a mínim 1)
+        bits = {j: 1 << n for n, j in enumerate(variables)}
+        dolent = [False] * (1 << len(variables))
+        maxim = 0
+        for conjunt in range(1, len(dolent)):
+            if any(dolent[conjunt & ~bit] for bit in bits.values() if conjunt & bit):
+                dolent[conjunt] = True
+                continue
+            tancat, guanyats = True, 0
+            for guanya, perd in arcs:
+                dins_guanya = conjunt & bits.get(guanya, 0)
+                dins_perd = conjunt & bits.get(perd, 0)
+                if dins_perd and not dins_guanya:
+                    tancat = False
+                    break
+                if dins_guanya and not dins_perd:
+                    guanyats += 1
+            suma = sum(marge[j] for j in variables if conjunt & bits[j])
+            if tancat and suma < guanyats:
+                dolent[conjunt] = True
+            else:
+                maxim = max(maxim, bin(conjunt).count("1"))
+        return fixos + maxim
+
+    # ---------- cerques ----------
+    def escenari_entre(self, i, posicio, condicions=None):
+        """Un escenari ({partit: guanyador}) en què i pot acabar entre els `posicio` primers, o None."""
+        return self._cercar(i, posicio, condicions or {}, optimista=True)
+
+    def segur_entre(self, i, posicio, condicions=None):
+        """L'equip i acaba entre els `posicio` primers passi el que passi?"""
+        return self._cercar(i, posicio, condicions or {}, optimista=False) is None
+
+    def _cercar(self, i, posicio, condicions, optimista):
+        # optimista: escenari amb millor <= posicio
+        # pessimista: contraexemple, escenari amb pitjor > posicio
+        escenari = {}
+        total = len(self.pendents)
+        possibles, forcades = self._victories(condicions)
+
+        def fita(d, punts):
+            """False si cap escenari a partir d'aquí pot complir-ho."""
+            maxim = [p + GUANYAR * v for p, v in zip(punts, possibles[d])]
+            minim = [p + GUANYAR * v for p, v in zip(punts, forcades[d])]
+            if optimista:
+                segur_davant = sum(1 for j, m in enumerate(minim) if j != i and m > maxim[i])
+                return segur_davant < posicio
+            amenaces = sum(1 for j, m in enumerate(maxim) if j != i and m >= minim[i])
+            return amenaces >= posicio
+
+        def cercar(d, punts):
+            if d == total:
+                millor, pitjor = self.posicions(punts, i, escenari)
+                return millor <= posicio if optimista else pitjor > posicio
+            if not fita(d, punts):
+                return False
+
+            pid, a, b = self.pendents[d]
+            for guanyador in self._ordre(pid, a, b, i, punts, optimista, condicions):
+                nous = list(punts)
+                nous[guanyador] += GUANYAR
+                escenari[pid] = guanyador
+                if cercar(d + 1, tuple(nous)):
+                    return True
+            del escenari[pid]
+            return False
+
+        return dict(escenari) if cercar(0, self.punts) else None
+
+    def _victories(self, condicions):
+        """Per a cada pendent d: victòries que encara pot sumar cada equip i les que té assegurades."""
+        if not condicions:
+            return self.restants, [[0] * len(self.equips)] * len(self.restants)
+        n = len(self.equips)
+        possibles = [[0] * n for _ in range(len(self.pendents) + 1)]
+        forcades = [[0] * n for _ in range(len(self.pendents) + 1)]
+        for d in range(len(self.pendents) - 1, -1, -1):
+            possibles[d] = list(possibles[d + 1])
+            forcades[d] = list(forcades[d + 1])
+            pid, a, b = self.pendents[d]
+            if pid in condicions:
+                possibles[d][condicions[pid]] += 1
+                forcades[d][condicions[pid]] += 1
+            else:
+                possibles[d][a] += 1
+                possibles[d][b] += 1
+        return possibles, forcades
+
+    @staticmethod
+    def _ordre(pid, a, b, i, punts, optimista, condicions):
+        """Guanyadors a provar, primer el que més probablement porta a una resposta."""
+        if pid in condicions:
+            return (condicions[pid],)
+        if i in (a, b):
+            rival = b if a == i else a
+            return (i, rival) if optimista else (rival, i)
+        # Optimista: que guanyin els que ja van per davant; pessimista: que
+        # els punts es reparteixin entre els que el poden atrapar
+        primer = a if (punts[a] >= punts[b]) == optimista else b
+        return (primer, b if primer == a else a)
+
+    # ---------- resum per equip ----------
+    def extrems(self, i):
+        """(millor, pitjor) posició que l'equip i encara pot ocupar."""
+        n = len(self.equips)
+        millor = next(p for p in range(1, n + 1) if self.escenari_entre(i, p) is not None)
+        pitjor = next(p for p in range(millor, n + 1) if self.segur_entre(i, p))
+        return millor, pitjor
+
+    def requisits(self, i, posicio, escenari):
+        """Partits pendents amb un sol resultat que deixa i entre els `posicio` primers."""
+        cal = []
+        for pid, a, b in self.pendents:
+            altre = b if escenari[pid] == a else a
+            if self.escenari_entre(i, posicio, {pid: altre}) is None:
+                cal.append((pid, escenari[pid]))
+        return cal
+
+
+@lru_cache(maxsize=256)
+def escenaris_grup(partits, objectius=None):
+    """
+    partits: tupla de files Partit; objectius: tupla de posicions (acabar
+    entre els N primers; per defecte totes). Retorna els partits pendents
+    [(partit_id, equip1, equip2)] i, per a cada equip, punts, partits
+    pendents, millor i pitjor posició possibles i, per a cada objectiu,
+    l'estat ("segur", "possible" o "impossible") i, si és possible, els
+    resultats que calen ([(partit_id, equip que ha de guanyar)]) i si n'hi
+    ha prou de guanyar els propis partits. No s'ha de modificar (cache).
+    """
+    esc = Escenaris(partits)
+    n = len(esc.equips)
+    # Acabar entre els n primers és segur: només les posicions 1..n-1
+    objectius = sorted(p for p in set(objectius or range(1, n)) if 1 <= p < n)
+
+    equips = {}
+    for i, equip in enumerate(esc.equips):
+        propis = {pid: i for pid, a, b in esc.pendents if i in (a, b)}
+        millor, pitjor = esc.extrems(i)
+        per_objectiu = {}
+        for posicio in objectius:
+            if pitjor <= posicio:
+                per_objectiu[posicio] = {"estat": "segur"}
+            elif millor > posicio:
+                per_objectiu[posicio] = {"estat": "impossible"}
+            else:
+                escenari = esc.escenari_entre(i, posicio)
+                per_objectiu[posicio] = {
+                    "estat": "possible",
+                    "cal": [(pid, esc.equips[g]) for pid, g in esc.requisits(i, posicio, escenari)],
+                    "depen_de_si": bool(propis) and esc.segur_entre(i, posicio, propis),
+                }
+        equips[equip] = {
+            "punts": esc.punts[i],
+            "pendents": len(propis),
+            "millor": millor,
+            "pitjor": pitjor,
+            "objectius": per_objectiu,
+        }
+    pendents = [(pid, esc.equips[a], esc.equips[b]) for pid, a, b in esc.pendents]
+    return {"pendents": pendents, "equips": equips}
+
+
+def posicions_fases(fases, num_grups):
+    """
+    fases: [(fase, num_equips), ...] en ordre (la classificació única agafa
+    tots els primers de grup, després els segons...). Retorna
+    {fase: (segur, possible)}: acabar entre els `segur` primers del grup
+    assegura aquesta fase o una de millor; entre els `possible` primers,
+    depèn també dels altres grups.
+    """
+    resultat = {}
+    acumulat = 0
+    for fase, num in fases:
+        acumulat += num
+        resultat[fase] = (acumulat // num_grups, -(-acumulat // num_grups))
+    return resultat
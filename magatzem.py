@@ -0,0 +1,446 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+import metriques
+
+# --------------------------------------------------------
+# 🗄 BACKENDS D'EMMAGATZEMATGE
+# --------------------------------------------------------
+# Tots dos ofereixen la mateixa interfície que fa servir db.py:
+#   connectar(mesurat=False, torneig=None, temps_max=None) -> connexió amb cursor(), commit(), rollback(), close()
+#   crear_espai(torneig)
+#   execute_values(cur, sql, files, template=None, page_size=100, fetch=False)
+#   es_columna_duplicada(excepcio)
+#   errors_connexio: classes d'excepció per on arriba "la base de dades no respon"
+#   tipus_error(excepcio): "connexio" (caiguda, connexió perduda), "temps"
+#                          (temps màxim esgotat) o None (qualsevol altre error)
+# temps_max (segons) limita la connexió i cada consulta, on el backend ho permet.
+# Les files es llegeixen per índex i per nom de columna (com DictCursor).
+#
+# Cada torneig té el seu espai de taules: un esquema "t_<slug>" a Postgres,
+# i un fitxer (o una base en memòria) propi a SQLite. torneig=None és
+# l'espai original (esquema public / fitxer de DATABASE_URL).
+#
+# DATABASE_URL:
+#   postgresql://...        -> Postgres (SSL obligatori excepte a localhost)
+#   sqlite:///cami/fitxer.db -> SQLite en fitxer (WAL)
+#   sqlite:// o memory://   -> SQLite en memòria (proves, benchmarks)
+#   sense valor             -> error: en memòria només si es demana
+
+
+_SLUG = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+
+def validar_slug(torneig):
+    if not isinstance(torneig, str) or not _SLUG.match(torneig):
+        raise ValueError(f"Identificador de torneig no vàlid: {torneig!r}")
+    return torneig
+
+
+def nom_esquema(torneig):
+    return "t_" + validar_slug(torneig).replace("-", "_")
+
+
+# --------------------------------------------------------
+# 🐘 POSTGRES
+# --------------------------------------------------------
+class BackendPostgres:
+    nom = "postgres"
+
+    def __init__(self, url, sslmode=None):
+        import psycopg2
+        import psycopg2.errors
+        from psycopg2.extras import DictCursor, execute_values
+
+        self.url = url
+        if sslmode is None:
+            host = urlparse(url).hostname or ""
+            # Un servidor local normalment no té SSL
+            sslmode = "prefer" if host in ("", "localhost", "127.0.0.1", "::1") else "require"
+        self.sslmode = sslmode
+        self._psycopg2 = psycopg2
+        self._DictCursor = DictCursor
+        self.execute_values = execute_values
+        # QueryCanceled (statement_timeout) és una OperationalError, però
+        # també ho són els deadlocks: tipus_error() les distingeix
+        self.errors_connexio = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+    def connectar(self, mesurat=False, torneig=None, temps_max=None):
+        opcions = {}
+        parametres = []
+        if torneig is not None:
+            # Només l'esquema del torneig: una taula que hi falti és un error,
+            # no una lectura silenciosa de les dades d'un altre torneig
+            parametres.append(f"-c search_path={nom_esquema(torneig)}")
+        if temps_max is not None:
+            parametres.append(f"-c statement_timeout={int(temps_max * 1000)}")
+            opcions["connect_timeout"] = max(2, math.ceil(temps_max))
+        if parametres:
+            opcions["options"] = " ".join(parametres)
+        return self._psycopg2.connect(
+            self.url,
+            sslmode=self.sslmode,
+            cursor_factory=metriques.CursorMesurat if mesurat else self._DictCursor,
+            **opcions
+        )
+
+    def crear_espai(self, torneig):
+        conn = self.connectar()
+        try:
+            conn.cursor().execute(f"CREATE SCHEMA IF NOT EXISTS {nom_esquema(torneig)}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def es_columna_duplicada(self, e):
+        return isinstance(e, self._psycopg2.errors.DuplicateColumn)
+
+    def tipus_error(self, e):
+        if isinstance(e, self._psycopg2.InterfaceError):
+            return "connexio"  # connexió ja tancada
+        if isinstance(e, self._psycopg2.errors.QueryCanceled):
+            return "temps"
+        if isinstance(e, self._psycopg2.OperationalError):
+            # Sense codi: no s'ha pogut connectar o s'ha perdut la connexió.
+            # 08: connexió, 53: sense recursos (massa connexions), 57: aturada
+            if e.pgcode is None or e.pgcode[:2] in ("08", "53", "57"):
+                return "connexio"
+        return None
+
+    def retard_replica(self, conn):
+        """Segons de retard d'una rèplica (0 si ja ha aplicat tot el WAL rebut)."""
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT pg_is_in_recovery(),
+                   CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                   END
+        """)
+        en_recuperacio, retard = cur.fetchone()
+        if not en_recuperacio:
+            return 0.0  # no és una rèplica (p.ex. la mateixa primària)
+        return float(retard) if retard is not None else None
+
+    def descripcio(self):
+        return f"PostgreSQL ({urlparse(self.url).hostname}, sslmode={self.sslmode})"
+
+
+# --------------------------------------------------------
+# 🪶 SQLITE (memòria o fitxer)
+# --------------------------------------------------------
+class Fila(list):
+    """Fila com les de DictCursor: fila[0], fila["nom"], keys(), items()."""
+    __slots__ = ("_index",)
+
+    def __init__(self, index, valors):
+        super().__init__(valors)
+        self._index = index
+
+    def __getitem__(self, clau):
+        if isinstance(clau, str):
+            return list.__getitem__(self, self._index[clau])
+        return list.__getitem__(self, clau)
+
+    def get(self, clau, defecte=None):
+        i = self._index.get(clau)
+        return defecte if i is None else list.__getitem__(self, i)
+
+    def keys(self):
+        return list(self._index)
+
+    def items(self):
+        return [(k, list.__getitem__(self, i)) for k, i in self._index.items()]
+
+
+_index_columnes = {}
+
+
+def _fabrica_files(cursor, fila):
+    noms = tuple(d[0] for d in cursor.description)
+    index = _index_columnes.get(noms)
+    if index is None:
+        # Com a Postgres, "p.id" a RETURNING es diu "id"
+        index = _index_columnes[noms] = {n.rsplit(".", 1)[-1]: i for i, n in enumerate(noms)}
+    return Fila(index, fila)
+
+
+_CAST = re.compile(r"::\w+")
+_SERIAL = re.compile(r"\b(?:BIG)?SERIAL\s+PRIMARY\s+KEY\b", re.I)
+_ANY = re.compile(r"=\s*ANY\(\s*$", re.I)
+_VALUES_ALIAS = re.compile(r"\(VALUES %s\)\s+AS\s+(\w+)\s*\(([^)]*)\)", re.I)
+_INTERVAL_HORES = re.compile(r"NOW\(\)\s*-\s*%s\s*\*\s*INTERVAL\s*'1 hour'", re.I)
+_UPDATE_ALIAS = re.compile(r"\bUPDATE\s+\w+\s+AS\s+(\w+)", re.I)
+
+
+def traduir_sql(sql, params=None):
+    """Tradueix el dialecte Postgres que fa servir l'app al de SQLite."""
+    sql = _CAST.sub("", sql)
+    sql = _INTERVAL_HORES.sub("datetime('now', '-' || %s || ' hours')", sql)
+    sql = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", sql, flags=re.I)
+    sql = _SERIAL.sub("INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+
+    # A SQLite, RETURNING no accepta l'àlies de la taula de l'UPDATE
+    alias = _UPDATE_ALIAS.search(sql)
+    if alias:
+        cos, separador, retorn = sql.rpartition("RETURNING")
+        if separador:
+            sql = cos + separador + re.sub(rf"\b{alias.group(1)}\.", "", retorn)
+
+    if params is None:
+        return sql, ()
+
+    trossos = sql.split("%s")
+    if len(trossos) - 1 != len(params):
+        raise ValueError(f"{len(trossos) - 1} marcadors i {len(params)} paràmetres")
+
+    sortida = [trossos[0].replace("%%", "%")]
+    valors = []
+    for param, tros in zip(params, trossos[1:]):
+        if isinstance(param, (list, tuple, set)) and _ANY.search(sortida[-1]):
+            # "= ANY(%s)" amb una llista -> "IN (?, ?, ...)"
+            sortida[-1] = _ANY.sub("IN (", sortida[-1])
+            param = list(param)
+            sortida.append(", ".join("?" * len(param)))
+            valors.extend(param)
+        else:
+            sortida.append("?")
+            valors.append(param)
+        sortida.append(tros.replace("%%", "%"))
+    return "".join(sortida), valors
+
+
+class CursorSQLite:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, sql, params=None):
+        inici = time.perf_counter() if metriques.ACTIVAT else None
+        try:
+            self._cur.execute(*traduir_sql(sql, params))
+        finally:
+            if inici is not None:
+                metriques.registrar_consulta(time.perf_counter() - inici, "execute", sql)
+        return None
+
+    def executemany(self, sql, params_list):
+        params_list = list(params_list)
+        if not params_list:
+            return None
+        inici = time.perf_counter() if metriques.ACTIVAT else None
+        try:
+            sql_t, _ = traduir_sql(sql, params_list[0])
+            self._cur.executemany(sql_t, [traduir_sql(sql, p)[1] for p in params_list])
+        finally:
+            if inici is not None:
+                metriques.registrar_consulta(time.perf_counter() - inici, "executemany", sql)
+        return None
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+
+class ConnexioSQLite:
+    def __init__(self, conn, backend=None, torneig=None):
+        self._conn = conn
+        self._backend = backend  # només en memòria: connexió compartida amb bloqueig
+        self._torneig = torneig
+        self._tancada = False
+
+    def cursor(self, *args, tuples=False, **kwargs):
+        cur = self._conn.cursor()
+        if tuples:
+            cur.row_factory = None  # tuples natives de sqlite3, sense Fila
+        return CursorSQLite(cur)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._tancada:
+            return
+        self._tancada = True
+        if self._backend is None:
+            self._conn.close()
+        else:
+            self._backend._alliberar(self._torneig)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipus, valor, traca):
+        if tipus is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def __del__(self):
+        # Connexions no tancades explícitament (camins d'error)
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class BackendSQLite:
+    """
+    SQLite en fitxer o en memòria. En memòria hi ha una sola connexió
+    compartida per torneig: cada get_conn() la reserva per al fil fins al
+    close(), i en tancar l'última es desfà el que no s'hagi confirmat (com
+    a Postgres). En fitxer, cada torneig té el seu: base.<slug>.db.
+    """
+    nom = "sqlite"
+    errors_connexio = (sqlite3.OperationalError,)
+
+    def __init__(self, cami=None):
+        self.cami = cami or ":memory:"
+        self.memoria = self.cami == ":memory:"
+        self._lock = threading.RLock()
+        self._profunditat = {}
+        self._conns = {}
+        self._fitxers_preparats = set()
+        self.crear_espai(None)
+
+    @staticmethod
+    def _obrir(cami, timeout=10):
+        conn = sqlite3.connect(cami, timeout=timeout, check_same_thread=False)
+        conn.row_factory = _fabrica_files
+        # Com a Postgres: REFERENCES ... ON DELETE SET NULL s'ha d'aplicar
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def cami_torneig(self, torneig):
+        if torneig is None:
+            return self.cami
+        arrel, extensio = os.path.splitext(self.cami)
+        return f"{arrel}.{validar_slug(torneig)}{extensio or '.db'}"
+
+    def crear_espai(self, torneig):
+        if self.memoria:
+            with self._lock:
+                if torneig not in self._conns:
+                    if torneig is not None:
+                        validar_slug(torneig)
+                    self._conns[torneig] = self._obrir(":memory:")
+                    self._profunditat[torneig] = 0
+            return
+        cami = self.cami_torneig(torneig)
+        if cami not in self._fitxers_preparats:
+            conn = self._obrir(cami)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.close()
+            self._fitxers_preparats.add(cami)
+
+    def connectar(self, mesurat=False, torneig=None, temps_max=None):
+        if not self.memoria:
+            self.crear_espai(torneig)
+            # temps_max: com a molt aquest temps esperant un bloqueig d'escriptura
+            timeout = 10 if temps_max is None else min(10, temps_max)
+            return ConnexioSQLite(self._obrir(self.cami_torneig(torneig), timeout))
+        self.crear_espai(torneig)
+        self._lock.acquire()
+        self._profunditat[torneig] += 1
+        return ConnexioSQLite(self._conns[torneig], self, torneig)
+
+    def _alliberar(self, torneig):
+        self._profunditat[torneig] -= 1
+        conn = self._conns[torneig]
+        if self._profunditat[torneig] == 0 and conn.in_transaction:
+            conn.rollback()
+        self._lock.release()
+
+    def execute_values(self, cur, sql, argslist, template=None, page_size=100, fetch=False):
+        """Equivalent a psycopg2.extras.execute_values (VALUES %s amb moltes files)."""
+        files = [tuple(f) for f in argslist]
+        sql = _VALUES_ALIAS.sub(
+            lambda m: "(SELECT " + ", ".join(
+                f"column{i + 1} AS {col.strip()}" for i, col in enumerate(m.group(2).split(","))
+            ) + f" FROM (VALUES %s)) AS {m.group(1)}",
+            sql,
+        )
+        resultat = []
+        for i in range(0, len(files), page_size):
+            pagina = files[i:i + page_size]
+            plantilla = template or "(" + ", ".join(["%s"] * len(pagina[0])) + ")"
+            antes, _, despres = sql.partition("VALUES %s")
+            cur.execute(
+                antes.replace("%", "%%") + "VALUES " + ", ".join([plantilla] * len(pagina)) +
+                despres.replace("%", "%%"),
+                [v for fila in pagina for v in fila],
+            )
+            if fetch:
+                resultat.extend(cur.fetchall())
+        return resultat if fetch else None
+
+    def es_columna_duplicada(self, e):
+        return isinstance(e, sqlite3.OperationalError) and "duplicate column" in str(e)
+
+    def tipus_error(self, e):
+        if not isinstance(e, sqlite3.OperationalError):
+            return None
+        missatge = str(e)
+        if missatge.startswith(("database is locked", "database table is locked")):
+            return "temps"
+        if missatge.startswith(("unable to open database", "disk I/O error")):
+            return "connexio"
+        return None
+
+    def retard_replica(self, conn):
+        return 0.0
+
+    def descripcio(self):
+        return "SQLite en memòria" if self.memoria else f"SQLite ({self.cami})"
+
+
+# --------------------------------------------------------
+# 📇 CURSOR DE TUPLES (files tipades)
+# --------------------------------------------------------
+def cursor_tuples(conn):
+    """Cursor que retorna tuples simples, per construir-hi files tipades."""
+    if isinstance(conn, ConnexioSQLite):
+        return conn.cursor(tuples=True)
+    if conn.cursor_factory is metriques.CursorMesurat:
+        return conn.cursor(cursor_factory=metriques.CursorTuplesMesurat)
+    return conn.cursor(cursor_factory=metriques.CursorTuples)
+
+
+# --------------------------------------------------------
+# 🔀 SELECCIÓ SEGONS DATABASE_URL
+# --------------------------------------------------------
+def crear_backend(url, sslmode=None):
+    if not url:
+        raise ValueError("Falta DATABASE_URL (per a dades en memòria: memory://)")
+    if url in ("sqlite://", "sqlite:///:memory:", "memory://"):
+        return BackendSQLite()
+    if url.startswith("sqlite:///"):
+        return BackendSQLite(url[len("sqlite:///"):])
+    if url.startswith(("postgres://", "postgresql://")):
+        return BackendPostgres(url, sslmode)
+    raise ValueError(f"DATABASE_URL no suportada: {url.split(':', 1)[0]}://…")
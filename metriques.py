@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from psycopg2.extensions import cursor as CursorTuples
+from psycopg2.extras import DictCursor
+
+# --------------------------------------------------------
+# 📈 MÈTRIQUES (temps de petició, BD, plantilles i PDF)
+# --------------------------------------------------------
+# S'activa amb METRIQUES=1. Desactivat, db.get_conn fa servir el cursor
+# normal i els hooks de Flask surten a la primera línia.
+ACTIVAT = os.environ.get("METRIQUES", "0") == "1"
+
+# Detector de consultes (desenvolupament / staging): DETECTOR_CONSULTES=1.
+# Guarda cada consulta amb el seu punt de crida i, en acabar la petició,
+# avisa de sentències repetides (N+1), pressupost superat i consultes lentes.
+DETECTOR = os.environ.get("DETECTOR_CONSULTES", "0") == "1"
+ACTIVAT = ACTIVAT or DETECTOR
+
+PRESSUPOST_CONSULTES = int(os.environ.get("PRESSUPOST_CONSULTES", "20"))
+LLINDAR_REPETIDES = int(os.environ.get("LLINDAR_REPETIDES", "5"))
+CONSULTA_LENTA_MS = float(os.environ.get("CONSULTA_LENTA_MS", "100"))
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_local = threading.local()
+
+# nom -> {etiquetes: valor}
+_comptadors = {}
+# nom -> {etiquetes: [comptes per bucket..., suma, total]}
+_histogrames = {}
+
+AJUDA = {
+    "cvpa_peticions_total": "Peticions HTTP ateses",
+    "cvpa_peticio_segons": "Temps total de cada petició",
+    "cvpa_db_connexions_total": "Connexions obertes a la base de dades",
+    "cvpa_db_consultes_total": "Consultes executades",
+    "cvpa_db_consulta_segons": "Durada de cada consulta",
+    "cvpa_plantilla_segons": "Temps de renderitzar plantilles Jinja",
+    "cvpa_pdf_segons": "Temps de generar PDFs (sense les consultes)",
+}
+
+
+def _comptar(nom, etiquetes=(), n=1):
+    with _lock:
+        serie = _comptadors.setdefault(nom, {})
+        serie[etiquetes] = serie.get(etiquetes, 0) + n
+
+
+def _observar(nom, valor, etiquetes=()):
+    with _lock:
+        serie = _histogrames.setdefault(nom, {})
+        h = serie.get(etiquetes)
+        if h is None:
+            h = serie[etiquetes] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, limit in enumerate(BUCKETS):
+            if valor <= limit:
+                h[i] += 1
+        h[-2] += valor
+        h[-1] += 1
+
+
+# --------------------------------------------------------
+# 🧵 ACUMULADORS PER PETICIÓ
+# --------------------------------------------------------
+def iniciar_peticio():
+    _local.peticio = {
+        "inici": time.perf_counter(),
+        "connexions": 0,
+        "consultes": 0,
+        "db": 0.0,
+        "plantilla": 0.0,
+        "pdf": 0.0,
+        "detall": [] if DETECTOR else None,
+    }
+
+
+def acabar_peticio(ruta, metode, codi):
+    """Tanca la petició en curs i retorna els seus acumuladors (o None)."""
+    dades = getattr(_local, "peticio", None)
+    if dades is None:
+        return None
+    _local.peticio = None
+    dades["total"] = time.perf_counter() - dades["inici"]
+    _comptar("cvpa_peticions_total", (("ruta", ruta), ("metode", metode), ("codi", str(codi))))
+    _observar("cvpa_peticio_segons", dades["total"], (("ruta", ruta),))
+    return dades
+
+
+def _sumar(clau, valor, n=None):
+    dades = getattr(_local, "peticio", None)
+    if dades is not None:
+        dades[clau] += valor
+        if n is not None:
+            dades["consultes"] += n
+
+
+def comptar_connexio():
+    _comptar("cvpa_db_connexions_total")
+    dades = getattr(_local, "peticio", None)
+    if dades is not None:
+        dades["connexions"] += 1
+
+
+def registrar_consulta(durada, tipus, query=None):
+    _comptar("cvpa_db_consultes_total", (("tipus", tipus),))
+    _observar("cvpa_db_consulta_segons", durada)
+    _sumar("db", durada, 1)
+
+    if DETECTOR and query is not None:
+        dades = getattr(_local, "peticio", None)
+        if dades is not None:
+            dades["detall"].append((normalitzar_sql(query), durada, punt_de_crida()))
+
+
+# --------------------------------------------------------
+# 🔎 DETECTOR DE N+1 I CONSULTES LENTES
+# --------------------------------------------------------
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPAIS = re.compile(r"\s+")
+_AQUEST_FITXER = os.path.abspath(__file__)
+_DIR_PROJECTE = os.path.dirname(_AQUEST_FITXER)
+
+
+def normalitzar_sql(query):
+    """SQL sense literals ni espais sobrers, per agrupar sentències iguals."""
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = str(query)
+    return _ESPAIS.sub(" ", _LITERALS.sub("?", query)).strip()
+
+
+def punt_de_crida(profunditat=3):
+    """
+    Els primers marcs de la pila que són codi del projecte (fora d'aquest
+    mòdul), p.ex. "db.py:612 calcular_classificacio ← routes.py:480 ...".
+    """
+    llocs = []
+    marc = sys._getframe(2)
+    while marc is not None and len(llocs) < profunditat:
+        fitxer = os.path.abspath(marc.f_code.co_filename)
+        if fitxer.startswith(_DIR_PROJECTE) and fitxer != _AQUEST_FITXER:
+            rel = os.path.relpath(fitxer, _DIR_PROJECTE)
+            llocs.append(f"{rel}:{marc.f_lineno} {marc.f_code.co_name}")
+        marc = marc.f_back
+    return " ← ".join(llocs) or "?"
+
+
+def informe_consultes(dades):
+    """
+    Retorna la llista d'avisos d'una petició (buida si tot és correcte):
+    pressupost superat, sentències repetides i consultes lentes.
+    """
+    detall = dades.get("detall") or []
+    avisos = []
+
+    if len(detall) > PRESSUPOST_CONSULTES:
+        avisos.append(f"{len(detall)} consultes (pressupost {PRESSUPOST_CONSULTES})")
+
+    per_sql = defaultdict(list)
+    for sql, durada, lloc in detall:
+        per_sql[sql].append((durada, lloc))
+    for sql, crides in sorted(per_sql.items(), key=lambda x: -len(x[1])):
+        if len(crides) < LLINDAR_REPETIDES:
+            break
+        llocs = sorted({lloc for _, lloc in crides})
+        total_ms = sum(d for d, _ in crides) * 1000
+        avisos.append(
+            f"N+1? {len(crides)}x ({total_ms:.0f} ms) {sql[:120]}\n"
+            + "".join(f"        des de {lloc}\n" for lloc in llocs[:3]).rstrip()
+        )
+
+    for sql, durada, lloc in detall:
+        if durada * 1000 >= CONSULTA_LENTA_MS:
+            avisos.append(f"lenta {durada * 1000:.0f} ms {sql[:120]}\n        des de {lloc}")
+
+    return avisos
+
+
+def registrar_plantilla(nom, durada):
+    _observar("cvpa_plantilla_segons", durada, (("plantilla", nom),))
+    _sumar("plantilla", durada)
+
+
+def mesurar_pdf(f):
+    """Decorador: temps de generar el PDF, descomptant-ne les consultes."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not ACTIVAT:
+            return f(*args, **kwargs)
+        dades = getattr(_local, "peticio", None)
+        db_abans = dades["db"] if dades else 0.0
+        inici = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            durada = time.perf_counter() - inici
+            if dades:
+                durada -= dades["db"] - db_abans
+            _observar("cvpa_pdf_segons", durada)
+            _sumar("pdf", durada)
+    return wrapper
+
+
+# --------------------------------------------------------
+# 🗄 CURSOR AMB TEMPS
+# --------------------------------------------------------
+class _Mesurat:
+    """Registra nombre i durada de cada consulta del cursor."""
+
+    def execute(self, query, vars=None):
+        inici = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            registrar_consulta(time.perf_counter() - inici, "execute", query)
+
+    def executemany(self, query, vars_list):
+        inici = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            registrar_consulta(time.perf_counter() - inici, "executemany", query)
+
+
+class CursorMesurat(_Mesurat, DictCursor):
+    """DictCursor que registra nombre i durada de cada consulta."""
+
+
+class CursorTuplesMesurat(_Mesurat, CursorTuples):
+    """Cursor de tuples (files tipades) que registra les consultes."""
+
+
+# --------------------------------------------------------
+# 📤 FORMATS DE SORTIDA
+# --------------------------------------------------------
+def server_timing(dades):
+    """Capçalera Server-Timing a partir dels acumuladors d'una petició."""
+    parts = [
+        f'db;dur={dades["db"] * 1000:.1f};desc="{dades["consultes"]} consultes, '
+        f'{dades["connexions"]} connexions"',
+    ]
+    if dades["plantilla"]:
+        parts.append(f'tpl;dur={dades["plantilla"] * 1000:.1f}')
+    if dades["pdf"]:
+        parts.append(f'pdf;dur={dades["pdf"] * 1000:.1f}')
+    parts.append(f'total;dur={dades["total"] * 1000:.1f}')
+    return ", ".join(parts)
+
+
+def _etiquetes(etiquetes, extra=()):
+    parelles = tuple(etiquetes) + tuple(extra)
+    if not parelles:
+        return ""
+    cos = ",".join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in parelles
+    )
+    return "{" + cos + "}"
+
+
+def format_prometheus(extres=None):
+    """
+    Text en format d'exposició de Prometheus. extres: {nom: (tipus, ajuda,
+    {etiquetes: valor})} per afegir mètriques d'altres mòduls.
+    """
+    linies = []
+    with _lock:
+        comptadors = {n: dict(s) for n, s in _comptadors.items()}
+        histogrames = {n: {k: list(h) for k, h in s.items()} for n, s in _histogrames.items()}
+
+    for nom in sorted(comptadors):
+        linies.append(f"# HELP {nom} {AJUDA.get(nom, nom)}")
+        linies.append(f"# TYPE {nom} counter")
+        for etiquetes, valor in sorted(comptadors[nom].items()):
+            linies.append(f"{nom}{_etiquetes(etiquetes)} {valor}")
+
+    for nom in sorted(histogrames):
+        linies.append(f"# HELP {nom} {AJUDA.get(nom, nom)}")
+        linies.append(f"# TYPE {nom} histogram")
+        for etiquetes, h in sorted(histogrames[nom].items()):
+            for limit, n in zip(BUCKETS, h):
+                linies.append(f"{nom}_bucket{_etiquetes(etiquetes, (('le', limit),))} {n}")
+            linies.append(f"{nom}_bucket{_etiquetes(etiquetes, (('le', '+Inf'),))} {h[-1]}")
+            linies.append(f"{nom}_sum{_etiquetes(etiquetes)} {h[-2]:.6f}")
+            linies.append(f"{nom}_count{_etiquetes(etiquetes)} {h[-1]}")
+
+    for nom, (tipus, ajuda, serie) in sorted((extres or {}).items()):
+        linies.append(f"# HELP {nom} {ajuda}")
+        linies.append(f"# TYPE {nom} {tipus}")
+        for etiquetes, valor in sorted(serie.items()):
+            linies.append(f"{nom}{_etiquetes(etiquetes)} {valor}")
+
+    return "\n".join(linies) + "\n"
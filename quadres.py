@@ -0,0 +1,337 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# --------------------------------------------------------
+# 🏆 QUADRES DE LA FASE FINAL
+# --------------------------------------------------------
+# Cada partit té dues fonts: "E3" (tercer equip de la fase), "w_5"
+# (guanyador del partit 5) o "l_5" (perdedor del partit 5). Del quadre es
+# deriva un cop el graf de destins (on va el guanyador i el perdedor de
+# cada partit), i l'estat es resol i s'actualitza sobre aquest graf.
+#
+# Formats:
+#   classic     quadres fets a mà per a 7–10 equips (els de sempre)
+#   simple      eliminació directa + partit pel 3r lloc
+#   consolacio  eliminació directa + quadre de consolació dels perdedors
+#               de la primera ronda
+#   doble       doble eliminació (quadre de guanyadors i de perdedors)
+# Amb N que no és potència de 2, els millors caps de sèrie passen ronda.
+
+FORMATS = ("classic", "simple", "consolacio", "doble")
+
+BYE = None
+
+# Quadres fets a mà que ja s'han fet servir en torneigs anteriors. Es
+# mantenen tal qual (numeració i posicions) perquè els quadres desats i
+# impresos no canviïn.
+QUADRES_FIXOS = {
+    7: {
+        1: ("E4", "E5"), 2: ("E2", "E7"), 3: ("E3", "E6"), 4: ("E1", "w_1"),
+        5: ("w_2", "w_3"), 6: ("l_2", "l_4"), 7: ("l_1", "l_3"), 8: ("w_6", "w_7"),
+        9: ("w_4", "w_5"), 10: ("w_8", "l_5"), 11: ("w_10", "l_9"), 12: ("w_9", "w_11"),
+    },
+    8: {
+        1: ("E1", "E8"), 2: ("E4", "E5"), 3: ("E3", "E6"), 4: ("E2", "E7"),
+        5: ("l_4", "l_3"), 6: ("l_1", "l_2"), 7: ("w_1", "w_2"), 8: ("w_3", "w_4"),
+        9: ("w_5", "l_7"), 10: ("w_6", "l_8"), 11: ("w_7", "w_8"), 12: ("w_9", "w_10"),
+        13: ("w_12", "l_11"), 14: ("w_11", "w_13"),
+    },
+    9: {
+        1: ("E8", "E9"), 2: ("E2", "E7"), 3: ("E4", "E5"), 4: ("E3", "E6"),
+        5: ("E1", "w_1"), 6: ("l_3", "l_1"), 7: ("l_4", "l_2"), 8: ("w_6", "l_5"),
+        9: ("w_5", "w_3"), 10: ("w_2", "w_4"), 11: ("l_10", "w_7"), 12: ("l_9", "w_8"),
+        13: ("w_9", "w_10"), 14: ("w_11", "w_12"), 15: ("l_13", "w_14"), 16: ("w_13", "w_15"),
+    },
+    10: {
+        1: ("E7", "E10"), 2: ("E8", "E9"), 3: ("E4", "E5"), 4: ("E3", "E6"),
+        5: ("w_2", "E1"), 6: ("w_1", "E2"), 7: ("l_1", "l_3"), 8: ("l_2", "l_4"),
+        9: ("w_3", "w_5"), 10: ("w_6", "w_4"), 11: ("w_7", "l_5"), 12: ("w_8", "l_6"),
+        13: ("w_11", "l_9"), 14: ("w_12", "l_10"), 15: ("w_9", "w_10"), 16: ("w_13", "w_14"),
+        17: ("l_15", "w_16"), 18: ("w_15", "w_17"),
+    },
+}
+
+POSICIONS_FIXES = {
+    7: {
+        1: (40, 30), 2: (40, 130), 3: (40, 230), 4: (290, 80), 5: (290, 180),
+        6: (290, 400), 7: (290, 500), 8: (540, 450), 9: (540, 130), 10: (790, 450),
+        11: (865, 350), 12: (865, 200),
+    },
+    8: {
+        1: (40, 30), 2: (40, 130), 3: (40, 230), 4: (40, 330), 5: (290, 400),
+        6: (290, 500), 7: (290, 80), 8: (290, 180), 9: (540, 400), 10: (540, 500),
+        11: (540, 130), 12: (800, 450), 13: (865, 350), 14: (990, 200),
+    },
+    9: {
+        1: (10, 30), 2: (10, 130), 3: (10, 230), 4: (10, 330), 5: (220, 80),
+        6: (200, 430), 7: (400, 430), 8: (400, 530), 9: (460, 80), 10: (460, 180),
+        11: (600, 430), 12: (600, 530), 13: (710, 130), 14: (800, 480), 15: (900, 380),
+        16: (1000, 250),
+    },
+    10: {
+        1: (30, 30), 2: (30, 130), 3: (250, 30), 4: (250, 130), 5: (250, 230),
+        6: (250, 330), 7: (470, 360), 8: (470, 460), 9: (470, 60), 10: (470, 220),
+        11: (690, 360), 12: (690, 460), 13: (910, 360), 14: (910, 460), 15: (690, 140),
+        16: (1130, 400), 17: (1200, 300), 18: (1300, 200),
+    },
+}
+
+# Mides de la graella automàtica (les caselles fan 180x72 al CSS)
+AMPLE_COLUMNA = 230
+ALT_FILA = 100
+MARGE = 30
+
+Quadre = namedtuple("Quadre", "format n partits destins final posicions")
+
+
+def format_per_defecte(n):
+    return "classic" if n in QUADRES_FIXOS else "doble"
+
+
+# --------------------------------------------------------
+# 🔹 GENERACIÓ
+# --------------------------------------------------------
+def ordre_llavors(mida):
+    """Ordre de caps de sèrie d'un quadre de mida potència de 2: 1, 8, 4, 5, 2, 7, 3, 6."""
+    ordre = [1]
+    while len(ordre) < mida:
+        suma = len(ordre) * 2 + 1
+        ordre = [x for llavor in ordre for x in (llavor, suma - llavor)]
+    return ordre
+
+
+class _Generador:
+    """Acumula partits (font1, font2) amb identificadors provisionals."""
+
+    def __init__(self):
+        self.partits = []
+
+    def partit(self, a, b):
+        self.partits.append((a, b))
+        return len(self.partits)
+
+    def ronda(self, fonts):
+        """Aparella fonts consecutives; retorna els identificadors dels partits."""
+        return [self.partit(fonts[i], fonts[i + 1]) for i in range(0, len(fonts) - 1, 2)]
+
+    def eliminatoria(self, fonts):
+        """Eliminació directa sobre les fonts; retorna les rondes (llistes d'ids)."""
+        rondes = []
+        while len(fonts) > 1:
+            ids = self.ronda(fonts)
+            rondes.append(ids)
+            fonts = [f"w_{p}" for p in ids]
+        return rondes
+
+
+def _generar(format, n):
+    mida = 1
+    while mida < n:
+        mida *= 2
+
+    gen = _Generador()
+    fonts = [f"E{llavor}" if llavor <= n else BYE for llavor in ordre_llavors(mida)]
+    guanyadors = gen.eliminatoria(fonts)
+    final = guanyadors[-1][0]
+
+    if format in ("simple", "consolacio") and len(guanyadors) >= 2:
+        gen.ronda([f"l_{p}" for p in guanyadors[-2]])
+
+    # Amb només dues rondes, els perdedors de la primera ja juguen pel 3r lloc
+    if format == "consolacio" and len(guanyadors) >= 3:
+        gen.eliminatoria([f"l_{p}" for p in guanyadors[0]])
+
+    if format == "doble":
+        perdedors = [f"l_{p}" for p in guanyadors[0]]
+        if len(perdedors) > 1:
+            perdedors = [f"w_{p}" for p in gen.ronda(perdedors)]
+        for r, ronda in enumerate(guanyadors[1:], start=1):
+            # Els que baixen s'encreuen en rondes alternes per evitar repetir partits
+            baixen = [f"l_{p}" for p in (ronda if r % 2 else reversed(ronda))]
+            perdedors = [f"w_{gen.partit(a, b)}" for a, b in zip(perdedors, baixen)]
+            if len(perdedors) > 1:
+                perdedors = [f"w_{p}" for p in gen.ronda(perdedors)]
+        final = gen.partit(f"w_{final}", perdedors[0])
+
+    partits, substitut = _treure_byes(gen.partits)
+    return _numerar(partits, font_partit(substitut.get(f"w_{final}", f"w_{final}")))
+
+
+def _treure_byes(partits):
+    """
+    Elimina els partits amb un BYE: l'altra font passa directament al
+    destí del guanyador i el perdedor no existeix. Els partits es creen
+    sempre després de les seves fonts, així que n'hi ha prou amb una passada.
+    """
+    substitut = {}
+    resultat = {}
+    for pid, (a, b) in enumerate(partits, start=1):
+        a, b = substitut.get(a, a), substitut.get(b, b)
+        if a is BYE or b is BYE:
+            substitut[f"w_{pid}"] = b if a is BYE else a
+            substitut[f"l_{pid}"] = BYE
+        else:
+            resultat[pid] = (a, b)
+    return resultat, substitut
+
+
+def _numerar(partits, final):
+    """Numera els partits per ordre de joc (ronda, ordre de creació) i la final l'última."""
+    ronda = {}
+    for pid, fonts in partits.items():
+        ronda[pid] = 1 + max((ronda[font_partit(f)] for f in fonts if f[0] != "E"), default=0)
+
+    ordre = sorted(partits, key=lambda pid: (ronda[pid], pid == final, pid))
+    nou = {vell: i for i, vell in enumerate(ordre, start=1)}
+
+    def renumerar(font):
+        return font if font[0] == "E" else f"{font[:2]}{nou[font_partit(font)]}"
+
+    return {nou[pid]: tuple(renumerar(f) for f in partits[pid]) for pid in ordre}
+
+
+def _graella(partits):
+    """Posicions (x, y) per columnes de ronda, cada columna centrada verticalment."""
+    ronda = {}
+    columnes = {}
+    for pid, fonts in partits.items():
+        ronda[pid] = 1 + max((ronda[font_partit(f)] for f in fonts if f[0] != "E"), default=0)
+        columnes.setdefault(ronda[pid], []).append(pid)
+
+    alt = max(len(c) for c in columnes.values()) * ALT_FILA
+    posicions = {}
+    for r, pids in columnes.items():
+        pas = alt / len(pids)
+        for i, pid in enumerate(pids):
+            posicions[pid] = (MARGE + (r - 1) * AMPLE_COLUMNA, int(MARGE + i * pas + (pas - ALT_FILA) / 2))
+    return posicions
+
+
+def font_partit(font):
+    """Partit d'on surt una font: w_5 i l_5 -> 5, E3 -> None."""
+    return int(font[2:]) if font[0] in "wl" else None
+
+
+def _destins(partits):
+    """Graf de destins: {partit: {"w": (partit, casella) o None, "l": ...}}."""
+    destins = {pid: {"w": None, "l": None} for pid in partits}
+    for pid, fonts in partits.items():
+        for casella, font in enumerate(fonts, start=1):
+            origen = font_partit(font)
+            if origen is not None:
+                if destins[origen][font[0]] is not None:
+                    raise ValueError(f"La font {font} apareix en dos partits")
+                destins[origen][font[0]] = (pid, casella)
+    return destins
+
+
+@lru_cache(maxsize=64)
+def quadre(n, format=None):
+    """Estructura del quadre per a n equips (es calcula un cop per (n, format))."""
+    format = format or format_per_defecte(n)
+    if format not in FORMATS:
+        raise ValueError(f"Format de quadre desconegut: {format}")
+    if format == "classic" and n not in QUADRES_FIXOS:
+        raise ValueError(f"El quadre clàssic és per a 7–10 equips, no {n}")
+    if n < 2:
+        raise ValueError("Calen com a mínim 2 equips per fer un quadre")
+
+    if format == "classic":
+        partits = QUADRES_FIXOS[n]
+        posicions = POSICIONS_FIXES[n]
+    else:
+        partits = _generar(format, n)
+        posicions = _graella(partits)
+    return Quadre(format, n, partits, _destins(partits), max(partits), posicions)
+
+
+# --------------------------------------------------------
+# 🔹 ESTAT (resultats aplicats sobre el quadre)
+# --------------------------------------------------------
+class EstatQuadre:
+    """
+    Equips de cada casella (índex de llavor, 0 = E1) i guanyador de cada
+    partit (1 o 2). aplicar() propaga un resultat només pel graf de
+    destins i retorna els partits que han canviat.
+    """
+    __slots__ = ("quadre", "caselles", "guanyadors")
+
+    def __init__(self, quadre):
+        self.quadre = quadre
+        self.caselles = {}
+        self.guanyadors = {}
+        for pid, fonts in quadre.partits.items():
+            self.caselles[pid] = [
+                int(f[1:]) - 1 if f[0] == "E" and int(f[1:]) <= quadre.n else None
+                for f in fonts
+            ]
+
+    def equip_sortida(self, pid, tipus):
+        """Equip que surt del partit com a guanyador ("w") o perdedor ("l")."""
+        g = self.guanyadors.get(pid)
+        if g is None:
+            return None
+        return self.caselles[pid][g - 1 if tipus == "w" else 2 - g]
+
+    def aplicar(self, pid, guanyador):
+        """guanyador: 1, 2 o None (esborrar). Retorna el conjunt de partits canviats."""
+        if pid not in self.caselles:
+            raise ValueError(f"Partit {pid} inexistent")
+        if guanyador is not None:
+            if guanyador not in (1, 2):
+                raise ValueError("El guanyador ha de ser 1 o 2")
+            if None in self.caselles[pid]:
+                raise ValueError(f"Al partit {pid} encara hi falta un equip")
+        if self.guanyadors.get(pid) == guanyador:
+            return set()
+
+        if guanyador is None:
+            self.guanyadors.pop(pid, None)
+        else:
+            self.guanyadors[pid] = guanyador
+
+        canviats = {pid}
+        pendents = [pid]
+        while pendents:
+            origen = pendents.pop()
+            for tipus, desti in self.quadre.destins[origen].items():
+                if desti is None:
+                    continue
+                dpid, casella = desti
+                equip = self.equip_sortida(origen, tipus)
+                if self.caselles[dpid][casella - 1] == equip:
+                    continue
+                self.caselles[dpid][casella - 1] = equip
+                canviats.add(dpid)
+                # Un resultat amb un equip diferent ja no val: s'esborra i es propaga
+                if self.guanyadors.pop(dpid, None) is not None:
+                    pendents.append(dpid)
+        return canviats
+
+    def resultats(self):
+        return dict(self.guanyadors)
+
+
+def resoldre(quadre, resultats=None):
+    """EstatQuadre amb els resultats {partit: 1|2} aplicats en ordre de joc."""
+    estat = EstatQuadre(quadre)
+    resultats = resultats or {}
+    for pid in sorted(quadre.partits):
+        guanyador = resultats.get(pid)
+        if guanyador in (1, 2) and None not in estat.caselles[pid]:
+            estat.aplicar(pid, guanyador)
+    return estat
+
+
+def resultats_per_noms(quadre, equips, guanyadors):
+    """
+    Converteix resultats desats amb noms ({partit: nom del guanyador}, format
+    antic del navegador) a {partit: 1|2}, resolent el quadre en ordre de joc.
+    """
+    index = {nom: i for i, nom in enumerate(equips)}
+    estat = EstatQuadre(quadre)
+    for pid in sorted(quadre.partits):
+        equip = index.get(guanyadors.get(pid))
+        if equip is not None and equip in estat.caselles[pid] and None not in estat.caselles[pid]:
+            estat.aplicar(pid, estat.caselles[pid].index(equip) + 1)
+    return estat.resultats()
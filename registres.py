@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+# --------------------------------------------------------
+# 📇 FILES TIPADES
+# --------------------------------------------------------
+# Tuples amb nom per a les lectures freqüents: fila[1] i fila.equip1
+# funcionen igual, sense cap diccionari per fila. db.py les construeix
+# directament des d'un cursor de tuples (fetchall_tipus). A les plantilles
+# Jinja, fila.camp i fila["camp"] continuen funcionant.
+
+Equip = namedtuple("Equip", "id nom_participants nom_equip valor email telefon grup ordre")
+
+# Ordre de columnes d'obtenir_partits (el que esperen classificacio_grup i el PDF)
+Partit = namedtuple("Partit", "id equip1 equip2 arbitre punts1 punts2 jugat hora pista")
+
+# Partit complet per a l'API d'àrbitres (amb grup i versió)
+PartitArbitre = namedtuple(
+    "PartitArbitre", "id grup equip1 equip2 arbitre punts1 punts2 jugat versio hora pista"
+)
+
+FaseEquip = namedtuple("FaseEquip", "equip_nom posicio")
+
+ClassificatFinal = namedtuple(
+    "ClassificatFinal", "equip_nom punts dif_gol pos_grup grup posicio equip_id"
+)
+
+# Una entrada de la classificació única (entrada a la fase final)
+Classificat = namedtuple("Classificat", "equip punts dif pf pc pos grup")
+
+
+class Estadistiques:
+    """Estadístiques d'un equip dins d'un grup (mutable, sense __dict__)."""
+    __slots__ = ("punts", "favor", "contra", "diferencia", "pj", "pg", "pp")
+
+    def __init__(self):
+        self.punts = 0
+        self.favor = 0
+        self.contra = 0
+        self.diferencia = 0
+        self.pj = 0
+        self.pg = 0
+        self.pp = 0
+
+    def _asdict(self):
+        return {camp: getattr(self, camp) for camp in self.__slots__}
+
+    def __repr__(self):
+        return "Estadistiques(" + ", ".join(f"{c}={getattr(self, c)}" for c in self.__slots__) + ")"